@@ -0,0 +1,151 @@
+"""Composite and partial indexes for threat indicator hot paths
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+Tables themselves are created by create_tables() on startup; this revision adds
+the indexes that create_all() does not retrofit onto existing tables. Each index
+is skipped if it already exists, so the revision is safe on fresh databases too.
+"""
+
+from typing import Optional, Set
+
+from alembic import op
+import sqlalchemy as sa
+import logging
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+ACTIVE_ONLY = {
+    "sqlite_where": sa.text("is_active = 1"),
+    "postgresql_where": sa.text("is_active")
+}
+
+INDEXES = [
+    ("threat_indicators", "ix_threat_indicators_last_seen_id", ["last_seen", "id"], {}),
+    ("threat_indicators", "ix_threat_indicators_active_severity_last_seen", ["severity", "last_seen"], ACTIVE_ONLY),
+    ("threat_indicators", "ix_threat_indicators_active_type_last_seen", ["type", "last_seen"], ACTIVE_ONLY),
+    ("threat_indicators", "ix_threat_indicators_active_source_last_seen", ["source", "last_seen"], ACTIVE_ONLY),
+    ("threat_indicators", "ix_threat_indicators_active_severity_confidence", ["severity", "confidence", "last_seen"], ACTIVE_ONLY),
+    ("threat_indicators", "ix_threat_indicators_created_at", ["created_at"], {}),
+    ("cve_data", "ix_cve_data_published_date_id", ["published_date", "id"], {}),
+]
+
+def _existing_indexes(table: str) -> Optional[Set[str]]:
+    """Index names on ``table``, or None if the table has not been created yet."""
+    inspector = sa.inspect(op.get_bind())
+    if table not in inspector.get_table_names():
+        return None
+    return {index["name"] for index in inspector.get_indexes(table)}
+
+SEVERITY_ORDER = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+ROLLUP_TABLES = ("alert_rollup_hourly", "alert_rollup_daily")
+
+def _merge_duplicate_indicators():
+    """Fold duplicate (type, value) rows into the newest one, repointing references.
+
+    The kept row takes the widest first/last seen range, the highest severity and
+    confidence, and stays active if any duplicate was. Alerts, activity events and
+    alert rollups are moved to it (rollup buckets are summed) before the now
+    unreferenced duplicates are removed.
+    """
+    bind = op.get_bind()
+    tables = set(sa.inspect(bind).get_table_names())
+    groups = bind.execute(sa.text("""
+        SELECT type, value, MAX(id) FROM threat_indicators
+        GROUP BY type, value HAVING COUNT(*) > 1
+    """)).all()
+    
+    for indicator_type, value, keep_id in groups:
+        rows = bind.execute(sa.text("""
+            SELECT id, severity, confidence, first_seen, last_seen, is_active
+            FROM threat_indicators WHERE type = :type AND value = :value
+        """), {"type": indicator_type, "value": value}).all()
+        duplicate_ids = [row.id for row in rows if row.id != keep_id]
+        
+        severities = [row.severity for row in rows if row.severity in SEVERITY_ORDER]
+        first_seen = [row.first_seen for row in rows if row.first_seen is not None]
+        last_seen = [row.last_seen for row in rows if row.last_seen is not None]
+        confidence = [row.confidence for row in rows if row.confidence is not None]
+        bind.execute(sa.text("""
+            UPDATE threat_indicators
+            SET severity = :severity, confidence = :confidence, first_seen = :first_seen,
+                last_seen = :last_seen, is_active = :is_active
+            WHERE id = :id
+        """), {
+            "id": keep_id,
+            "severity": max(severities, key=SEVERITY_ORDER.index) if severities else None,
+            "confidence": max(confidence) if confidence else None,
+            "first_seen": min(first_seen) if first_seen else None,
+            "last_seen": max(last_seen) if last_seen else None,
+            "is_active": any(row.is_active for row in rows)
+        })
+        
+        params = {"keep_id": keep_id, "duplicate_ids": duplicate_ids}
+        for table in ("alerts", "activity_events"):
+            if table in tables:
+                bind.execute(sa.text(
+                    f"UPDATE {table} SET indicator_id = :keep_id WHERE indicator_id IN :duplicate_ids"
+                ).bindparams(sa.bindparam("duplicate_ids", expanding=True)), params)
+        
+        for table in ROLLUP_TABLES:
+            if table not in tables:
+                continue
+            buckets = bind.execute(sa.text(
+                f"SELECT id, indicator_id, bucket, alert_count, max_severity FROM {table} "
+                f"WHERE indicator_id = :keep_id OR indicator_id IN :duplicate_ids"
+            ).bindparams(sa.bindparam("duplicate_ids", expanding=True)), params).all()
+            merged = {}
+            for bucket in buckets:
+                total = merged.setdefault(bucket.bucket, {"ids": [], "alert_count": 0, "max_severity": 0})
+                total["ids"].append(bucket.id)
+                total["alert_count"] += bucket.alert_count
+                total["max_severity"] = max(total["max_severity"], bucket.max_severity)
+            for total in merged.values():
+                survivor, *extra = sorted(total["ids"])
+                if extra:
+                    bind.execute(sa.text(f"DELETE FROM {table} WHERE id IN :ids").bindparams(
+                        sa.bindparam("ids", expanding=True)
+                    ), {"ids": extra})
+                bind.execute(sa.text(
+                    f"UPDATE {table} SET indicator_id = :keep_id, alert_count = :alert_count, "
+                    f"max_severity = :max_severity WHERE id = :id"
+                ), {
+                    "id": survivor, "keep_id": keep_id,
+                    "alert_count": total["alert_count"], "max_severity": total["max_severity"]
+                })
+        
+        bind.execute(sa.text("DELETE FROM threat_indicators WHERE id IN :duplicate_ids").bindparams(
+            sa.bindparam("duplicate_ids", expanding=True)
+        ), params)
+    
+    if groups:
+        logger.info(f"Merged duplicate threat indicators for {len(groups)} (type, value) pairs")
+
+def upgrade():
+    existing = _existing_indexes("threat_indicators")
+    
+    if existing is not None and "uq_threat_indicators_type_value" not in existing:
+        _merge_duplicate_indicators()
+        op.create_index("uq_threat_indicators_type_value", "threat_indicators", ["type", "value"], unique=True)
+    
+    for table, name, columns, kwargs in INDEXES:
+        existing = _existing_indexes(table)
+        if existing is not None and name not in existing:
+            op.create_index(name, table, columns, **kwargs)
+
+def downgrade():
+    for table, name, _, _ in reversed(INDEXES):
+        existing = _existing_indexes(table)
+        if existing is not None and name in existing:
+            op.drop_index(name, table_name=table)
+    
+    existing = _existing_indexes("threat_indicators")
+    if existing is not None and "uq_threat_indicators_type_value" in existing:
+        op.drop_index("uq_threat_indicators_type_value", table_name="threat_indicators")
@@ -0,0 +1,24 @@
+"""Indexed substring and full-text search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+SQLite: FTS5 trigram tables plus sync triggers for threat_indicators and cve_data.
+PostgreSQL: pg_trgm GIN indexes on value/id and tsvector GIN indexes on description.
+"""
+
+from alembic import op
+
+from app.db.search_index import install_search_index, drop_search_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    install_search_index(op.get_bind())
+
+def downgrade():
+    drop_search_index(op.get_bind())
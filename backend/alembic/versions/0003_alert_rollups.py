@@ -0,0 +1,78 @@
+"""Alert rollup tables and activity event ring
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("alert_rollup_hourly", "alert_rollup_daily")
+
+def _existing_tables() -> set:
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+def upgrade():
+    existing = _existing_tables()
+    created = []
+    
+    for table in ROLLUP_TABLES:
+        if table in existing:
+            continue
+        created.append(table)
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("indicator_id", sa.Integer(), sa.ForeignKey("threat_indicators.id", ondelete="CASCADE"), nullable=False),
+            sa.Column("bucket", sa.DateTime(), nullable=False),
+            sa.Column("alert_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("max_severity", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index(f"ix_{table}_id", table, ["id"])
+        op.create_index(f"uq_{table}_indicator_bucket", table, ["indicator_id", "bucket"], unique=True)
+        op.create_index(f"ix_{table}_bucket", table, ["bucket"])
+    
+    if "activity_events" not in existing:
+        op.create_table(
+            "activity_events",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=False),
+            sa.Column("event_type", sa.String(50), nullable=False),
+            sa.Column("message", sa.Text(), nullable=False),
+            sa.Column("severity", sa.String(20)),
+            sa.Column("indicator_id", sa.Integer()),
+        )
+        op.create_index("ix_activity_events_id", "activity_events", ["id"])
+    
+    # Backfill new rollup tables from alerts written before this revision
+    if "alerts" in existing and created:
+        severity_rank = (
+            "CASE severity WHEN 'CRITICAL' THEN 4 WHEN 'HIGH' THEN 3 "
+            "WHEN 'MEDIUM' THEN 2 WHEN 'LOW' THEN 1 ELSE 0 END"
+        )
+        dialect = op.get_bind().dialect.name
+        # Match SQLAlchemy's SQLite DateTime storage format so upserts hit the same bucket
+        hour = "strftime('%Y-%m-%d %H:00:00.000000', created_at)" if dialect == "sqlite" else "date_trunc('hour', created_at)"
+        day = "strftime('%Y-%m-%d 00:00:00.000000', created_at)" if dialect == "sqlite" else "date_trunc('day', created_at)"
+        for table, bucket in (("alert_rollup_hourly", hour), ("alert_rollup_daily", day)):
+            if table not in created:
+                continue
+            op.execute(f"""
+                INSERT INTO {table} (indicator_id, bucket, alert_count, max_severity)
+                SELECT indicator_id, {bucket}, COUNT(*), MAX({severity_rank})
+                FROM alerts
+                WHERE indicator_id IS NOT NULL AND created_at IS NOT NULL
+                GROUP BY indicator_id, {bucket}
+            """)
+
+def downgrade():
+    existing = _existing_tables()
+    for table in ("activity_events",) + ROLLUP_TABLES:
+        if table in existing:
+            op.drop_table(table)
@@ -0,0 +1,80 @@
+"""CPE match criteria for CVE exposure queries
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+
+import json
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+_CPE23_SPLIT = re.compile(r"(?<!\\):")
+_ANY = {"", "*", "-"}
+
+def _parse_cpe(cpe):
+    """(vendor, product, version) of a CPE 2.3 string, as app.services.cpe_index.parse_cpe."""
+    if not isinstance(cpe, str) or not cpe.startswith("cpe:2.3:"):
+        return None
+    fields = [re.sub(r"\\(.)", r"\1", field).lower() for field in _CPE23_SPLIT.split(cpe)[3:6]]
+    if len(fields) < 2 or fields[0] in _ANY or fields[1] in _ANY:
+        return None
+    version = fields[2] if len(fields) > 2 else ""
+    return fields[0], fields[1], None if version in _ANY else version
+
+def upgrade():
+    bind = op.get_bind()
+    existing = set(sa.inspect(bind).get_table_names())
+    if "cpe_matches" in existing:
+        return
+    
+    cpe_matches = op.create_table(
+        "cpe_matches",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("cve_id", sa.String(32), sa.ForeignKey("cve_data.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("vendor", sa.String(255), nullable=False),
+        sa.Column("product", sa.String(255), nullable=False),
+        sa.Column("version", sa.String(100)),
+        sa.Column("version_start_including", sa.String(100)),
+        sa.Column("version_start_excluding", sa.String(100)),
+        sa.Column("version_end_including", sa.String(100)),
+        sa.Column("version_end_excluding", sa.String(100)),
+        sa.Column("criteria", sa.Text(), nullable=False),
+    )
+    op.create_index("ix_cpe_matches_id", "cpe_matches", ["id"])
+    op.create_index("ix_cpe_matches_vendor_product", "cpe_matches", ["vendor", "product"])
+    op.create_index("ix_cpe_matches_cve_id", "cpe_matches", ["cve_id"])
+    
+    if "cve_data" not in existing:
+        return
+    
+    # Backfill exact/wildcard criteria from affected_products; version ranges
+    # arrive with the next NVD import
+    result = bind.execute(sa.text("SELECT id, affected_products FROM cve_data WHERE is_active"))
+    rows = []
+    for cve_id, products in result:
+        if isinstance(products, str):
+            products = json.loads(products)
+        for cpe in dict.fromkeys(products or []):
+            parsed = _parse_cpe(cpe)
+            if parsed:
+                rows.append({
+                    "cve_id": cve_id,
+                    "vendor": parsed[0],
+                    "product": parsed[1],
+                    "version": parsed[2],
+                    "criteria": cpe,
+                })
+    if rows:
+        op.bulk_insert(cpe_matches, rows)
+
+def downgrade():
+    if "cpe_matches" in set(sa.inspect(op.get_bind()).get_table_names()):
+        op.drop_table("cpe_matches")
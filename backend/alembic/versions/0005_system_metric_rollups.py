@@ -0,0 +1,53 @@
+"""System metric rollup tiers
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("system_metric_rollup_1m", "system_metric_rollup_1h", "system_metric_rollup_1d")
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    
+    if "system_metrics" in existing:
+        indexes = {index["name"] for index in inspector.get_indexes("system_metrics")}
+        if "ix_system_metrics_name_timestamp" not in indexes:
+            op.create_index("ix_system_metrics_name_timestamp", "system_metrics", ["metric_name", "timestamp"])
+    
+    for table in ROLLUP_TABLES:
+        if table in existing:
+            continue
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("metric_name", sa.String(100), nullable=False),
+            sa.Column("bucket", sa.DateTime(), nullable=False),
+            sa.Column("sample_count", sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("value_sum", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("value_min", sa.Float()),
+            sa.Column("value_max", sa.Float()),
+        )
+        op.create_index(f"ix_{table}_id", table, ["id"])
+        op.create_index(f"uq_{table}_name_bucket", table, ["metric_name", "bucket"], unique=True)
+        op.create_index(f"ix_{table}_bucket", table, ["bucket"])
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+    existing = set(inspector.get_table_names())
+    for table in ROLLUP_TABLES:
+        if table in existing:
+            op.drop_table(table)
+    if "system_metrics" in existing:
+        indexes = {index["name"] for index in inspector.get_indexes("system_metrics")}
+        if "ix_system_metrics_name_timestamp" in indexes:
+            op.drop_index("ix_system_metrics_name_timestamp", table_name="system_metrics")
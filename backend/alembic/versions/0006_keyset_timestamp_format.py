@@ -0,0 +1,41 @@
+"""Normalize SQLite text timestamps used as keyset sort keys
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+Rows stamped by CURRENT_TIMESTAMP are stored as 'YYYY-MM-DD HH:MM:SS' while
+SQLAlchemy binds 'YYYY-MM-DD HH:MM:SS.ffffff', so a cursor taken from such a
+row sorts before its own row and the next page repeats it. Rewrite them in
+SQLAlchemy's format. Other dialects store real timestamps and need nothing.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+KEYSET_COLUMNS = [
+    ("threat_indicators", "last_seen"),
+    ("cve_data", "published_date"),
+]
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != "sqlite":
+        return
+    
+    tables = set(sa.inspect(bind).get_table_names())
+    for table, column in KEYSET_COLUMNS:
+        if table in tables:
+            op.execute(
+                f"UPDATE {table} SET {column} = strftime('%Y-%m-%d %H:%M:%f000', {column}) "
+                f"WHERE length({column}) = 19"
+            )
+
+def downgrade():
+    # The normalized format is what SQLAlchemy writes itself; nothing to undo
+    pass
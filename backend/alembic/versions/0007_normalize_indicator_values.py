@@ -0,0 +1,84 @@
+"""Store threat indicator values in normalized form
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+Exact matching compares the normalized form of a submitted indicator with the
+stored value, so rows written before values were normalized on insert (an
+uppercase SHA256, a defanged domain) were never found. Rewrite them, folding
+rows that collapse onto the same (type, value) with the merge from 0001.
+"""
+
+import importlib.util
+import ipaddress
+import logging
+import os
+from urllib.parse import urlsplit, urlunsplit
+
+from alembic import op
+import sqlalchemy as sa
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+UNIQUE_INDEX = "uq_threat_indicators_type_value"
+
+def _normalize(indicator: str) -> str:
+    """Frozen copy of crud_threat.normalize_indicator as of this revision."""
+    value = indicator.strip().strip("\"'<>")
+    value = value.replace("[.]", ".").replace("(.)", ".").replace("[:]", ":")
+    if value.lower().startswith(("hxxp://", "hxxps://")):
+        value = "http" + value[4:]
+
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        pass
+
+    if "://" in value:
+        parts = urlsplit(value)
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, parts.fragment))
+
+    return value.lower().rstrip(".")
+
+def _merge_duplicate_indicators():
+    path = os.path.join(os.path.dirname(__file__), "0001_threat_indicator_indexes.py")
+    spec = importlib.util.spec_from_file_location("_revision_0001", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module._merge_duplicate_indicators()
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if "threat_indicators" not in inspector.get_table_names():
+        return
+
+    rows = bind.execute(sa.text("SELECT id, value FROM threat_indicators")).all()
+    changed = [
+        {"id": row.id, "value": _normalize(row.value)}
+        for row in rows if row.value is not None and _normalize(row.value) != row.value
+    ]
+    if not changed:
+        return
+
+    # Rewritten values may collide until duplicates are merged
+    has_unique = UNIQUE_INDEX in {index["name"] for index in inspector.get_indexes("threat_indicators")}
+    if has_unique:
+        op.drop_index(UNIQUE_INDEX, table_name="threat_indicators")
+
+    bind.execute(sa.text("UPDATE threat_indicators SET value = :value WHERE id = :id"), changed)
+    _merge_duplicate_indicators()
+
+    if has_unique:
+        op.create_index(UNIQUE_INDEX, "threat_indicators", ["type", "value"], unique=True)
+    logger.info(f"Normalized {len(changed)} threat indicator values")
+
+def downgrade():
+    # The original spellings are not kept; normalized values stay valid
+    pass
@@ -0,0 +1,28 @@
+"""Key the CVE full-text index by an explicit INTEGER key
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+cve_data has a TEXT primary key, so the FTS5 table from 0002 was keyed by its
+implicit rowid, which VACUUM may renumber and silently misattribute matches.
+SQLite: replace it with an FTS table holding its own copy of the text, keyed
+by an INTEGER from cve_data_fts_keys. PostgreSQL indexes are unaffected.
+"""
+
+from alembic import op
+
+from app.db.search_index import install_search_index
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Detects the rowid-keyed layout, drops it and rebuilds from cve_data
+    install_search_index(op.get_bind())
+
+def downgrade():
+    # The keyed layout is what 0002 installs from now on; nothing to undo
+    pass
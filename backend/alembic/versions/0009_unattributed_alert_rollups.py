@@ -0,0 +1,101 @@
+"""Roll up alerts that have no indicator
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+
+Alerts raised without an indicator were left out of the rollups, so the
+dashboard's 24h alert count missed them. indicator_id becomes nullable and a
+partial unique index keeps one NULL-keyed row per bucket; existing alerts of
+that kind are backfilled.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+ROLLUP_TABLES = ("alert_rollup_hourly", "alert_rollup_daily")
+UNATTRIBUTED = "indicator_id IS NULL"
+
+def _index_name(table: str) -> str:
+    return f"uq_{table}_unattributed_bucket"
+
+def _rollup_table(table: str, nullable: bool) -> sa.Table:
+    """The table as created by 0003, with indicator_id ``nullable``."""
+    metadata = sa.MetaData()
+    # Only resolves the foreign key; threat_indicators may not exist yet
+    sa.Table("threat_indicators", metadata, sa.Column("id", sa.Integer(), primary_key=True))
+    return sa.Table(
+        table, metadata,
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("indicator_id", sa.Integer(), sa.ForeignKey("threat_indicators.id", ondelete="CASCADE"), nullable=nullable),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("alert_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_severity", sa.Integer(), nullable=False, server_default="0"),
+        sa.Index(f"ix_{table}_id", "id"),
+        sa.Index(f"uq_{table}_indicator_bucket", "indicator_id", "bucket", unique=True),
+        sa.Index(f"ix_{table}_bucket", "bucket"),
+    )
+
+def _set_indicator_nullable(table: str, nullable: bool, tables: set):
+    if "threat_indicators" not in tables:
+        # 0003 ran before create_tables(): no row can reference an indicator yet,
+        # and SQLite will not rename a rebuilt table whose foreign key dangles
+        op.drop_table(table)
+        _rollup_table(table, nullable).create(op.get_bind())
+        return
+    with op.batch_alter_table(table) as batch:
+        batch.alter_column("indicator_id", existing_type=sa.Integer(), nullable=nullable)
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    tables = set(inspector.get_table_names())
+    dialect = bind.dialect.name
+
+    # Match SQLAlchemy's SQLite DateTime storage format so upserts hit the same bucket
+    buckets = {
+        "alert_rollup_hourly": "strftime('%Y-%m-%d %H:00:00.000000', created_at)" if dialect == "sqlite" else "date_trunc('hour', created_at)",
+        "alert_rollup_daily": "strftime('%Y-%m-%d 00:00:00.000000', created_at)" if dialect == "sqlite" else "date_trunc('day', created_at)",
+    }
+    severity_rank = (
+        "CASE severity WHEN 'CRITICAL' THEN 4 WHEN 'HIGH' THEN 3 "
+        "WHEN 'MEDIUM' THEN 2 WHEN 'LOW' THEN 1 ELSE 0 END"
+    )
+
+    for table in ROLLUP_TABLES:
+        if table not in tables:
+            continue
+        if _index_name(table) in {index["name"] for index in inspector.get_indexes(table)}:
+            # Created by create_tables() from current models: already nullable and counting
+            continue
+
+        _set_indicator_nullable(table, True, tables)
+        op.create_index(
+            _index_name(table), table, ["bucket"], unique=True,
+            sqlite_where=sa.text(UNATTRIBUTED), postgresql_where=sa.text(UNATTRIBUTED)
+        )
+
+        if "alerts" in tables:
+            bucket = buckets[table]
+            op.execute(f"""
+                INSERT INTO {table} (indicator_id, bucket, alert_count, max_severity)
+                SELECT NULL, {bucket}, COUNT(*), MAX({severity_rank})
+                FROM alerts
+                WHERE indicator_id IS NULL AND created_at IS NOT NULL
+                GROUP BY {bucket}
+            """)
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in ROLLUP_TABLES:
+        if table not in tables:
+            continue
+        if "threat_indicators" in tables:
+            op.execute(f"DELETE FROM {table} WHERE {UNATTRIBUTED}")
+            op.drop_index(_index_name(table), table_name=table)
+        _set_indicator_nullable(table, False, tables)
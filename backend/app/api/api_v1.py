@@ -5,7 +5,7 @@ API v1 router configuration.
 from fastapi import APIRouter
 
 # Import endpoint routers
-from app.api.endpoints import threats, alerts, dashboard, system
+from app.api.endpoints import threats, alerts, dashboard, system, cves
 
 api_router = APIRouter()
 
@@ -16,6 +16,12 @@ api_router.include_router(
     tags=["threats"]
 )
 
+api_router.include_router(
+    cves.router,
+    prefix="/cves",
+    tags=["cves"]
+)
+
 api_router.include_router(
     alerts.router,
     prefix="/alerts",
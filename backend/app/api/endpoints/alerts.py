@@ -10,8 +10,9 @@ from app.db.database import get_db
 from app.schemas.alert import AlertResponse, AlertConfigurationRequest, AlertConfigurationResponse
 from app.crud.crud_alert import (
     get_alert_configurations, create_alert_configuration,
-    get_alert_configuration, update_alert_configuration
+    get_alert_configuration, update_alert_configuration, create_alert
 )
+from app.db.models import ThreatSeverity
 
 router = APIRouter()
 
@@ -43,11 +44,19 @@ async def get_alert_config(config_id: int, db: AsyncSession = Depends(get_db)):
     return config
 
 @router.get("/test")
-async def send_test_alert():
-    """Send a test alert to verify configuration."""
+async def send_test_alert(db: AsyncSession = Depends(get_db)):
+    """Record a test alert to verify the alert pipeline."""
+    alert = await create_alert(
+        db,
+        title="Test alert",
+        message="Test alert to verify alert configuration",
+        severity=ThreatSeverity.LOW,
+        extra_metadata={"alert_type": "test"}
+    )
     return {
         "message": "Test alert sent successfully",
-        "timestamp": "2025-09-05T10:00:00Z",
+        "alert_id": alert.id,
+        "timestamp": alert.created_at.isoformat(),
         "alert_type": "test",
         "status": "success"
     }
@@ -0,0 +1,136 @@
+"""
+CVE data endpoints.
+"""
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+from app.db.database import get_db
+from app.schemas.cve import ExposureCheckRequest, ExposureCheckResponse, ExposureResult, CVESummary, CVEPage
+from app.crud.crud_cve import get_cve_summaries, get_cves_page
+from app.services.nvd_importer import nvd_importer
+from app.services.cpe_index import cpe_index, parse_cpe
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/", response_model=CVEPage)
+async def read_cves(
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(100, ge=1, le=1000),
+    severity: Optional[str] = None,
+    min_cvss_score: Optional[float] = Query(None, ge=0, le=10),
+    is_active: bool = True,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get a page of CVEs, most recently published first."""
+    try:
+        cves, next_cursor = await get_cves_page(
+            db, cursor=cursor, limit=limit,
+            severity=severity, min_cvss_score=min_cvss_score, active_only=is_active
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": cves, "next_cursor": next_cursor, "limit": limit}
+
+async def _run_import(modified_since: Optional[datetime], full: bool):
+    try:
+        if full or modified_since:
+            await nvd_importer.import_api(modified_since)
+        else:
+            await nvd_importer.run_incremental()
+    except Exception as e:
+        logger.error(f"❌ NVD import failed: {e}")
+
+@router.post("/import", status_code=202)
+async def start_nvd_import(
+    background_tasks: BackgroundTasks,
+    modified_since: Optional[datetime] = Query(None, description="Only import CVEs modified after this time (UTC)"),
+    full: bool = Query(False, description="Import the whole NVD corpus instead of changes since the last import")
+):
+    """Start an NVD import in the background; poll /import/status for progress."""
+    if nvd_importer.running:
+        raise HTTPException(status_code=409, detail="An NVD import is already running")
+    
+    background_tasks.add_task(_run_import, modified_since, full)
+    return {
+        "status": "started",
+        "mode": "full" if full and not modified_since else "incremental",
+        "modified_since": modified_since
+    }
+
+@router.get("/import/status")
+async def get_nvd_import_status():
+    """Get progress of the current or last NVD import."""
+    status = nvd_importer.get_status()
+    watermark = await nvd_importer.get_watermark()
+    status["stored_watermark"] = watermark.isoformat() if watermark else None
+    return status
+
+@router.post("/exposure", response_model=ExposureCheckResponse)
+async def check_exposure(
+    request: ExposureCheckRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Match an asset inventory of CPEs against the CVE version ranges that affect them."""
+    if not cpe_index.ready:
+        raise HTTPException(status_code=503, detail="CPE index is not loaded yet")
+    
+    started = time.perf_counter()
+    matches = await asyncio.to_thread(cpe_index.match_many, request.cpes)
+    
+    cves = await get_cve_summaries(
+        db, [cve_id for cve_ids in matches.values() if cve_ids for cve_id in cve_ids]
+    )
+    if request.min_cvss_score is not None:
+        cves = {
+            cve_id: cve for cve_id, cve in cves.items()
+            if cve.cvss_score is not None and cve.cvss_score >= request.min_cvss_score
+        }
+    
+    results = []
+    for cpe in request.cpes:
+        cve_ids = matches[cpe]
+        if cve_ids is None:
+            results.append(ExposureResult(cpe=cpe, is_exposed=False, error="Unrecognized CPE"))
+            continue
+        # Most severe first
+        matched = sorted(
+            (cve_id for cve_id in cve_ids if cve_id in cves),
+            key=lambda cve_id: (cves[cve_id].cvss_score or 0, cve_id),
+            reverse=True
+        )
+        results.append(ExposureResult(
+            cpe=cpe,
+            is_exposed=bool(matched),
+            cve_ids=matched,
+            version_known=parse_cpe(cpe)[2] is not None
+        ))
+    
+    return ExposureCheckResponse(
+        results=results,
+        cves={
+            cve_id: CVESummary(
+                id=cve.id,
+                severity=cve.severity,
+                cvss_score=cve.cvss_score,
+                published_date=cve.published_date,
+                description=cve.description
+            )
+            for cve_id, cve in cves.items()
+        },
+        total_checked=len(results),
+        exposed_count=sum(1 for result in results if result.is_exposed),
+        took_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
+
+@router.get("/exposure/status")
+async def get_cpe_index_status():
+    """Get the state of the CPE match index."""
+    return cpe_index.get_status()
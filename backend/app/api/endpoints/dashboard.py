@@ -2,22 +2,37 @@
 Dashboard endpoints for overview and monitoring.
 """
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Query, Request
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
-from app.db.database import get_db
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
 from app.crud.crud_threat import get_threat_stats
+from app.crud.crud_alert import count_alerts_since, get_top_indicators as crud_top_indicators
+from app.db.models import IndicatorType
+from app.services.activity_feed import activity_feed
+from app.services.response_cache import ResponseCache
 
 router = APIRouter()
 
+# Shared by every dashboard poller; loaders open their own sessions because
+# stale entries are refreshed after the triggering request has finished
+dashboard_cache = ResponseCache()
+dashboard_cache.register_metrics("dashboard")
+
 @router.get("/summary")
-async def get_dashboard_summary(db: AsyncSession = Depends(get_db)):
+async def get_dashboard_summary(request: Request):
     """Get dashboard summary statistics."""
-    
+    return await dashboard_cache.respond(
+        request, "summary", {}, settings.DASHBOARD_SUMMARY_CACHE_TTL, _build_summary
+    )
+
+async def _build_summary() -> Dict[str, Any]:
     # Get threat statistics
-    threat_stats = await get_threat_stats(db)
+    async with AsyncSessionLocal() as db:
+        threat_stats = await get_threat_stats(db)
+        alerts_24h = await count_alerts_since(db, hours=24)
     
     # Mock real-time data (replace with actual monitoring)
     summary = {
@@ -31,8 +46,8 @@ async def get_dashboard_summary(db: AsyncSession = Depends(get_db)):
             "active_connections": 12
         },
         "recent_activity": {
-            "new_threats_24h": threat_stats.get("new_indicators_24h", 0),
-            "alerts_sent_24h": 5,
+            "new_threats_24h": threat_stats.get("recent_threats_24h", 0),
+            "alerts_sent_24h": alerts_24h,
             "queries_24h": 1247,
             "feeds_updated": 3
         },
@@ -47,60 +62,41 @@ async def get_dashboard_summary(db: AsyncSession = Depends(get_db)):
     return summary
 
 @router.get("/recent-activity")
-async def get_recent_activity(hours: int = 24, db: AsyncSession = Depends(get_db)):
+async def get_recent_activity(request: Request, hours: int = 24):
     """Get recent platform activity."""
-    
-    # Mock recent activity data (replace with actual database queries)
-    activities = [
-        {
-            "timestamp": (datetime.utcnow() - timedelta(minutes=5)).isoformat(),
-            "type": "threat_detected",
-            "message": "New malicious IP detected: 192.168.1.100",
-            "severity": "high"
-        },
-        {
-            "timestamp": (datetime.utcnow() - timedelta(minutes=15)).isoformat(),
-            "type": "feed_update",
-            "message": "AbuseIPDB feed updated successfully",
-            "severity": "info"
-        },
-        {
-            "timestamp": (datetime.utcnow() - timedelta(minutes=30)).isoformat(),
-            "type": "alert_sent",
-            "message": "Critical threat alert sent to admin@company.com",
-            "severity": "medium"
-        }
-    ]
-    
+    return await dashboard_cache.respond(
+        request, "recent-activity", {"hours": hours},
+        settings.DASHBOARD_ACTIVITY_CACHE_TTL, lambda: _build_recent_activity(hours)
+    )
+
+async def _build_recent_activity(hours: int) -> Dict[str, Any]:
+    activities = activity_feed.get_recent(hours=hours)
     return {"activities": activities, "total": len(activities)}
 
 @router.get("/top-indicators")
 async def get_top_indicators(
-    indicator_type: str = "ip", 
-    limit: int = 10, 
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    indicator_type: Optional[IndicatorType] = None, 
+    hours: int = Query(24, ge=1, le=24 * 90),
+    limit: int = Query(10, ge=1, le=100)
 ):
-    """Get top threat indicators by type."""
-    
-    # Mock top indicators (replace with actual database queries)
-    indicators = [
-        {
-            "value": "192.168.1.100",
-            "type": "ip",
-            "threat_count": 15,
-            "severity": "critical",
-            "last_seen": (datetime.utcnow() - timedelta(hours=2)).isoformat()
-        },
-        {
-            "value": "malicious-domain.com",
-            "type": "domain",
-            "threat_count": 8,
-            "severity": "high",
-            "last_seen": (datetime.utcnow() - timedelta(hours=6)).isoformat()
-        }
-    ]
-    
-    return {"indicators": indicators[:limit], "total": len(indicators)}
+    """Get the indicators with the most alerts in the last ``hours`` hours."""
+    return await dashboard_cache.respond(
+        request, "top-indicators",
+        {"indicator_type": indicator_type.value if indicator_type else None, "hours": hours, "limit": limit},
+        settings.DASHBOARD_TOP_INDICATORS_CACHE_TTL,
+        lambda: _build_top_indicators(indicator_type, hours, limit)
+    )
+
+async def _build_top_indicators(indicator_type: Optional[IndicatorType], hours: int, limit: int) -> Dict[str, Any]:
+    async with AsyncSessionLocal() as db:
+        indicators = await crud_top_indicators(db, hours=hours, limit=limit, indicator_type=indicator_type)
+    return {"indicators": indicators, "total": len(indicators)}
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Get dashboard response cache hit/miss counters."""
+    return dashboard_cache.get_status()
 
 @router.get("/health-status")
 async def get_health_status():
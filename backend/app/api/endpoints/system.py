@@ -2,13 +2,32 @@
 System management and monitoring endpoints.
 """
 
-from fastapi import APIRouter
-from datetime import datetime
-import psutil
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
 import platform
+import math
 import sys
 
+from app.core.security import has_permission
+from app.services.monitoring import system_monitor, SAMPLE_FIELDS
+from app.services.metrics_store import metrics_store
+from app.services.loop_watchdog import loop_watchdog
+
 router = APIRouter()
+security = HTTPBearer()
+
+async def require_admin(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Restrict an endpoint to API keys with the admin permission."""
+    if not has_permission(credentials.credentials, "admin"):
+        raise HTTPException(status_code=403, detail="Admin permission required")
+
+def _naive_utc(value: datetime) -> datetime:
+    """Stored metric timestamps are naive UTC; convert zoned query bounds to match."""
+    if value.tzinfo:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
 @router.get("/info")
 async def get_system_info():
@@ -30,63 +49,69 @@ async def get_system_info():
 
 @router.get("/health")
 async def system_health():
-    """Get detailed system health metrics."""
-    
-    try:
-        # CPU information
-        cpu_percent = psutil.cpu_percent(interval=1)
-        cpu_count = psutil.cpu_count()
-        
-        # Memory information
-        memory = psutil.virtual_memory()
-        
-        # Disk information
-        disk = psutil.disk_usage('/')
-        
-        # Network information (if available)
-        try:
-            network = psutil.net_io_counters()
-            network_stats = {
-                "bytes_sent": network.bytes_sent,
-                "bytes_recv": network.bytes_recv,
-                "packets_sent": network.packets_sent,
-                "packets_recv": network.packets_recv
-            }
-        except:
-            network_stats = {"error": "Network stats unavailable"}
-        
-        health_data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "status": "healthy",
-            "cpu": {
-                "usage_percent": cpu_percent,
-                "count": cpu_count
-            },
-            "memory": {
-                "total": memory.total,
-                "available": memory.available,
-                "used": memory.used,
-                "usage_percent": memory.percent
-            },
-            "disk": {
-                "total": disk.total,
-                "used": disk.used,
-                "free": disk.free,
-                "usage_percent": (disk.used / disk.total) * 100
-            },
-            "network": network_stats,
-            "processes": len(psutil.pids())
-        }
-        
-        return health_data
-        
-    except Exception as e:
+    """Get detailed system health metrics from the latest background sample."""
+    details = system_monitor.sampler.details
+    latest = system_monitor.sampler.ring.latest()
+    if not details or not latest:
         return {
             "timestamp": datetime.utcnow().isoformat(),
-            "status": "error",
-            "error": str(e),
-            "message": "Unable to collect system metrics"
+            "status": "starting",
+            "message": "No system metrics sampled yet"
         }
+    
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "sampled_at": details["timestamp"],
+        "status": "healthy",
+        "cpu": {
+            "usage_percent": latest["cpu_usage"],
+            "count": details["cpu_count"]
+        },
+        "memory": details["memory"],
+        "disk": details["disk"],
+        "network": details["network"],
+        "event_loop": {
+            "lag_ms": None if math.isnan(latest["loop_lag_ms"]) else round(latest["loop_lag_ms"], 3)
+        },
+        "processes": details["processes"]
+    }
+
+@router.get("/metrics/history")
+async def system_metrics_history(
+    seconds: Optional[float] = Query(None, gt=0, description="Only samples from the last N seconds")
+):
+    """Get buffered system metric samples with min/avg/max per metric."""
+    return system_monitor.get_history(seconds)
+
+@router.get("/metrics/series")
+async def system_metrics_series(
+    metrics: Optional[List[str]] = Query(None, description="Metric names (default: all)"),
+    start: Optional[datetime] = Query(None, description="Range start (UTC, default: end - 1 hour)"),
+    end: Optional[datetime] = Query(None, description="Range end (UTC, default: now)"),
+    tier: Optional[str] = Query(None, pattern="^(raw|1m|1h|1d)$", description="Force a storage tier")
+):
+    """Get persisted min/avg/max series, read from the tier that fits the time range."""
+    metrics = metrics or list(SAMPLE_FIELDS)
+    unknown = [name for name in metrics if name not in SAMPLE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics: {', '.join(unknown)}")
+    
+    end = _naive_utc(end) if end else datetime.utcnow()
+    start = _naive_utc(start) if start else end - timedelta(hours=1)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    return await metrics_store.query(metrics, start, end, tier)
+
+@router.get("/event-loop/stalls", dependencies=[Depends(require_admin)])
+async def event_loop_stalls(
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Only the N most recent stalls")
+):
+    """Get recorded event loop stalls with the stack of the blocking callback."""
+    return {
+        "watchdog": loop_watchdog.get_status(),
+        "stalls": loop_watchdog.get_stalls(limit)
+    }
 
 @router.get("/status")
 async def get_system_status():
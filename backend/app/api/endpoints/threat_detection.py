@@ -12,6 +12,12 @@ from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
 
+from app.core.metrics import INFERENCE_DURATION, INFERENCE_BATCH_SIZE
+from app.db.database import AsyncSessionLocal
+from app.db.models import IndicatorType, ThreatSeverity
+from app.crud.crud_alert import create_alert
+from app.crud.crud_threat import record_sighting
+
 # Import our trained threat detector
 import sys
 import os
@@ -25,6 +31,14 @@ router = APIRouter(prefix="/threat-detection", tags=["AI Threat Detection"])
 # Global detector instance
 threat_detector = None
 
+# Detector severities ("NORMAL" never raises an alert)
+DETECTION_SEVERITY = {
+    "LOW": ThreatSeverity.LOW,
+    "MEDIUM": ThreatSeverity.MEDIUM,
+    "HIGH": ThreatSeverity.HIGH,
+    "CRITICAL": ThreatSeverity.CRITICAL
+}
+
 def get_threat_detector():
     """Get or initialize the threat detector."""
     global threat_detector
@@ -96,7 +110,9 @@ async def analyze_network_traffic(
             )
         
         # Perform threat analysis
-        result = detector.predict_threat(traffic_data.features)
+        INFERENCE_BATCH_SIZE.labels("predict").observe(1)
+        with INFERENCE_DURATION.labels("predict").time():
+            result = detector.predict_threat(traffic_data.features)
         
         if 'error' in result:
             raise HTTPException(status_code=500, detail=result['error'])
@@ -170,7 +186,9 @@ async def analyze_batch_traffic(
             })
         
         # Perform batch analysis
-        batch_result = detector.batch_analyze(features_batch)
+        INFERENCE_BATCH_SIZE.labels("batch_analyze").observe(len(features_batch))
+        with INFERENCE_DURATION.labels("batch_analyze").time():
+            batch_result = detector.batch_analyze(features_batch)
         
         # Prepare detailed results
         detailed_results = []
@@ -264,22 +282,38 @@ async def process_threat_alert(
     source_ip: Optional[str] = None, 
     destination_ip: Optional[str] = None
 ):
-    """Process threat alert in background."""
+    """Record a detected threat as an indicator sighting and an alert."""
     try:
         logger.warning(f"THREAT DETECTED: {threat_result['threat_type']} - {threat_result['severity']}")
         
-        # Here you can add integration with:
-        # - Alert system
-        # - SIEM integration
-        # - Notification services
-        # - Database logging
-        # - Grafana dashboards
-        
-        # Example: Save to database
-        # await save_threat_to_database(threat_result, source_ip, destination_ip)
-        
-        # Example: Send to alert queue
-        # await send_to_alert_queue(threat_result)
+        severity = DETECTION_SEVERITY.get(str(threat_result.get("severity", "")).upper(), ThreatSeverity.MEDIUM)
+        confidence = float(threat_result.get("confidence", 0.0))
+        async with AsyncSessionLocal() as db:
+            indicator_id = None
+            if source_ip:
+                indicator = await record_sighting(
+                    db, IndicatorType.IP, source_ip, severity, confidence,
+                    source="ai_detection", description=threat_result["threat_type"]
+                )
+                indicator_id = indicator.id
+            
+            await create_alert(
+                db,
+                title=f"{threat_result['threat_type']} detected" + (f" from {source_ip}" if source_ip else ""),
+                message=(
+                    f"AI detection flagged {threat_result['threat_type']} with "
+                    f"{confidence:.0%} confidence"
+                    + (f" ({source_ip} -> {destination_ip})" if source_ip and destination_ip else "")
+                ),
+                severity=severity,
+                indicator_id=indicator_id,
+                extra_metadata={
+                    "source_ip": source_ip,
+                    "destination_ip": destination_ip,
+                    "confidence": confidence,
+                    "detected_at": threat_result.get("timestamp")
+                }
+            )
         
     except Exception as e:
         logger.error(f"Failed to process threat alert: {e}")
@@ -4,39 +4,54 @@ Threat intelligence endpoints.
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
+import time
 
+from app.core.config import settings
 from app.db.database import get_db
 from app.db.models import ThreatIndicator, ThreatSeverity, IndicatorType
-from app.schemas.threat import ThreatIndicatorResponse, ThreatIndicatorCreate, ThreatIndicatorUpdate
+from app.schemas.threat import (
+    ThreatIndicatorResponse, ThreatIndicatorCreate, ThreatIndicatorUpdate, ThreatIndicatorPage,
+    ThreatCheckRequest, ThreatCheckResult, ThreatCheckResponse, SeverityLevel,
+    ThreatScanRequest, ThreatScanMatch, ThreatScanResult, ThreatScanResponse
+)
 from app.crud.crud_threat import (
     get_threat_indicator as get_threat, 
     get_threats, 
+    get_threats_page,
     create_threat_indicator as create_threat, 
     update_threat_indicator as update_threat, 
     delete_threat_indicator as delete_threat,
     search_threats, 
+    match_indicators,
     get_threat_stats
 )
+from app.services.indicator_index import indicator_index, entry_from_row
+from app.services.pattern_scanner import indicator_scanner
 
 router = APIRouter()
 
-@router.get("/", response_model=List[ThreatIndicatorResponse])
+@router.get("/", response_model=ThreatIndicatorPage)
 async def read_threats(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the previous page's next_cursor"),
+    limit: int = Query(100, ge=1, le=1000),
     severity: Optional[ThreatSeverity] = None,
     indicator_type: Optional[IndicatorType] = None,
     is_active: bool = True,
     db: AsyncSession = Depends(get_db)
 ):
-    """Get a list of threat indicators."""
-    threats = await get_threats(
-        db, skip=skip, limit=limit, 
-        severity=severity, indicator_type=indicator_type, is_active=is_active
-    )
-    return threats
+    """Get a page of threat indicators, newest first."""
+    try:
+        threats, next_cursor = await get_threats_page(
+            db, cursor=cursor, limit=limit,
+            severity=severity, type=indicator_type, active_only=is_active
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"results": threats, "next_cursor": next_cursor, "limit": limit}
 
 @router.get("/search/")
 async def search_threat_indicators(
@@ -45,7 +60,7 @@ async def search_threat_indicators(
     db: AsyncSession = Depends(get_db)
 ):
     """Search threat indicators."""
-    results = await search_threats(db, query=q, limit=limit)
+    results = await search_threats(db, search_query=q, limit=limit)
     return {"results": results, "total": len(results)}
 
 @router.get("/stats/")
@@ -54,23 +69,119 @@ async def get_threat_statistics(db: AsyncSession = Depends(get_db)):
     stats = await get_threat_stats(db)
     return stats
 
-@router.get("/check")
+def _build_check_result(indicator: str, threat: Optional[Dict[str, Any]], match_type: Optional[str]) -> ThreatCheckResult:
+    """Convert a matched indicator entry into a ThreatCheckResult."""
+    if threat is None:
+        return ThreatCheckResult(indicator=indicator, is_malicious=False)
+    
+    metadata = threat["extra_metadata"] or {}
+    confidence = int(round((threat["confidence"] or 0) * 100))
+    return ThreatCheckResult(
+        indicator=indicator,
+        is_malicious=True,
+        severity=SeverityLevel(threat["severity"].value.capitalize()) if threat["severity"] else None,
+        confidence=confidence,
+        sources=[threat["source"]] if threat["source"] else [],
+        first_seen=threat["first_seen"],
+        last_seen=threat["last_seen"],
+        tags=metadata.get("tags") or [],
+        reported_by=threat["source"],
+        related_cves=metadata.get("related_cves") or [],
+        malware_family=metadata.get("malware_family"),
+        threat_score=int(metadata.get("threat_score") or confidence),
+        match_type=match_type
+    )
+
+async def _check_indicators(db: AsyncSession, indicators: List[str], fuzzy: bool) -> ThreatCheckResponse:
+    started = time.perf_counter()
+    if indicator_index.ready:
+        # Served from memory; only substring fallbacks for misses hit the database
+        matches = indicator_index.match_many(indicators)
+        if not fuzzy:
+            matches = {
+                indicator: match if match[1] == "exact" else (None, None)
+                for indicator, match in matches.items()
+            }
+        else:
+            misses = [indicator for indicator, (entry, _) in matches.items() if entry is None]
+            if misses:
+                for indicator, (threat, match_type) in (await match_indicators(db, misses, fuzzy=True)).items():
+                    if threat is not None:
+                        matches[indicator] = (entry_from_row(threat), match_type)
+    else:
+        matches = {
+            indicator: (entry_from_row(threat) if threat else None, match_type)
+            for indicator, (threat, match_type) in (await match_indicators(db, indicators, fuzzy=fuzzy)).items()
+        }
+    
+    results = [
+        _build_check_result(indicator, *matches[indicator])
+        for indicator in dict.fromkeys(indicators)
+    ]
+    return ThreatCheckResponse(
+        results=results,
+        total_checked=len(results),
+        malicious_count=sum(1 for result in results if result.is_malicious),
+        execution_time_ms=round((time.perf_counter() - started) * 1000, 2)
+    )
+
+@router.get("/check", response_model=ThreatCheckResponse)
 async def check_indicators(
     indicators: List[str] = Query(..., description="List of indicators to check"),
+    fuzzy: bool = Query(False, description="Fall back to CIDR, parent-domain and substring matching"),
     db: AsyncSession = Depends(get_db)
 ):
     """Check multiple indicators against threat intelligence."""
+    return await _check_indicators(db, indicators, fuzzy)
+
+@router.post("/check", response_model=ThreatCheckResponse)
+async def check_indicators_batch(
+    request: ThreatCheckRequest,
+    db: AsyncSession = Depends(get_db)
+):
+    """Check a large batch of indicators against threat intelligence."""
+    return await _check_indicators(db, request.indicators, request.fuzzy)
+
+@router.post("/scan", response_model=ThreatScanResponse)
+async def scan_documents(request: ThreatScanRequest):
+    """Scan a batch of documents for any known indicator in a single pass each."""
+    if not indicator_scanner.ready:
+        raise HTTPException(status_code=503, detail="Indicator scanner is still building")
+    
+    started = time.perf_counter()
+    max_matches = min(request.max_matches_per_document, settings.SCANNER_MAX_MATCHES_PER_DOCUMENT)
+    scanned = await asyncio.to_thread(indicator_scanner.scan_many, request.documents, max_matches)
+    elapsed = time.perf_counter() - started
+    
     results = []
-    for indicator in indicators:
-        # Simple search by value
-        threats = await search_threats(db, query=indicator, limit=10)
-        results.append({
-            "indicator": indicator,
-            "is_threat": len(threats) > 0,
-            "matches": threats[:5],  # Return top 5 matches
-            "threat_count": len(threats)
-        })
-    return {"results": results}
+    for document_index, matches in enumerate(scanned):
+        results.append(ThreatScanResult(
+            document_index=document_index,
+            is_malicious=bool(matches),
+            matches=[
+                ThreatScanMatch(
+                    indicator=match["entry"]["value"],
+                    matched_text=match["matched_text"],
+                    offset=match["offset"],
+                    type=match["entry"]["type"].value if match["entry"]["type"] else None,
+                    severity=SeverityLevel(match["entry"]["severity"].value.capitalize()) if match["entry"]["severity"] else None,
+                    confidence=int(round((match["entry"]["confidence"] or 0) * 100)),
+                    source=match["entry"]["source"],
+                    indicator_ids=[entry["id"] for entry in match["entries"]]
+                )
+                for match in matches
+            ]
+        ))
+    
+    total_bytes = sum(len(document.encode("utf-8")) for document in request.documents)
+    return ThreatScanResponse(
+        results=results,
+        total_documents=len(results),
+        total_bytes=total_bytes,
+        match_count=sum(len(result.matches) for result in results),
+        execution_time_ms=round(elapsed * 1000, 2),
+        throughput_mb_s=round(total_bytes / (1024 * 1024) / elapsed, 2) if elapsed > 0 else 0.0
+    )
 
 @router.get("/critical/")
 async def get_critical_threats(
@@ -91,7 +202,7 @@ async def analyze_indicator(
 ):
     """Analyze a single indicator."""
     # Check if indicator exists in database
-    existing_threats = await search_threats(db, query=indicator, limit=10)
+    existing_threats = await search_threats(db, search_query=indicator, limit=10)
     
     analysis = {
         "indicator": indicator,
@@ -126,7 +237,10 @@ async def create_threat_indicator(
     db: AsyncSession = Depends(get_db)
 ):
     """Create a new threat indicator."""
-    return await create_threat(db=db, threat=threat)
+    try:
+        return await create_threat(db, threat)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="A threat indicator with this type and value already exists")
 
 @router.put("/{threat_id}", response_model=ThreatIndicatorResponse)
 async def update_threat_indicator(
@@ -146,4 +260,5 @@ async def delete_threat_indicator(threat_id: int, db: AsyncSession = Depends(get
     success = await delete_threat(db, threat_id=threat_id)
     if not success:
         raise HTTPException(status_code=404, detail="Threat not found")
+    indicator_index.remove(threat_id)
     return {"message": "Threat indicator deleted successfully"}
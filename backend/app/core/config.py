@@ -37,6 +37,9 @@ class Settings(BaseSettings):
     
     # Feed Configuration
     FEED_UPDATE_INTERVAL: int = 60  # minutes
+    FEED_SCHEDULE_JITTER_SECONDS: int = 120
+    FEED_MAX_BACKOFF_FACTOR: int = 8  # max multiple of update_frequency when a feed is unchanged
+    FEED_INGESTION_BATCH_SIZE: int = 500  # items committed per checkpoint
     CORRELATION_CHECK_INTERVAL: int = 15  # minutes
     
     # Alert Thresholds
@@ -54,12 +57,28 @@ class Settings(BaseSettings):
     SIEM_SPLUNK_PASSWORD: str = ""
     SIEM_SPLUNK_HEC_TOKEN: str = ""
     SIEM_SPLUNK_INDEX: str = "threat_intel"
+    SIEM_SPLUNK_HEC_URL: str = ""  # e.g. https://splunk.example.com:8088
+    SIEM_SPLUNK_HEC_BATCH_EVENTS: int = 1000
+    SIEM_SPLUNK_HEC_BATCH_BYTES: int = 1_000_000
+    SIEM_SPLUNK_HEC_FLUSH_INTERVAL: float = 1.0  # seconds
+    SIEM_SPLUNK_HEC_ACK: bool = True
+    SIEM_SPLUNK_HEC_ACK_TIMEOUT: float = 30.0  # seconds
+    SIEM_SPLUNK_HEC_MAX_CONNECTIONS: int = 4
+    SIEM_SPLUNK_HEC_VERIFY_SSL: bool = True
+    SIEM_SPLUNK_SEARCH_TIMEOUT: float = 60.0  # seconds
 
     SIEM_ELASTICSEARCH_ENABLED: bool = False
     SIEM_ELASTICSEARCH_URL: str = ""
     SIEM_ELASTICSEARCH_USERNAME: str = ""
     SIEM_ELASTICSEARCH_PASSWORD: str = ""
     SIEM_ELASTICSEARCH_INDEX: str = "threat-intel"
+    SIEM_ELASTICSEARCH_CONNECTIONS_PER_NODE: int = 10
+    SIEM_ELASTICSEARCH_REQUEST_TIMEOUT: float = 10.0  # seconds
+    SIEM_ELASTICSEARCH_STATUS_TIMEOUT: float = 5.0  # seconds, for ping/info/health
+    SIEM_ELASTICSEARCH_BULK_BATCH_SIZE: int = 500
+    SIEM_ELASTICSEARCH_BULK_FLUSH_INTERVAL: float = 1.0  # seconds
+    SIEM_ELASTICSEARCH_BULK_BUFFER_SIZE: int = 10000  # max documents waiting to be indexed
+    SIEM_ELASTICSEARCH_BULK_MAX_RETRIES: int = 3
 
     SIEM_SENTINEL_ENABLED: bool = False
     SIEM_SENTINEL_URL: str = ""
@@ -68,6 +87,19 @@ class Settings(BaseSettings):
     SIEM_SENTINEL_CLIENT_SECRET: str = ""
     SIEM_SENTINEL_WORKSPACE_ID: str = ""
 
+    # Durable delivery queue for SIEM sinks
+    CLOUD_OUTBOX_ENABLED: bool = True
+    CLOUD_OUTBOX_PATH: str = "data/cloud_outbox.db"
+    CLOUD_OUTBOX_BATCH_SIZE: int = 500
+    CLOUD_OUTBOX_MAX_BACKOFF: float = 300.0  # seconds
+
+    # Circuit breakers and health probing for SIEM sinks
+    CLOUD_BREAKER_FAILURE_RATE: float = 0.5
+    CLOUD_BREAKER_MIN_CALLS: int = 5
+    CLOUD_BREAKER_WINDOW: int = 20
+    CLOUD_BREAKER_OPEN_SECONDS: float = 30.0
+    CLOUD_HEALTH_PROBE_INTERVAL: float = 30.0  # seconds
+
     SIEM_GENERIC_ENABLED: bool = False
     SIEM_GENERIC_WEBHOOK_URL: str = ""
     SIEM_GENERIC_API_KEY: str = ""
@@ -100,6 +132,76 @@ class Settings(BaseSettings):
     THREAT_HUNTING_MAX_RESULTS: int = int(os.getenv("THREAT_HUNTING_MAX_RESULTS", "5000"))
     THREAT_HUNTING_DEFAULT_LIMIT: int = int(os.getenv("THREAT_HUNTING_DEFAULT_LIMIT", "1000"))
     
+    # Federated search result cache
+    SEARCH_CACHE_MAX_ENTRIES: int = 512
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    SEARCH_CACHE_TTL_SECONDS: float = 300.0
+    # Deliveries invalidate cached searches at most this often (bounds staleness)
+    SEARCH_CACHE_INVALIDATE_INTERVAL_SECONDS: float = 5.0
+    
+    # In-memory indicator match index
+    INDICATOR_INDEX_ENABLED: bool = True
+    INDICATOR_INDEX_REFRESH_SECONDS: int = 30
+    INDICATOR_INDEX_MAX_DELTA: int = 50000  # larger deltas trigger a full rebuild
+    
+    # Threat statistics aggregate
+    THREAT_STATS_RECONCILE_SECONDS: int = 300
+    
+    # Dashboard response cache
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 256
+    DASHBOARD_CACHE_STALE_SECONDS: float = 60.0
+    DASHBOARD_SUMMARY_CACHE_TTL: float = 10.0
+    DASHBOARD_ACTIVITY_CACHE_TTL: float = 15.0
+    DASHBOARD_TOP_INDICATORS_CACHE_TTL: float = 60.0
+    
+    # Alert rollup retention; hourly buckets are kept for at least 48h regardless
+    ALERT_ROLLUP_HOURLY_RETENTION_DAYS: int = 7
+    ALERT_ROLLUP_DAILY_RETENTION_DAYS: int = 365
+    ALERT_ROLLUP_PURGE_BATCH_SIZE: int = 5000
+    
+    # Dashboard activity ring
+    ACTIVITY_RING_SIZE: int = 1000
+    
+    # Aho-Corasick indicator scanning
+    SCANNER_MIN_PATTERN_LENGTH: int = 4
+    SCANNER_MAX_MATCHES_PER_DOCUMENT: int = 100
+    
+    # Single-writer batched write queue (intended for SQLite deployments); carries
+    # indicator creates/updates/upserts, sightings, alerts and CVE writes
+    DB_WRITE_QUEUE_ENABLED: bool = False
+    DB_WRITE_BATCH_SIZE: int = 200
+    DB_WRITE_FLUSH_MS: int = 20
+    DB_WRITE_QUEUE_MAXSIZE: int = 10000
+    
+    # NVD CVE import
+    NVD_API_URL: str = "https://services.nvd.nist.gov/rest/json/cves/2.0"
+    NVD_API_KEY: str = ""
+    NVD_API_PAGE_SIZE: int = 2000
+    NVD_API_TIMEOUT: float = 60.0  # seconds
+    NVD_IMPORT_BATCH_SIZE: int = 1000
+    NVD_IMPORT_ENABLED: bool = False  # scheduled incremental updates
+    NVD_UPDATE_INTERVAL_HOURS: int = 2
+    
+    # System metrics sampler
+    SYSTEM_METRICS_INTERVAL_SECONDS: float = 5.0
+    SYSTEM_METRICS_RING_SIZE: int = 720  # one hour at the default interval
+    
+    # Persisted system metrics: raw samples plus 1m/1h/1d rollups
+    SYSTEM_METRICS_STORE_ENABLED: bool = True
+    SYSTEM_METRICS_FLUSH_SECONDS: int = 60
+    SYSTEM_METRICS_RAW_RETENTION_HOURS: int = 24
+    SYSTEM_METRICS_1M_RETENTION_DAYS: int = 7
+    SYSTEM_METRICS_1H_RETENTION_DAYS: int = 90
+    SYSTEM_METRICS_1D_RETENTION_DAYS: int = 730
+    SYSTEM_METRICS_PURGE_BATCH_SIZE: int = 5000
+    SYSTEM_METRICS_MAX_POINTS: int = 1500  # per series; picks the finest tier that fits
+    
+    # Event loop watchdog
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_MS: int = 50  # heartbeat period
+    LOOP_WATCHDOG_THRESHOLD_MS: int = 100  # stalls longer than this capture a stack
+    LOOP_WATCHDOG_RING_SIZE: int = 200
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,187 @@
+"""
+Prometheus metrics for the platform.
+
+Request, query, inference and feed metrics are prometheus_client metric
+types updated where the work happens. Values owned by other components
+(queue depths, cache counters, system samples) are read from source
+callbacks by a custom collector at scrape time, so they cost nothing
+between scrapes.
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Sequence, Tuple
+import logging
+import time
+
+from prometheus_client import Counter, Histogram, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+LabelValues = Tuple[str, ...]
+Source = Callable[[], Iterable[Tuple[LabelValues, float]]]
+
+class ScrapeTimeCollector:
+    """Collector for one metric whose samples come from source callbacks."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 kind: str = "gauge", registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = list(labelnames)
+        self.kind = kind
+        self._sources = []
+        registry.register(self)
+
+    def add_source(self, source: Source):
+        """Register a callback returning (label values, value) pairs."""
+        self._sources.append(source)
+
+    def describe(self):
+        # Nothing to describe up front; avoids running the sources at registration
+        return []
+
+    def collect(self):
+        family_type = CounterMetricFamily if self.kind == "counter" else GaugeMetricFamily
+        family = family_type(self.name, self.documentation, labels=self.labelnames)
+        samples: Dict[LabelValues, float] = {}
+        for source in self._sources:
+            try:
+                for labels, value in source():
+                    samples[tuple(str(label) for label in labels)] = value
+            except Exception as e:
+                logger.warning(f"⚠️ Metric source for {self.name} failed: {e}")
+        for labels, value in samples.items():
+            family.add_metric(list(labels), value)
+        yield family
+
+# HTTP
+HTTP_REQUEST_DURATION = Histogram(
+    "rtip_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route", "status"), buckets=LATENCY_BUCKETS
+)
+
+# Database
+DB_QUERY_DURATION = Histogram(
+    "rtip_db_query_duration_seconds", "Database statement execution time.", ("operation",),
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_ERRORS = Counter(
+    "rtip_db_query_errors_total", "Database statements that raised an error.", ("operation",)
+)
+
+# AI inference
+INFERENCE_DURATION = Histogram(
+    "rtip_inference_duration_seconds", "Threat model inference latency per call.", ("operation",),
+    buckets=LATENCY_BUCKETS
+)
+INFERENCE_BATCH_SIZE = Histogram(
+    "rtip_inference_batch_size", "Samples per threat model inference call.", ("operation",),
+    buckets=SIZE_BUCKETS
+)
+
+# Feed ingestion
+FEED_RECORDS = Counter(
+    "rtip_feed_records_ingested_total", "Records ingested per feed.", ("feed",)
+)
+FEED_RUNS = Counter(
+    "rtip_feed_runs_total", "Feed ingestion runs by outcome.", ("feed", "status")
+)
+
+# Event loop watchdog
+LOOP_STALLS = Counter(
+    "rtip_event_loop_stalls_total", "Event loop stalls longer than the watchdog threshold."
+)
+LOOP_STALL_DURATION = Histogram(
+    "rtip_event_loop_stall_seconds", "Heartbeat delay caused by each detected event loop stall.",
+    buckets=LATENCY_BUCKETS
+)
+
+# Queues and caches (collected from their owners at scrape time)
+QUEUE_DEPTH = ScrapeTimeCollector(
+    "rtip_queue_depth", "Items waiting in in-process queues and buffers.", ("queue",)
+)
+CACHE_REQUESTS = ScrapeTimeCollector(
+    "rtip_cache_requests", "Cache lookups by cache and result.", ("cache", "result"), kind="counter"
+)
+CACHE_HIT_RATIO = ScrapeTimeCollector(
+    "rtip_cache_hit_ratio", "Fraction of cache lookups served from cache.", ("cache",)
+)
+
+# Platform state
+THREAT_INDICATORS = ScrapeTimeCollector(
+    "rtip_threat_indicators", "Threat indicators in the database.", ("state",)
+)
+SYSTEM_RESOURCE_USAGE = ScrapeTimeCollector(
+    "rtip_system_resource_usage_percent", "Latest sampled host resource usage.", ("resource",)
+)
+EVENT_LOOP_LAG = ScrapeTimeCollector(
+    "rtip_event_loop_lag_seconds", "Latest sampled event loop scheduling delay."
+)
+
+def _statement_operation(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return keyword if keyword in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+def instrument_engine(engine):
+    """Time every statement executed through a (sync or async) SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        DB_QUERY_DURATION.labels(_statement_operation(statement)).observe(time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("query_started") if context.connection else None
+        if stack:
+            stack.pop()
+        DB_QUERY_ERRORS.labels(_statement_operation(context.statement or "")).inc()
+
+class PrometheusMiddleware:
+    """ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+        self._routes: Optional[Dict] = None
+
+    def _route_template(self, scope) -> str:
+        # Starlette 0.27 records the matched endpoint, not the route, in the scope
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        if self._routes is None or endpoint not in self._routes:
+            # Routes are fixed after startup; rebuild the lookup if one is missing
+            self._routes = {}
+            for route in getattr(scope.get("app"), "routes", []):
+                self._routes.setdefault(getattr(route, "endpoint", None), getattr(route, "path", "unmatched"))
+        return self._routes.get(endpoint, "unmatched")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.labels(
+                scope["method"], self._route_template(scope), str(status["code"])
+            ).observe(time.perf_counter() - started)
@@ -64,6 +64,11 @@ def verify_api_key(api_key: str) -> bool:
             return True
     return False
 
+def has_permission(api_key: str, permission: str) -> bool:
+    """Check that an active API key grants a permission."""
+    key_info = API_KEYS.get(api_key)
+    return bool(key_info and key_info.get("is_active", False) and permission in key_info.get("permissions", []))
+
 def generate_api_key() -> str:
     """Generate a new API key."""
     return secrets.token_urlsafe(32)
@@ -1,14 +1,180 @@
 """
-CRUD operations for alert configurations.
+CRUD operations for alerts, alert rollups and alert configurations.
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, func, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from app.db.models import AlertConfiguration
+from app.db.models import (
+    Alert, AlertConfiguration, AlertRollupHourly, AlertRollupDaily,
+    ThreatIndicator, ThreatSeverity, IndicatorType, SEVERITY_RANK
+)
+from app.core.config import settings
 from app.schemas.alert import AlertConfigurationRequest
+from app.services.activity_feed import activity_feed
+from app.db.write_queue import write_queue
+
+# Windows up to this long are served from hourly buckets, longer ones from daily
+HOURLY_ROLLUP_MAX_HOURS = 48
+
+def _rollup_upsert(dialect: str, model, indicator_id: Optional[int], bucket: datetime, rank: int):
+    """INSERT ... ON CONFLICT DO UPDATE incrementing one rollup bucket.
+
+    Alerts without an indicator share one NULL-keyed row per bucket, deduplicated
+    by the partial unique index on ``bucket``.
+    """
+    insert = pg_insert if dialect == "postgresql" else sqlite_insert
+    # SQLite's two-argument max() is the scalar maximum
+    greatest = func.greatest if dialect == "postgresql" else func.max
+    stmt = insert(model).values(
+        indicator_id=indicator_id, bucket=bucket, alert_count=1, max_severity=rank
+    )
+    if indicator_id is None:
+        conflict = {"index_elements": ["bucket"], "index_where": model.indicator_id.is_(None)}
+    else:
+        conflict = {"index_elements": ["indicator_id", "bucket"]}
+    return stmt.on_conflict_do_update(
+        **conflict,
+        set_={
+            "alert_count": model.alert_count + 1,
+            "max_severity": greatest(model.max_severity, stmt.excluded.max_severity)
+        }
+    )
+
+async def create_alert(
+    db: AsyncSession,
+    title: str,
+    message: str,
+    severity: ThreatSeverity,
+    indicator_id: Optional[int] = None,
+    extra_metadata: Optional[Dict[str, Any]] = None
+) -> Alert:
+    """Create an alert and update its hourly/daily rollups in the same transaction."""
+    event = None
+    
+    async def add_alert(session: AsyncSession) -> Alert:
+        nonlocal event
+        now = datetime.utcnow()
+        db_alert = Alert(
+            title=title,
+            message=message,
+            severity=severity,
+            indicator_id=indicator_id,
+            created_at=now,
+            extra_metadata=extra_metadata
+        )
+        session.add(db_alert)
+        
+        dialect = session.get_bind().dialect.name
+        rank = SEVERITY_RANK.get(severity, 0)
+        hour = now.replace(minute=0, second=0, microsecond=0)
+        await session.execute(_rollup_upsert(dialect, AlertRollupHourly, indicator_id, hour, rank))
+        await session.execute(_rollup_upsert(dialect, AlertRollupDaily, indicator_id, hour.replace(hour=0), rank))
+        
+        event = activity_feed.stage(
+            session, "alert", title, severity.value if severity else "info", indicator_id
+        )
+        return db_alert
+    
+    db_alert = await write_queue.write(db, add_alert)
+    activity_feed.publish(event)
+    return db_alert
+
+async def count_alerts_since(db: AsyncSession, hours: int = 24) -> int:
+    """Number of alerts in the last ``hours`` hours, from hourly rollups."""
+    cutoff = (datetime.utcnow() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+    result = await db.execute(
+        select(func.coalesce(func.sum(AlertRollupHourly.alert_count), 0)).where(
+            AlertRollupHourly.bucket >= cutoff
+        )
+    )
+    return int(result.scalar())
+
+async def get_top_indicators(
+    db: AsyncSession,
+    hours: int = 24,
+    limit: int = 10,
+    indicator_type: Optional[IndicatorType] = None
+) -> List[Dict[str, Any]]:
+    """Top indicators by alert count over a recent window, from rollup buckets."""
+    if hours <= HOURLY_ROLLUP_MAX_HOURS:
+        rollup = AlertRollupHourly
+        cutoff = (datetime.utcnow() - timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+    else:
+        rollup = AlertRollupDaily
+        cutoff = (datetime.utcnow() - timedelta(hours=hours)).replace(hour=0, minute=0, second=0, microsecond=0)
+    
+    alert_count = func.sum(rollup.alert_count).label("alert_count")
+    query = select(
+        rollup.indicator_id,
+        alert_count,
+        func.max(rollup.max_severity).label("max_severity")
+    ).where(rollup.bucket >= cutoff, rollup.indicator_id.is_not(None))
+    if indicator_type:
+        query = query.join(ThreatIndicator, ThreatIndicator.id == rollup.indicator_id).where(
+            ThreatIndicator.type == indicator_type
+        )
+    query = query.group_by(rollup.indicator_id).order_by(desc(alert_count)).limit(limit)
+    
+    ranked = (await db.execute(query)).all()
+    if not ranked:
+        return []
+    
+    indicators = await db.execute(
+        select(ThreatIndicator).where(ThreatIndicator.id.in_([row.indicator_id for row in ranked]))
+    )
+    by_id = {indicator.id: indicator for indicator in indicators.scalars().all()}
+    severity_by_rank = {rank: severity for severity, rank in SEVERITY_RANK.items()}
+    
+    top = []
+    for row in ranked:
+        indicator = by_id.get(row.indicator_id)
+        if indicator is None:
+            continue
+        worst = severity_by_rank.get(row.max_severity)
+        top.append({
+            "id": indicator.id,
+            "value": indicator.value,
+            "type": indicator.type.value if indicator.type else None,
+            "threat_count": int(row.alert_count),
+            "severity": worst.value if worst else None,
+            "last_seen": indicator.last_seen.isoformat() if indicator.last_seen else None
+        })
+    return top
+
+async def purge_rollups_before(db: AsyncSession, model, cutoff: datetime, batch_size: int) -> int:
+    """Delete rollup buckets of ``model`` older than ``cutoff`` in committed batches."""
+    removed = 0
+    while True:
+        # Short transactions keep the SQLite write lock free for alert writers
+        expired = select(model.id).where(model.bucket < cutoff).limit(batch_size).scalar_subquery()
+        result = await db.execute(delete(model).where(model.id.in_(expired)))
+        await db.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
+
+async def purge_expired_rollups(db: AsyncSession, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Apply the hourly and daily rollup retention settings.
+
+    Hourly buckets are kept for at least HOURLY_ROLLUP_MAX_HOURS so the windows
+    served from them stay complete.
+    """
+    now = now or datetime.utcnow()
+    hourly_retention = max(
+        timedelta(days=settings.ALERT_ROLLUP_HOURLY_RETENTION_DAYS), timedelta(hours=HOURLY_ROLLUP_MAX_HOURS)
+    )
+    batch_size = settings.ALERT_ROLLUP_PURGE_BATCH_SIZE
+    return {
+        "hourly": await purge_rollups_before(db, AlertRollupHourly, now - hourly_retention, batch_size),
+        "daily": await purge_rollups_before(
+            db, AlertRollupDaily, now - timedelta(days=settings.ALERT_ROLLUP_DAILY_RETENTION_DAYS), batch_size
+        )
+    }
 
 async def create_alert_configuration(
     db: AsyncSession,
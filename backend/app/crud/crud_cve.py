@@ -3,12 +3,19 @@ CRUD operations for CVE (Common Vulnerabilities and Exposures) data.
 """
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_, desc
-from typing import List, Optional, Dict, Any
+from sqlalchemy import select, delete, insert, func, and_, or_, desc
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import List, Optional, Dict, Any, Tuple, Sequence
 from datetime import datetime, timedelta
+import numpy as np
 
-from app.db.models import CVEData
+from app.db.models import CVEData, CPEMatch
 from app.schemas.threat import SeverityLevel
+from app.crud.pagination import keyset_page
+from app.db.search_index import search_condition
+from app.db.write_queue import write_queue
+from app.crud.crud_threat import IN_CLAUSE_CHUNK_SIZE
 
 async def create_cve(
     db: AsyncSession,
@@ -22,21 +29,21 @@ async def create_cve(
     tags: Optional[List[str]] = None
 ) -> CVEData:
     """Create a new CVE record."""
-    db_cve = CVEData(
-        id=cve_id,
-        description=description,
-        cvss_score=cvss_score,
-        severity=severity or _calculate_severity_from_cvss(cvss_score),
-        published_date=published_date,
-        references=references or [],
-        affected_products=affected_products or [],
-        tags=tags or []
-    )
-    
-    db.add(db_cve)
-    await db.commit()
-    await db.refresh(db_cve)
-    return db_cve
+    async def add_cve(session: AsyncSession) -> CVEData:
+        db_cve = CVEData(
+            id=cve_id,
+            description=description,
+            cvss_score=cvss_score,
+            severity=severity or _calculate_severity_from_cvss(cvss_score),
+            published_date=published_date,
+            references=references or [],
+            affected_products=affected_products or [],
+            tags=tags or []
+        )
+        session.add(db_cve)
+        return db_cve
+
+    return await write_queue.write(db, add_cve)
 
 async def get_cve(db: AsyncSession, cve_id: str) -> Optional[CVEData]:
     """Get a CVE by its ID."""
@@ -70,18 +77,48 @@ async def get_cves(
     result = await db.execute(query)
     return result.scalars().all()
 
+async def get_cves_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    severity: Optional[str] = None,
+    min_cvss_score: Optional[float] = None,
+    active_only: bool = True
+) -> Tuple[List[CVEData], Optional[str]]:
+    """Get a page of CVEs ordered by (published_date, id) descending (undated last), plus the next cursor."""
+    query = select(CVEData)
+    
+    conditions = []
+    if active_only:
+        conditions.append(CVEData.is_active == True)
+    if severity:
+        conditions.append(CVEData.severity == severity)
+    if min_cvss_score is not None:
+        conditions.append(CVEData.cvss_score >= min_cvss_score)
+    
+    if conditions:
+        query = query.where(and_(*conditions))
+    
+    # Seek past the previous page instead of scanning and discarding it
+    return await keyset_page(db, query, CVEData.published_date, CVEData.id, cursor, limit)
+
 async def search_cves(
     db: AsyncSession,
     search_query: str,
     limit: int = 50
 ) -> List[CVEData]:
     """Search CVEs by ID or description."""
-    query = select(CVEData).where(
-        or_(
-            CVEData.id.ilike(f"%{search_query}%"),
-            CVEData.description.ilike(f"%{search_query}%")
-        )
-    ).order_by(desc(CVEData.published_date)).limit(limit)
+    condition = search_condition(
+        db.get_bind().dialect.name,
+        "cve_data_fts",
+        CVEData.id,
+        CVEData.id,
+        CVEData.description,
+        search_query
+    )
+    query = select(CVEData).where(condition).order_by(
+        desc(CVEData.published_date)
+    ).limit(limit)
     
     result = await db.execute(query)
     return result.scalars().all()
@@ -99,14 +136,25 @@ async def upsert_cve(
     tags: Optional[List[str]] = None
 ) -> CVEData:
     """Create or update a CVE record."""
-    existing = await get_cve(db, cve_id)
-    
-    if existing:
-        # Update existing record
+    async def apply_upsert(session: AsyncSession) -> CVEData:
+        existing = await get_cve(session, cve_id)
+        
+        if not existing:
+            existing = CVEData(
+                id=cve_id,
+                published_date=published_date,
+                references=[],
+                affected_products=[],
+                tags=[]
+            )
+            session.add(existing)
+        else:
+            existing.modified_date = modified_date or datetime.utcnow()
+            existing.updated_at = datetime.utcnow()
+        
         existing.description = description
         existing.cvss_score = cvss_score
         existing.severity = severity or _calculate_severity_from_cvss(cvss_score)
-        existing.modified_date = modified_date or datetime.utcnow()
         
         if references:
             existing_refs = set(existing.references or [])
@@ -123,23 +171,120 @@ async def upsert_cve(
             new_tags = set(tags)
             existing.tags = list(existing_tags.union(new_tags))
         
-        existing.updated_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(existing)
         return existing
-    else:
-        # Create new record
-        return await create_cve(
-            db=db,
-            cve_id=cve_id,
-            description=description,
-            cvss_score=cvss_score,
-            severity=severity,
-            published_date=published_date,
-            references=references,
-            affected_products=affected_products,
-            tags=tags
+
+    return await write_queue.write(db, apply_upsert)
+
+async def bulk_upsert_cves(
+    db: AsyncSession,
+    records: List[Dict[str, Any]]
+) -> int:
+    """
+    Insert or update many CVE records with one ``INSERT ... ON CONFLICT``.
+    
+    Records carry the CVEData columns (id, description, cvss_score, severity,
+    published_date, modified_date, references, affected_products, tags).
+    Source records are complete, so references and affected products are
+    replaced rather than merged; locally added tags are kept. Rows whose
+    modified_date is not newer than the stored one are left untouched.
+    The caller commits.
+    """
+    if not records:
+        return 0
+    
+    dialect_insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": record["id"],
+            "description": record.get("description"),
+            "cvss_score": record.get("cvss_score"),
+            "severity": record.get("severity"),
+            "published_date": record.get("published_date"),
+            "modified_date": record.get("modified_date"),
+            "references": record.get("references") or [],
+            "affected_products": record.get("affected_products") or [],
+            "tags": record.get("tags") or [],
+            "is_active": record.get("is_active", True),
+            "created_at": now,
+            "updated_at": now
+        }
+        for record in records
+    ]
+    
+    stmt = dialect_insert(CVEData)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "description": stmt.excluded.description,
+            "cvss_score": stmt.excluded.cvss_score,
+            "severity": stmt.excluded.severity,
+            "published_date": stmt.excluded.published_date,
+            "modified_date": stmt.excluded.modified_date,
+            "references": stmt.excluded.references,
+            "affected_products": stmt.excluded.affected_products,
+            "is_active": stmt.excluded.is_active,
+            "updated_at": stmt.excluded.updated_at
+        },
+        where=or_(
+            CVEData.modified_date.is_(None),
+            stmt.excluded.modified_date.is_(None),
+            CVEData.modified_date < stmt.excluded.modified_date
+        )
+    )
+    await db.execute(stmt, rows)
+    return len(rows)
+
+async def get_cve_modified_dates(
+    db: AsyncSession,
+    cve_ids: List[str]
+) -> Dict[str, Optional[datetime]]:
+    """Stored modified_date of the given CVEs that exist, chunked to the bind parameter limit."""
+    dates = {}
+    for start in range(0, len(cve_ids), IN_CLAUSE_CHUNK_SIZE):
+        result = await db.execute(
+            select(CVEData.id, CVEData.modified_date).where(
+                CVEData.id.in_(cve_ids[start:start + IN_CLAUSE_CHUNK_SIZE])
+            )
+        )
+        dates.update(result.all())
+    return dates
+
+async def replace_cpe_matches(
+    db: AsyncSession,
+    rows_by_cve: Dict[str, List[Dict[str, Any]]]
+) -> int:
+    """Replace the CPE match criteria of the given CVEs. The caller commits."""
+    cve_ids = list(rows_by_cve)
+    for start in range(0, len(cve_ids), IN_CLAUSE_CHUNK_SIZE):
+        await db.execute(
+            delete(CPEMatch).where(CPEMatch.cve_id.in_(cve_ids[start:start + IN_CLAUSE_CHUNK_SIZE]))
         )
+    
+    rows = [row for rows in rows_by_cve.values() for row in rows]
+    if rows:
+        await db.execute(insert(CPEMatch), rows)
+    return len(rows)
+
+async def get_cve_summaries(
+    db: AsyncSession,
+    cve_ids: List[str]
+) -> Dict[str, CVEData]:
+    """Active CVEs by id, chunked to the bind parameter limit."""
+    cves = {}
+    unique_ids = list(dict.fromkeys(cve_ids))
+    for start in range(0, len(unique_ids), IN_CLAUSE_CHUNK_SIZE):
+        result = await db.execute(
+            select(CVEData).where(
+                and_(
+                    CVEData.id.in_(unique_ids[start:start + IN_CLAUSE_CHUNK_SIZE]),
+                    CVEData.is_active == True
+                )
+            )
+        )
+        for cve in result.scalars().all():
+            cves[cve.id] = cve
+    return cves
 
 async def get_critical_cves(
     db: AsyncSession,
@@ -200,6 +345,16 @@ async def get_cve_stats(db: AsyncSession) -> Dict[str, Any]:
         "last_updated": datetime.utcnow()
     }
 
+_SEVERITY_THRESHOLDS = np.array([4.0, 7.0, 9.0])
+_SEVERITY_LABELS = np.array(["Low", "Medium", "High", "Critical"], dtype=object)
+
+def _calculate_severities_from_cvss(cvss_scores: Sequence[Optional[float]]) -> List[str]:
+    """Vectorized _calculate_severity_from_cvss for a batch of scores."""
+    scores = np.array([np.nan if score is None else score for score in cvss_scores], dtype=float)
+    severities = _SEVERITY_LABELS[np.digitize(np.nan_to_num(scores, nan=0.0), _SEVERITY_THRESHOLDS)]
+    severities[np.isnan(scores)] = "Medium"
+    return severities.tolist()
+
 def _calculate_severity_from_cvss(cvss_score: Optional[float]) -> str:
     """Calculate severity level from CVSS score."""
     if cvss_score is None:
@@ -0,0 +1,45 @@
+"""
+CRUD operations for feed ingestion checkpoints.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+
+from app.db.models import FeedCheckpoint
+
+async def get_feed_checkpoint(
+    db: AsyncSession,
+    feed_name: str
+) -> Optional[FeedCheckpoint]:
+    """Get the checkpoint for a feed."""
+    result = await db.execute(
+        select(FeedCheckpoint).where(FeedCheckpoint.feed_name == feed_name)
+    )
+    return result.scalar_one_or_none()
+
+async def get_feed_checkpoints(db: AsyncSession) -> List[FeedCheckpoint]:
+    """Get checkpoints for all feeds."""
+    result = await db.execute(select(FeedCheckpoint))
+    return result.scalars().all()
+
+async def save_feed_checkpoint(
+    db: AsyncSession,
+    feed_name: str,
+    checkpoint_data: Dict[str, Any]
+) -> FeedCheckpoint:
+    """Create or update a feed checkpoint and commit it."""
+    checkpoint = await get_feed_checkpoint(db, feed_name)
+    if not checkpoint:
+        checkpoint = FeedCheckpoint(feed_name=feed_name)
+        db.add(checkpoint)
+    
+    for field, value in checkpoint_data.items():
+        if hasattr(checkpoint, field):
+            setattr(checkpoint, field, value)
+    
+    checkpoint.updated_at = datetime.utcnow()
+    await db.commit()
+    await db.refresh(checkpoint)
+    return checkpoint
@@ -0,0 +1,106 @@
+"""
+CRUD operations for persisted system metrics and their rollup tiers.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, func, literal
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from typing import List, Dict, Any
+from datetime import datetime
+
+from app.db.models import (
+    SystemMetric, SystemMetricRollupMinute, SystemMetricRollupHourly, SystemMetricRollupDaily
+)
+
+ROLLUP_MODELS = {
+    "1m": SystemMetricRollupMinute,
+    "1h": SystemMetricRollupHourly,
+    "1d": SystemMetricRollupDaily,
+}
+
+# Rows per multi-row upsert; keeps bound parameters under SQLite's limit
+ROLLUP_UPSERT_CHUNK_SIZE = 500
+
+def _rollup_merge(dialect: str, model, rows: List[Dict[str, Any]]):
+    """INSERT ... ON CONFLICT DO UPDATE merging partial buckets into stored ones."""
+    insert_ = pg_insert if dialect == "postgresql" else sqlite_insert
+    # SQLite's two-argument min()/max() are the scalar functions
+    least = func.least if dialect == "postgresql" else func.min
+    greatest = func.greatest if dialect == "postgresql" else func.max
+    stmt = insert_(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=["metric_name", "bucket"],
+        set_={
+            "sample_count": model.sample_count + stmt.excluded.sample_count,
+            "value_sum": model.value_sum + stmt.excluded.value_sum,
+            "value_min": least(model.value_min, stmt.excluded.value_min),
+            "value_max": greatest(model.value_max, stmt.excluded.value_max)
+        }
+    )
+
+async def insert_metric_samples(db: AsyncSession, rows: List[Dict[str, Any]]):
+    """Insert raw samples in one executemany; the caller commits."""
+    if rows:
+        await db.execute(insert(SystemMetric), rows)
+
+async def merge_metric_rollups(db: AsyncSession, tier: str, rows: List[Dict[str, Any]]):
+    """Merge aggregated buckets into a rollup tier; the caller commits."""
+    model = ROLLUP_MODELS[tier]
+    dialect = db.get_bind().dialect.name
+    for start in range(0, len(rows), ROLLUP_UPSERT_CHUNK_SIZE):
+        await db.execute(_rollup_merge(dialect, model, rows[start:start + ROLLUP_UPSERT_CHUNK_SIZE]))
+
+async def purge_metrics_before(db: AsyncSession, tier: str, cutoff: datetime, batch_size: int) -> int:
+    """Delete raw samples or rollup buckets older than ``cutoff`` in committed batches."""
+    model = SystemMetric if tier == "raw" else ROLLUP_MODELS[tier]
+    column = SystemMetric.timestamp if tier == "raw" else model.bucket
+    removed = 0
+    while True:
+        # Short transactions keep the SQLite write lock free for ingestion
+        expired = select(model.id).where(column < cutoff).limit(batch_size).scalar_subquery()
+        result = await db.execute(delete(model).where(model.id.in_(expired)))
+        await db.commit()
+        removed += result.rowcount
+        if result.rowcount < batch_size:
+            return removed
+
+async def get_metric_series(
+    db: AsyncSession,
+    tier: str,
+    metric_names: List[str],
+    start: datetime,
+    end: datetime
+) -> List[Any]:
+    """(metric_name, timestamp, min, avg, max, samples) rows of one tier, oldest first."""
+    if tier == "raw":
+        query = select(
+            SystemMetric.metric_name,
+            SystemMetric.timestamp,
+            SystemMetric.metric_value,
+            SystemMetric.metric_value,
+            SystemMetric.metric_value,
+            literal(1)
+        ).where(
+            SystemMetric.metric_name.in_(metric_names),
+            SystemMetric.timestamp >= start,
+            SystemMetric.timestamp < end
+        ).order_by(SystemMetric.metric_name, SystemMetric.timestamp)
+    else:
+        model = ROLLUP_MODELS[tier]
+        query = select(
+            model.metric_name,
+            model.bucket,
+            model.value_min,
+            model.value_sum / model.sample_count,
+            model.value_max,
+            model.sample_count
+        ).where(
+            model.metric_name.in_(metric_names),
+            model.bucket >= start,
+            model.bucket < end,
+            model.sample_count > 0
+        ).order_by(model.metric_name, model.bucket)
+
+    result = await db.execute(query)
+    return result.all()
@@ -5,21 +5,41 @@ CRUD operations for threat indicators.
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_, or_, desc
 from sqlalchemy.orm import selectinload
-from typing import List, Optional, Dict, Any
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit
+import ipaddress
 
-from app.db.models import ThreatIndicator, FeedStatus
+from app.db.models import ThreatIndicator, IndicatorType, ThreatSeverity, SEVERITY_RANK
 from app.schemas.threat import ThreatIndicatorCreate, ThreatIndicatorUpdate, ThreatType, SeverityLevel
+from app.crud.pagination import keyset_page
+from app.db.search_index import search_condition
+from app.services.threat_stats import threat_stats, recent_window_start
+from app.db.write_queue import write_queue
+
+# Stay under SQLite's default bind parameter limit (999)
+IN_CLAUSE_CHUNK_SIZE = 900
+# Misses that may fall through to a substring search in one bulk check
+SUBSTRING_FANOUT_LIMIT = 100
 
 async def create_threat_indicator(
     db: AsyncSession,
     threat_data: ThreatIndicatorCreate
 ) -> ThreatIndicator:
-    """Create a new threat indicator."""
-    db_threat = ThreatIndicator(**threat_data.model_dump())
-    db.add(db_threat)
-    await db.commit()
-    await db.refresh(db_threat)
+    """Create a new threat indicator; raises IntegrityError if (type, value) exists.
+    
+    The value is stored in normalized form so exact matches are plain equality.
+    """
+    async def add_threat(session: AsyncSession) -> ThreatIndicator:
+        db_threat = ThreatIndicator(**{
+            **threat_data.model_dump(), "value": normalize_indicator(threat_data.value)
+        })
+        session.add(db_threat)
+        return db_threat
+
+    db_threat = await write_queue.write(db, add_threat)
+    threat_stats.record_insert(db_threat)
     return db_threat
 
 async def get_threat_indicator(
@@ -37,8 +57,8 @@ async def get_threat_by_value(
     value: str,
     type: Optional[str] = None
 ) -> Optional[ThreatIndicator]:
-    """Get a threat indicator by its value and optionally type."""
-    query = select(ThreatIndicator).where(ThreatIndicator.value == value)
+    """Get a threat indicator by its (normalized) value and optionally type."""
+    query = select(ThreatIndicator).where(ThreatIndicator.value == normalize_indicator(value))
     if type:
         query = query.where(ThreatIndicator.type == type)
     
@@ -78,19 +98,54 @@ async def get_threats(
     result = await db.execute(query)
     return result.scalars().all()
 
+async def get_threats_page(
+    db: AsyncSession,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    severity: Optional[str] = None,
+    type: Optional[str] = None,
+    source: Optional[str] = None,
+    active_only: bool = True
+) -> Tuple[List[ThreatIndicator], Optional[str]]:
+    """Get a page of threat indicators ordered by (last_seen, id) descending, undated last.
+    
+    Returns the page and the cursor for the next one, or None on the last page.
+    """
+    query = select(ThreatIndicator)
+    
+    conditions = []
+    if active_only:
+        conditions.append(ThreatIndicator.is_active == True)
+    if severity:
+        conditions.append(ThreatIndicator.severity == severity)
+    if type:
+        conditions.append(ThreatIndicator.type == type)
+    if source:
+        conditions.append(ThreatIndicator.source == source)
+    
+    if conditions:
+        query = query.where(and_(*conditions))
+    
+    # Seek past the previous page instead of scanning and discarding it
+    return await keyset_page(db, query, ThreatIndicator.last_seen, ThreatIndicator.id, cursor, limit)
+
 async def search_threats(
     db: AsyncSession,
     search_query: str,
     limit: int = 50
 ) -> List[ThreatIndicator]:
-    """Search threat indicators by value."""
-    # Simple search - in production, consider full-text search
-    query = select(ThreatIndicator).where(
-        or_(
-            ThreatIndicator.value.ilike(f"%{search_query}%"),
-            ThreatIndicator.description.ilike(f"%{search_query}%")
-        )
-    ).order_by(desc(ThreatIndicator.last_seen)).limit(limit)
+    """Search threat indicators by value or description."""
+    condition = search_condition(
+        db.get_bind().dialect.name,
+        "threat_indicators_fts",
+        ThreatIndicator.id,
+        ThreatIndicator.value,
+        ThreatIndicator.description,
+        search_query
+    )
+    query = select(ThreatIndicator).where(condition).order_by(
+        desc(ThreatIndicator.last_seen)
+    ).limit(limit)
     
     result = await db.execute(query)
     return result.scalars().all()
@@ -101,27 +156,58 @@ async def update_threat_indicator(
     threat_update: ThreatIndicatorUpdate
 ) -> Optional[ThreatIndicator]:
     """Update a threat indicator."""
+    before = None
+    
+    async def apply_update(session: AsyncSession) -> Optional[ThreatIndicator]:
+        nonlocal before
+        db_threat = await get_threat_indicator(session, threat_id)
+        if not db_threat:
+            return None
+        
+        before = threat_stats.key_of(db_threat)
+        update_data = threat_update.model_dump(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_threat, field, value)
+        
+        db_threat.updated_at = datetime.utcnow()
+        return db_threat
+    
+    db_threat = await write_queue.write(db, apply_update)
+    if db_threat is not None:
+        threat_stats.record_update(before, db_threat)
+    return db_threat
+
+async def delete_threat_indicator(
+    db: AsyncSession,
+    threat_id: int
+) -> bool:
+    """Delete a threat indicator."""
     db_threat = await get_threat_indicator(db, threat_id)
     if not db_threat:
-        return None
-    
-    update_data = threat_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_threat, field, value)
+        return False
     
-    db_threat.updated_at = datetime.utcnow()
+    before = threat_stats.key_of(db_threat)
+    created_at = db_threat.created_at
+    await db.delete(db_threat)
     await db.commit()
-    await db.refresh(db_threat)
-    return db_threat
+    threat_stats.record_delete(before, created_at)
+    return True
 
 async def upsert_threat_indicator(
     db: AsyncSession,
     threat_data: ThreatIndicatorCreate
 ) -> ThreatIndicator:
     """Create or update a threat indicator (upsert operation)."""
-    existing = await get_threat_by_value(db, threat_data.value, threat_data.type)
+    before = None
     
-    if existing:
+    async def apply_update(session: AsyncSession) -> Optional[ThreatIndicator]:
+        nonlocal before
+        existing = await get_threat_by_value(session, threat_data.value, threat_data.type)
+        if not existing:
+            return None
+        
+        before = threat_stats.key_of(existing)
+        
         # Update existing record
         existing.last_seen = datetime.utcnow()
         existing.confidence = max(existing.confidence, threat_data.confidence)
@@ -142,15 +228,80 @@ async def upsert_threat_indicator(
         existing.references = list(existing_refs.union(new_refs))
         
         existing.updated_at = datetime.utcnow()
-        await db.commit()
-        await db.refresh(existing)
         return existing
-    else:
-        # Create new record
-        return await create_threat_indicator(db, threat_data)
+    
+    existing = await write_queue.write(db, apply_update)
+    if existing:
+        threat_stats.record_update(before, existing)
+        return existing
+    
+    # Create new record
+    return await create_threat_indicator(db, threat_data)
+
+async def record_sighting(
+    db: AsyncSession,
+    indicator_type: IndicatorType,
+    value: str,
+    severity: ThreatSeverity,
+    confidence: float,
+    source: str,
+    description: Optional[str] = None
+) -> ThreatIndicator:
+    """Create the (type, value) indicator or refresh it with a new sighting."""
+    value = normalize_indicator(value)
+    before = None
+    
+    async def apply_sighting(session: AsyncSession) -> ThreatIndicator:
+        nonlocal before
+        result = await session.execute(
+            select(ThreatIndicator).where(
+                ThreatIndicator.type == indicator_type, ThreatIndicator.value == value
+            )
+        )
+        existing = result.scalar_one_or_none()
+        if existing:
+            before = threat_stats.key_of(existing)
+            existing.last_seen = datetime.utcnow()
+            existing.is_active = True
+            existing.confidence = max(existing.confidence or 0.0, confidence)
+            if SEVERITY_RANK.get(severity, 0) > SEVERITY_RANK.get(existing.severity, 0):
+                existing.severity = severity
+            return existing
+        
+        before = None
+        indicator = ThreatIndicator(
+            type=indicator_type,
+            value=value,
+            severity=severity,
+            confidence=confidence,
+            source=source,
+            description=description,
+            last_seen=datetime.utcnow()
+        )
+        session.add(indicator)
+        return indicator
+    
+    for attempt in range(2):
+        try:
+            indicator = await write_queue.write(db, apply_sighting)
+        except IntegrityError:
+            # A concurrent sighting created it first; update that row instead
+            continue
+        if before is None:
+            threat_stats.record_insert(indicator)
+        else:
+            threat_stats.record_update(before, indicator)
+        return indicator
+    raise RuntimeError(f"Could not record sighting of {value}")
 
 async def get_threat_stats(db: AsyncSession) -> Dict[str, Any]:
     """Get threat statistics for dashboard."""
+    if threat_stats.ready:
+        return threat_stats.get_stats()
+    return await compute_threat_stats(db)
+
+async def compute_threat_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Compute threat statistics directly from the database."""
     # Total threats
     total_result = await db.execute(select(func.count(ThreatIndicator.id)))
     total_threats = total_result.scalar()
@@ -161,8 +312,8 @@ async def get_threat_stats(db: AsyncSession) -> Dict[str, Any]:
     )
     active_threats = active_result.scalar()
     
-    # Recent threats (last 24 hours)
-    recent_cutoff = datetime.utcnow() - timedelta(hours=24)
+    # Recent threats (same hourly window as the in-memory aggregate)
+    recent_cutoff = recent_window_start()
     recent_result = await db.execute(
         select(func.count(ThreatIndicator.id)).where(
             ThreatIndicator.created_at >= recent_cutoff
@@ -223,23 +374,193 @@ async def get_critical_threats(
     result = await db.execute(query)
     return result.scalars().all()
 
-async def check_indicators_bulk(
+def normalize_indicator(indicator: str) -> str:
+    """Canonical form of a submitted indicator (refanged, trimmed, lowercased host)."""
+    value = indicator.strip().strip("\"'<>")
+    value = value.replace("[.]", ".").replace("(.)", ".").replace("[:]", ":")
+    if value.lower().startswith(("hxxp://", "hxxps://")):
+        value = "http" + value[4:]
+    
+    try:
+        return str(ipaddress.ip_address(value))
+    except ValueError:
+        pass
+    
+    if "://" in value:
+        parts = urlsplit(value)
+        return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, parts.fragment))
+    
+    # Domains, emails and hashes are case-insensitive
+    return value.lower().rstrip(".")
+
+def _indicator_host(value: str) -> Optional[str]:
+    """Host part of a URL or domain indicator."""
+    if "://" in value:
+        return urlsplit(value).hostname
+    if "/" in value or "@" in value:
+        return None
+    return value
+
+def _parent_domains(host: str) -> List[str]:
+    """a.b.evil.com -> [b.evil.com, evil.com] (never the bare TLD)."""
+    labels = host.split(".")
+    return [".".join(labels[i:]) for i in range(1, len(labels) - 1)]
+
+async def _fetch_by_values(
     db: AsyncSession,
-    indicators: List[str]
-) -> Dict[str, Optional[ThreatIndicator]]:
-    """Check multiple indicators for threats in bulk."""
-    query = select(ThreatIndicator).where(
-        and_(
-            ThreatIndicator.value.in_(indicators),
-            ThreatIndicator.is_active == True
+    values: List[str]
+) -> Dict[str, ThreatIndicator]:
+    """Exact-match active indicators by value, chunked to the bind parameter limit."""
+    matches = {}
+    unique_values = list(dict.fromkeys(values))
+    for start in range(0, len(unique_values), IN_CLAUSE_CHUNK_SIZE):
+        chunk = unique_values[start:start + IN_CLAUSE_CHUNK_SIZE]
+        query = select(ThreatIndicator).where(
+            and_(
+                ThreatIndicator.value.in_(chunk),
+                ThreatIndicator.is_active == True
+            )
+        )
+        result = await db.execute(query)
+        for threat in result.scalars().all():
+            # Same value under several types: keep the most confident record
+            current = matches.get(threat.value)
+            if current is None or (threat.confidence or 0) > (current.confidence or 0):
+                matches[threat.value] = threat
+    return matches
+
+async def _match_cidrs(
+    db: AsyncSession,
+    addresses: Dict[str, Any]
+) -> Dict[str, ThreatIndicator]:
+    """Match IP addresses against active network (CIDR) indicators, most specific first.
+    
+    Uses the radix tree of the in-memory indicator index when it is loaded;
+    otherwise builds one from the CIDR rows of the address families involved.
+    """
+    # Imported here: the index module imports normalize_indicator from this one
+    from app.services.indicator_index import IPRadixTree, indicator_index
+    
+    if indicator_index.ready:
+        networks = indicator_index.network_tree
+    else:
+        families = []
+        if any(address.version == 4 for address in addresses.values()):
+            families.append(~ThreatIndicator.value.like("%:%"))
+        if any(address.version == 6 for address in addresses.values()):
+            families.append(ThreatIndicator.value.like("%:%"))
+        result = await db.execute(
+            select(ThreatIndicator.id, ThreatIndicator.value).where(
+                and_(
+                    ThreatIndicator.is_active == True,
+                    ThreatIndicator.type == IndicatorType.IP,
+                    ThreatIndicator.value.like("%/%"),
+                    or_(*families)
+                )
+            )
+        )
+        networks = IPRadixTree()
+        for threat_id, value in result.all():
+            try:
+                networks.insert(ipaddress.ip_network(value, strict=False), {"id": threat_id})
+            except ValueError:
+                continue
+    
+    matched_ids = {}
+    for indicator, address in addresses.items():
+        entry = networks.longest_match(address)
+        if entry is not None:
+            matched_ids[indicator] = entry["id"]
+    if not matched_ids:
+        return {}
+    
+    result = await db.execute(
+        select(ThreatIndicator).where(
+            and_(ThreatIndicator.id.in_(set(matched_ids.values())), ThreatIndicator.is_active == True)
         )
     )
+    threats = {threat.id: threat for threat in result.scalars().all()}
+    return {
+        indicator: threats[threat_id]
+        for indicator, threat_id in matched_ids.items() if threat_id in threats
+    }
+
+async def match_indicators(
+    db: AsyncSession,
+    indicators: List[str],
+    fuzzy: bool = False
+) -> Dict[str, Tuple[Optional[ThreatIndicator], Optional[str]]]:
+    """
+    Match indicators against active threat intelligence.
     
-    result = await db.execute(query)
-    threats = result.scalars().all()
+    Returns indicator -> (threat, match_type). All indicators are resolved with
+    exact lookups first; with fuzzy=True the misses fall through to CIDR,
+    parent-domain and substring matching. Stored values are normalized on
+    write, so only the normalized form of each indicator is looked up.
+    """
+    normalized = {indicator: normalize_indicator(indicator) for indicator in indicators}
+    exact = await _fetch_by_values(db, list(normalized.values()))
+    
+    results = {}
+    misses = []
+    for indicator, value in normalized.items():
+        threat = exact.get(value)
+        if threat:
+            results[indicator] = (threat, "exact")
+        else:
+            misses.append(indicator)
+    
+    if not fuzzy or not misses:
+        for indicator in misses:
+            results[indicator] = (None, None)
+        return results
+    
+    # CIDR containment for IP misses
+    addresses = {}
+    for indicator in misses:
+        try:
+            addresses[indicator] = ipaddress.ip_address(normalized[indicator])
+        except ValueError:
+            continue
+    if addresses:
+        for indicator, threat in (await _match_cidrs(db, addresses)).items():
+            results[indicator] = (threat, "cidr")
+    
+    # Parent domains for domain and URL misses
+    parents = {}
+    for indicator in misses:
+        if indicator in results or indicator in addresses:
+            continue
+        host = _indicator_host(normalized[indicator])
+        if host and "." in host:
+            candidates = ([host] if host != normalized[indicator] else []) + _parent_domains(host)
+            if candidates:
+                parents[indicator] = candidates
+    if parents:
+        domain_matches = await _fetch_by_values(
+            db, [candidate for candidates in parents.values() for candidate in candidates]
+        )
+        for indicator, candidates in parents.items():
+            for candidate in candidates:
+                if candidate in domain_matches:
+                    results[indicator] = (domain_matches[candidate], "domain_suffix")
+                    break
     
-    # Create a mapping of indicator -> threat
-    threat_map = {threat.value: threat for threat in threats}
+    # Substring search for whatever is left, bounded per request
+    remaining = [indicator for indicator in misses if indicator not in results]
+    for indicator in remaining[:SUBSTRING_FANOUT_LIMIT]:
+        threats = await search_threats(db, normalized[indicator], limit=1)
+        if threats:
+            results[indicator] = (threats[0], "substring")
     
-    # Return results for all requested indicators
-    return {indicator: threat_map.get(indicator) for indicator in indicators}
+    for indicator in misses:
+        results.setdefault(indicator, (None, None))
+    return results
+
+async def check_indicators_bulk(
+    db: AsyncSession,
+    indicators: List[str]
+) -> Dict[str, Optional[ThreatIndicator]]:
+    """Check multiple indicators for threats in bulk (exact matches only)."""
+    matches = await match_indicators(db, indicators)
+    return {indicator: threat for indicator, (threat, _) in matches.items()}
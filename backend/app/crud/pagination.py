@@ -0,0 +1,68 @@
+"""
+Opaque cursors for keyset pagination.
+"""
+
+from typing import Any, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+
+from sqlalchemy import and_, desc, tuple_
+
+def encode_cursor(sort_value: Optional[datetime], row_id: Any) -> str:
+    """Encode the sort key of the last row on a page."""
+    payload = json.dumps([sort_value.isoformat() if sort_value else None, row_id])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], Any]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(sort_value) if sort_value else None), row_id
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+async def keyset_page(
+    db,
+    query,
+    sort_column,
+    id_column,
+    cursor: Optional[str],
+    limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Run one page of ``query`` ordered by (sort, id) descending, NULL sort keys last.
+    
+    Rows with a sort key and the NULL tail are read as two phases so each one
+    is a plain index seek; a cursor with a NULL sort value continues the tail.
+    Raises ValueError for a malformed cursor.
+    """
+    sort_value, row_id = decode_cursor(cursor) if cursor else (None, None)
+    rows: List[Any] = []
+    
+    if cursor is None or sort_value is not None:
+        seek = (
+            tuple_(sort_column, id_column) < tuple_(sort_value, row_id) if cursor
+            else sort_column.is_not(None)
+        )
+        result = await db.execute(
+            query.where(seek).order_by(desc(sort_column), desc(id_column)).limit(limit + 1)
+        )
+        rows = list(result.scalars().all())
+        row_id = None  # The NULL tail, if reached, starts from its first row
+    
+    if len(rows) <= limit:
+        tail = sort_column.is_(None)
+        if row_id is not None:
+            tail = and_(tail, id_column < row_id)
+        result = await db.execute(
+            query.where(tail).order_by(desc(id_column)).limit(limit + 1 - len(rows))
+        )
+        rows.extend(result.scalars().all())
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
@@ -9,6 +9,7 @@ import os
 import logging
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine
 
 logger = logging.getLogger(__name__)
 
@@ -30,6 +31,7 @@ engine = create_async_engine(
     future=True,
     pool_pre_ping=True,
 )
+instrument_engine(engine)
 
 # Create async session factory
 AsyncSessionLocal = async_sessionmaker(
@@ -58,9 +60,11 @@ async def create_tables():
     try:
         # Import models to ensure they're registered
         from app.db import models
+        from app.db.search_index import install_search_index
         
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(install_search_index)
         
         logger.info("✅ Database tables created successfully")
     except Exception as e:
@@ -2,7 +2,7 @@
 Database models for KRSN-RT2I Platform.
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Float, JSON, ForeignKey, Enum, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -26,6 +26,14 @@ class IndicatorType(enum.Enum):
     FILE_HASH = "file_hash"
     EMAIL = "email"
 
+# Ordering used for "worst severity" rollups
+SEVERITY_RANK = {
+    ThreatSeverity.LOW: 1,
+    ThreatSeverity.MEDIUM: 2,
+    ThreatSeverity.HIGH: 3,
+    ThreatSeverity.CRITICAL: 4,
+}
+
 class AlertStatus(enum.Enum):
     """Alert status values."""
     PENDING = "pending"
@@ -45,7 +53,8 @@ class ThreatIndicator(Base):
     confidence = Column(Float, default=0.0)
     description = Column(Text)
     first_seen = Column(DateTime, default=func.now())
-    last_seen = Column(DateTime, default=func.now())
+    # Keyset sort key: a Python default keeps SQLite's stored text format comparable with bound cursors
+    last_seen = Column(DateTime, default=datetime.utcnow)
     source = Column(String(100))
     is_active = Column(Boolean, default=True)
     extra_metadata = Column(JSON)  # Changed from 'metadata' to 'extra_metadata'
@@ -54,6 +63,73 @@ class ThreatIndicator(Base):
     
     # Relationships
     alerts = relationship("Alert", back_populates="indicator")
+    
+    __table_args__ = (
+        # Keyset pagination over (last_seen, id)
+        Index("ix_threat_indicators_last_seen_id", "last_seen", "id"),
+        # One row per indicator; also serves upsert lookups by (type, value)
+        Index("uq_threat_indicators_type_value", "type", "value", unique=True),
+        # Hot read paths only ever look at active indicators
+        Index(
+            "ix_threat_indicators_active_severity_last_seen", "severity", "last_seen",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active")
+        ),
+        Index(
+            "ix_threat_indicators_active_type_last_seen", "type", "last_seen",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active")
+        ),
+        Index(
+            "ix_threat_indicators_active_source_last_seen", "source", "last_seen",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active")
+        ),
+        Index(
+            "ix_threat_indicators_active_severity_confidence", "severity", "confidence", "last_seen",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active")
+        ),
+        Index("ix_threat_indicators_created_at", "created_at"),
+    )
+
+class CVEData(Base):
+    """CVE (Common Vulnerabilities and Exposures) record."""
+    __tablename__ = "cve_data"
+    
+    id = Column(String(32), primary_key=True)  # e.g. CVE-2024-0001
+    description = Column(Text)
+    cvss_score = Column(Float)
+    severity = Column(String(20))
+    published_date = Column(DateTime)
+    modified_date = Column(DateTime)
+    references = Column(JSON)
+    affected_products = Column(JSON)
+    tags = Column(JSON)
+    is_active = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        # Keyset pagination over (published_date, id)
+        Index("ix_cve_data_published_date_id", "published_date", "id"),
+    )
+
+class CPEMatch(Base):
+    """Vulnerable CPE match criterion of a CVE, with its version range."""
+    __tablename__ = "cpe_matches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cve_id = Column(String(32), ForeignKey("cve_data.id", ondelete="CASCADE"), nullable=False)
+    vendor = Column(String(255), nullable=False)  # Normalized (lowercase, unescaped)
+    product = Column(String(255), nullable=False)
+    version = Column(String(100))  # Exact version from the criterion; NULL for "*" or "-"
+    version_start_including = Column(String(100))
+    version_start_excluding = Column(String(100))
+    version_end_including = Column(String(100))
+    version_end_excluding = Column(String(100))
+    criteria = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_cpe_matches_vendor_product", "vendor", "product"),
+        Index("ix_cpe_matches_cve_id", "cve_id"),
+    )
 
 class Alert(Base):
     """Alert model."""
@@ -72,6 +148,59 @@ class Alert(Base):
     # Relationships
     indicator = relationship("ThreatIndicator", back_populates="alerts")
 
+class AlertRollupHourly(Base):
+    """Alert counts per indicator and hour, maintained by the alert writer.
+
+    Alerts without an indicator are counted in rows whose indicator_id is NULL,
+    one per bucket.
+    """
+    __tablename__ = "alert_rollup_hourly"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    indicator_id = Column(Integer, ForeignKey("threat_indicators.id", ondelete="CASCADE"), nullable=True)
+    bucket = Column(DateTime, nullable=False)  # Start of the hour (UTC)
+    alert_count = Column(Integer, default=0, nullable=False)
+    max_severity = Column(Integer, default=0, nullable=False)  # SEVERITY_RANK of the worst alert
+    
+    __table_args__ = (
+        Index("uq_alert_rollup_hourly_indicator_bucket", "indicator_id", "bucket", unique=True),
+        Index(
+            "uq_alert_rollup_hourly_unattributed_bucket", "bucket", unique=True,
+            sqlite_where=text("indicator_id IS NULL"), postgresql_where=text("indicator_id IS NULL")
+        ),
+        Index("ix_alert_rollup_hourly_bucket", "bucket"),
+    )
+
+class AlertRollupDaily(Base):
+    """Alert counts per indicator and day; see AlertRollupHourly."""
+    __tablename__ = "alert_rollup_daily"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    indicator_id = Column(Integer, ForeignKey("threat_indicators.id", ondelete="CASCADE"), nullable=True)
+    bucket = Column(DateTime, nullable=False)  # Start of the day (UTC)
+    alert_count = Column(Integer, default=0, nullable=False)
+    max_severity = Column(Integer, default=0, nullable=False)
+    
+    __table_args__ = (
+        Index("uq_alert_rollup_daily_indicator_bucket", "indicator_id", "bucket", unique=True),
+        Index(
+            "uq_alert_rollup_daily_unattributed_bucket", "bucket", unique=True,
+            sqlite_where=text("indicator_id IS NULL"), postgresql_where=text("indicator_id IS NULL")
+        ),
+        Index("ix_alert_rollup_daily_bucket", "bucket"),
+    )
+
+class ActivityEvent(Base):
+    """Append-only platform activity log, trimmed to a fixed-size ring."""
+    __tablename__ = "activity_events"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    timestamp = Column(DateTime, default=func.now(), nullable=False)
+    event_type = Column(String(50), nullable=False)
+    message = Column(Text, nullable=False)
+    severity = Column(String(20))
+    indicator_id = Column(Integer)
+
 class AlertConfiguration(Base):
     """Alert configuration model."""
     __tablename__ = "alert_configurations"
@@ -101,6 +230,62 @@ class SystemMetric(Base):
     metric_unit = Column(String(20))
     timestamp = Column(DateTime, default=func.now(), index=True)
     extra_metadata = Column(JSON)  # Changed from 'metadata' to 'extra_metadata'
+    
+    __table_args__ = (
+        # Range queries over one metric
+        Index("ix_system_metrics_name_timestamp", "metric_name", "timestamp"),
+    )
+
+class SystemMetricRollupMinute(Base):
+    """Per-minute min/avg/max of a system metric, maintained by the metrics store."""
+    __tablename__ = "system_metric_rollup_1m"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    metric_name = Column(String(100), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # Start of the minute (UTC)
+    sample_count = Column(Integer, default=0, nullable=False)
+    value_sum = Column(Float, default=0.0, nullable=False)  # avg = value_sum / sample_count
+    value_min = Column(Float)
+    value_max = Column(Float)
+    
+    __table_args__ = (
+        Index("uq_system_metric_rollup_1m_name_bucket", "metric_name", "bucket", unique=True),
+        Index("ix_system_metric_rollup_1m_bucket", "bucket"),
+    )
+
+class SystemMetricRollupHourly(Base):
+    """Per-hour min/avg/max of a system metric, maintained by the metrics store."""
+    __tablename__ = "system_metric_rollup_1h"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    metric_name = Column(String(100), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # Start of the hour (UTC)
+    sample_count = Column(Integer, default=0, nullable=False)
+    value_sum = Column(Float, default=0.0, nullable=False)
+    value_min = Column(Float)
+    value_max = Column(Float)
+    
+    __table_args__ = (
+        Index("uq_system_metric_rollup_1h_name_bucket", "metric_name", "bucket", unique=True),
+        Index("ix_system_metric_rollup_1h_bucket", "bucket"),
+    )
+
+class SystemMetricRollupDaily(Base):
+    """Per-day min/avg/max of a system metric, maintained by the metrics store."""
+    __tablename__ = "system_metric_rollup_1d"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    metric_name = Column(String(100), nullable=False)
+    bucket = Column(DateTime, nullable=False)  # Start of the day (UTC)
+    sample_count = Column(Integer, default=0, nullable=False)
+    value_sum = Column(Float, default=0.0, nullable=False)
+    value_min = Column(Float)
+    value_max = Column(Float)
+    
+    __table_args__ = (
+        Index("uq_system_metric_rollup_1d_name_bucket", "metric_name", "bucket", unique=True),
+        Index("ix_system_metric_rollup_1d_bucket", "bucket"),
+    )
 
 class Feed(Base):
     """Threat feed model."""
@@ -117,6 +302,24 @@ class Feed(Base):
     extra_metadata = Column(JSON)  # Changed from 'metadata' to 'extra_metadata'
     created_at = Column(DateTime, default=func.now())
 
+class FeedCheckpoint(Base):
+    """Durable per-feed ingestion progress."""
+    __tablename__ = "feed_checkpoints"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    feed_name = Column(String(100), nullable=False, unique=True, index=True)
+    cycle_fingerprint = Column(String(64))  # Digest of the data set the current cycle is working through
+    cycle_started_at = Column(DateTime)
+    cycle_complete = Column(Boolean, default=True)
+    item_index = Column(Integer, default=0)  # Next item to process within the current cycle
+    watermark = Column(DateTime)  # Newest source timestamp committed
+    source_latest_at = Column(DateTime)  # Newest source timestamp seen in the feed
+    total_records = Column(Integer, default=0)
+    cloud_submissions = Column(Integer, default=0)
+    errors = Column(Integer, default=0)
+    records_per_second = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
 class User(Base):
     """User model."""
     __tablename__ = "users"
@@ -0,0 +1,197 @@
+"""
+Indexed substring and full-text search for threat indicators and CVEs.
+
+SQLite uses FTS5 tables with the trigram tokenizer, kept in sync by triggers.
+Tables with an INTEGER primary key get external-content FTS tables keyed by
+it; TEXT-keyed tables (cve_data) have no stable rowid, so their FTS table
+stores its own copy of the text under an INTEGER key from a side table that
+maps it to the primary key. PostgreSQL uses pg_trgm GIN indexes for substring matching
+and a tsvector GIN index for descriptions.
+"""
+
+import logging
+from typing import Dict
+
+from sqlalchemy import column, func, or_, text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+# Trigram indexes cannot serve patterns shorter than one trigram
+MIN_INDEXED_QUERY_LENGTH = 3
+
+# dialect name -> whether the indexed backend is installed
+_available: Dict[str, bool] = {}
+
+# fts table -> (source table, INTEGER primary key, indexed columns)
+SQLITE_FTS_TABLES = {
+    "threat_indicators_fts": ("threat_indicators", "id", ["value", "description"]),
+}
+
+# fts table -> (source table, TEXT primary key, indexed columns including the key)
+SQLITE_KEYED_FTS_TABLES = {
+    "cve_data_fts": ("cve_data", "id", ["id", "description"]),
+}
+
+POSTGRES_STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_threat_indicators_value_trgm "
+    "ON threat_indicators USING gin (value gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_threat_indicators_description_tsv "
+    "ON threat_indicators USING gin (to_tsvector('english', coalesce(description, '')))",
+    "CREATE INDEX IF NOT EXISTS ix_cve_data_id_trgm "
+    "ON cve_data USING gin (id gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_cve_data_description_tsv "
+    "ON cve_data USING gin (to_tsvector('english', coalesce(description, '')))",
+]
+
+POSTGRES_INDEXES = [
+    "ix_threat_indicators_value_trgm",
+    "ix_threat_indicators_description_tsv",
+    "ix_cve_data_id_trgm",
+    "ix_cve_data_description_tsv",
+]
+
+def _sqlite_statements(fts_table: str, source: str, rowid: str, columns: list) -> list:
+    """DDL for one FTS5 table and the triggers that keep it in sync."""
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    old_cols = ", ".join(f"old.{c}" for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"{cols}, content='{source}', content_rowid='{rowid}', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.{rowid}, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {source} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {cols}) VALUES ('delete', old.{rowid}, {old_cols}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES (new.{rowid}, {new_cols}); END",
+    ]
+
+def _sqlite_keyed_statements(fts_table: str, source: str, key: str, columns: list) -> list:
+    """DDL for a contentful FTS5 table over a TEXT-keyed table, rowids taken from a key map."""
+    keys = f"{fts_table}_keys"
+    cols = ", ".join(columns)
+    new_cols = ", ".join(f"new.{c}" for c in columns)
+    rowid_of = lambda row: f"(SELECT rowid FROM {keys} WHERE {key} = {row}.{key})"
+    return [
+        f"CREATE TABLE IF NOT EXISTS {keys} (rowid INTEGER PRIMARY KEY, {key} TEXT NOT NULL UNIQUE)",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({cols}, tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {source} BEGIN "
+        f"INSERT INTO {keys}({key}) VALUES (new.{key}); "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES ({rowid_of('new')}, {new_cols}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {source} BEGIN "
+        f"DELETE FROM {fts_table} WHERE rowid = {rowid_of('old')}; "
+        f"DELETE FROM {keys} WHERE {key} = old.{key}; END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE ON {source} BEGIN "
+        f"UPDATE {keys} SET {key} = new.{key} WHERE {key} = old.{key}; "
+        f"DELETE FROM {fts_table} WHERE rowid = {rowid_of('new')}; "
+        f"INSERT INTO {fts_table}(rowid, {cols}) VALUES ({rowid_of('new')}, {new_cols}); END",
+    ]
+
+def _drop_sqlite_fts(conn: Connection, fts_table: str) -> None:
+    for suffix in ("ai", "ad", "au"):
+        conn.execute(text(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {fts_table}"))
+    conn.execute(text(f"DROP TABLE IF EXISTS {fts_table}_keys"))
+
+def _install_sqlite(conn: Connection) -> None:
+    existing = {
+        row[0] for row in conn.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'table'")
+        )
+    }
+    for fts_table, (source, rowid, columns) in SQLITE_FTS_TABLES.items():
+        if source not in existing:
+            continue
+        for statement in _sqlite_statements(fts_table, source, rowid, columns):
+            conn.execute(text(statement))
+        if fts_table not in existing:
+            # Backfill rows that predate the index
+            conn.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    
+    for fts_table, (source, key, columns) in SQLITE_KEYED_FTS_TABLES.items():
+        if source not in existing:
+            continue
+        keys = f"{fts_table}_keys"
+        if fts_table in existing and keys not in existing:
+            # Older layout keyed by the implicit rowid, which VACUUM may renumber
+            _drop_sqlite_fts(conn, fts_table)
+            existing.discard(fts_table)
+        for statement in _sqlite_keyed_statements(fts_table, source, key, columns):
+            conn.execute(text(statement))
+        if fts_table not in existing:
+            conn.execute(text(f"INSERT INTO {keys}({key}) SELECT {key} FROM {source}"))
+            conn.execute(text(
+                f"INSERT INTO {fts_table}(rowid, {', '.join(columns)}) "
+                f"SELECT k.rowid, {', '.join(f's.{c}' for c in columns)} "
+                f"FROM {keys} k JOIN {source} s ON s.{key} = k.{key}"
+            ))
+
+def install_search_index(conn: Connection) -> bool:
+    """Create the search index for the connection's dialect. Safe to run repeatedly."""
+    dialect = conn.dialect.name
+    try:
+        if dialect == "sqlite":
+            _install_sqlite(conn)
+        elif dialect == "postgresql":
+            for statement in POSTGRES_STATEMENTS:
+                conn.execute(text(statement))
+        else:
+            _available[dialect] = False
+            return False
+        _available[dialect] = True
+        logger.info(f"✅ Search index ready ({dialect})")
+    except Exception as e:
+        # e.g. SQLite built without FTS5/trigram, or no rights to create pg_trgm
+        _available[dialect] = False
+        logger.warning(f"⚠️ Indexed search unavailable, falling back to LIKE scans: {e}")
+    return _available[dialect]
+
+def drop_search_index(conn: Connection) -> None:
+    """Remove the search index objects (used by migration downgrade)."""
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        for fts_table in [*SQLITE_FTS_TABLES, *SQLITE_KEYED_FTS_TABLES]:
+            _drop_sqlite_fts(conn, fts_table)
+    elif dialect == "postgresql":
+        for index in POSTGRES_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+    _available[dialect] = False
+
+def use_search_index(dialect: str, search_query: str) -> bool:
+    """Whether a query can be served by the indexed backend."""
+    if len(search_query) < MIN_INDEXED_QUERY_LENGTH:
+        return False
+    # Assume installed (e.g. by migration) until install_search_index says otherwise
+    return _available.get(dialect, dialect in ("sqlite", "postgresql"))
+
+def fts_phrase(search_query: str) -> str:
+    """Quote a query as a single FTS5 phrase (trigram phrases match substrings)."""
+    return '"' + search_query.replace('"', '""') + '"'
+
+def search_condition(dialect: str, fts_table: str, rowid_column, key_column, description_column, search_query: str):
+    """WHERE clause matching search_query against key and description columns.
+    
+    ``rowid_column`` is the source column the FTS table is keyed by: the INTEGER
+    primary key, or the TEXT primary key for SQLITE_KEYED_FTS_TABLES.
+    """
+    if not use_search_index(dialect, search_query):
+        return or_(
+            key_column.ilike(f"%{search_query}%"),
+            description_column.ilike(f"%{search_query}%")
+        )
+    
+    if dialect == "sqlite":
+        key = SQLITE_KEYED_FTS_TABLES[fts_table][1] if fts_table in SQLITE_KEYED_FTS_TABLES else "rowid"
+        matches = text(
+            f"SELECT {key} FROM {fts_table} WHERE {fts_table} MATCH :phrase"
+        ).bindparams(phrase=fts_phrase(search_query)).columns(column(key))
+        return rowid_column.in_(matches)
+    
+    document = func.to_tsvector("english", func.coalesce(description_column, ""))
+    return or_(
+        key_column.ilike(f"%{search_query}%"),
+        document.op("@@")(func.plainto_tsquery("english", search_query))
+    )
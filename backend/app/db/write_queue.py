@@ -0,0 +1,163 @@
+"""
+Single-writer batched write queue.
+
+With SQLite every commit takes the database write lock, so many small
+concurrent commits (ingestion, alerts, API writes) queue up on it and can
+fail with "database is locked". When enabled, writes are submitted here as
+operations on a session; one writer task applies up to N of them per
+transaction (or whatever arrived within T ms) and acknowledges each producer
+once its transaction has committed.
+"""
+
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import logging
+import asyncio
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH
+from app.db.database import AsyncSessionLocal, Base
+
+logger = logging.getLogger(__name__)
+
+WriteOperation = Callable[[AsyncSession], Awaitable[Any]]
+
+class WriteQueue:
+    """Batches write operations into shared transactions on one writer task."""
+
+    def __init__(self):
+        self.batch_size = settings.DB_WRITE_BATCH_SIZE
+        self.flush_interval = settings.DB_WRITE_FLUSH_MS / 1000
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.DB_WRITE_QUEUE_MAXSIZE)
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {
+            "operations_committed": 0,
+            "operations_failed": 0,
+            "transactions": 0,
+            "batch_fallbacks": 0,
+            "last_batch_size": 0,
+            "last_commit_ms": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._worker is not None
+
+    async def start(self):
+        """Start the writer task."""
+        if not self._worker:
+            self._worker = asyncio.create_task(self._run())
+            logger.info("✅ Database write queue started")
+
+    async def close(self):
+        """Commit everything still queued and stop the writer."""
+        if not self._worker:
+            return
+
+        await self.queue.join()
+        self._worker.cancel()
+        self._worker = None
+
+    async def write(self, db: AsyncSession, operation: WriteOperation) -> Any:
+        """Run ``operation`` through the queue when it is running, else commit it on ``db``.
+
+        On failure ``db`` is rolled back so the caller's session stays usable.
+        """
+        if self.running:
+            return await self.submit(operation)
+
+        try:
+            result = await operation(db)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        if isinstance(result, Base):
+            await db.refresh(result)
+        return result
+
+    async def submit(self, operation: WriteOperation) -> Any:
+        """Queue ``operation(session)`` and wait until its transaction commits."""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((operation, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._write_batch(batch)
+            except Exception as e:
+                logger.error(f"❌ Write batch failed: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _write_batch(self, batch: List[Tuple[WriteOperation, asyncio.Future]]):
+        """Apply a batch in one transaction; on failure, isolate the bad operation."""
+        started = time.monotonic()
+        try:
+            results = await self._apply(batch)
+        except Exception as e:
+            if len(batch) == 1:
+                self.stats["operations_failed"] += 1
+                batch[0][1].set_exception(e)
+                return
+
+            # One operation spoiled the transaction: replay each on its own
+            self.stats["batch_fallbacks"] += 1
+            logger.warning(f"⚠️ Write batch of {len(batch)} failed ({e}), retrying individually")
+            for item in batch:
+                await self._write_batch([item])
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+        self.stats["operations_committed"] += len(batch)
+        self.stats["transactions"] += 1
+        self.stats["last_batch_size"] = len(batch)
+        self.stats["last_commit_ms"] = round((time.monotonic() - started) * 1000, 2)
+
+    async def _apply(self, batch: List[Tuple[WriteOperation, asyncio.Future]]) -> List[Any]:
+        async with AsyncSessionLocal() as session:
+            results = [await operation(session) for operation, _ in batch]
+            await session.commit()
+
+            # Load server-side defaults (ids, timestamps) before handing rows back
+            for result in results:
+                if isinstance(result, Base):
+                    await session.refresh(result)
+            return results
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get queue depth and batching statistics."""
+        return {
+            "running": self.running,
+            "queued_operations": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000,
+            **self.stats
+        }
+
+# Shared writer; only started when DB_WRITE_QUEUE_ENABLED is set
+write_queue = WriteQueue()
+QUEUE_DEPTH.add_source(lambda: [(("db_write",), write_queue.queue.qsize())])
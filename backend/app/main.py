@@ -6,19 +6,35 @@ FastAPI application entry point with comprehensive threat intelligence capabilit
 from fastapi import FastAPI, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 import logging
+import asyncio
+from datetime import datetime
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from app.core.config import settings
 from app.core.security import verify_api_key
-from app.db.database import engine, create_tables
+from app.core.metrics import PrometheusMiddleware
+from app.db.database import engine, create_tables, AsyncSessionLocal
 from app.api.api_v1 import api_router
 from app.services.feed_ingestor import FeedIngestor
 from app.services.correlation_engine import CorrelationEngine
-from app.services.monitoring import SystemMonitor
+from app.services.monitoring import system_monitor
+from app.services.loop_watchdog import loop_watchdog
+from app.services.metrics_store import metrics_store
 from app.services.training_service import TrainingService
+from app.services.indicator_index import indicator_index
+from app.services.pattern_scanner import indicator_scanner
+from app.services.threat_stats import threat_stats
+from app.services.activity_feed import activity_feed
+from app.db.write_queue import write_queue
+from app.services.nvd_importer import nvd_importer
+from app.services.cpe_index import cpe_index
+from app.services.cloud_api_service import CloudAPIService
+from app.crud.crud_alert import purge_expired_rollups
 
 # Configure logging
 logging.basicConfig(
@@ -30,6 +46,17 @@ logger = logging.getLogger(__name__)
 # Global scheduler instance
 scheduler = AsyncIOScheduler()
 
+async def purge_alert_rollups():
+    """Drop alert rollup buckets past their retention."""
+    try:
+        async with AsyncSessionLocal() as db:
+            removed = await purge_expired_rollups(db)
+    except Exception as e:
+        logger.error(f"❌ Alert rollup purge failed: {e}")
+        return
+    if any(removed.values()):
+        logger.info(f"🧹 Purged alert rollups: {removed}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan manager for startup and shutdown events."""
@@ -40,25 +67,103 @@ async def lifespan(app: FastAPI):
     await create_tables()
     logger.info("✅ Database tables created/verified")
     
+    if settings.DB_WRITE_QUEUE_ENABLED:
+        await write_queue.start()
+    
     # Initialize services
     feed_ingestor = FeedIngestor()
     correlation_engine = CorrelationEngine()
-    system_monitor = SystemMonitor()
     training_service = TrainingService()
     
+    # SIEM delivery: outbox drain, health probe and HEC/bulk batching start here
+    cloud_service = None
+    if settings.SIEM_SPLUNK_ENABLED or settings.SIEM_ELASTICSEARCH_ENABLED:
+        cloud_service = CloudAPIService()
+        if await cloud_service.initialize():
+            feed_ingestor.set_cloud_service(cloud_service)
+            logger.info("✅ Cloud SIEM integration started")
+    
+    system_monitor.start(asyncio.get_running_loop())
+    if settings.LOOP_WATCHDOG_ENABLED:
+        loop_watchdog.start(asyncio.get_running_loop())
+    
     # Initialize training modules
     await training_service.initialize_default_modules()
     logger.info("✅ Training modules initialized")
     
     # Schedule background tasks
+    await feed_ingestor.restore_state()
+    await feed_ingestor.load_feed_frequencies()
+    feed_ingestor.schedule_feeds(scheduler)
+    
+    try:
+        await threat_stats.reconcile()
+        logger.info("✅ Threat statistics loaded")
+    except Exception as e:
+        logger.error(f"❌ Threat statistics load failed: {e}")
     scheduler.add_job(
-        feed_ingestor.run_ingestion_cycle,
-        IntervalTrigger(minutes=settings.FEED_UPDATE_INTERVAL),
-        id="feed_ingestion",
-        name="Threat Feed Ingestion",
+        threat_stats.reconcile,
+        IntervalTrigger(seconds=settings.THREAT_STATS_RECONCILE_SECONDS),
+        id="threat_stats_reconcile",
+        name="Threat Statistics Reconciliation",
+        max_instances=1,
+        coalesce=True,
         replace_existing=True
     )
     
+    try:
+        await activity_feed.load()
+    except Exception as e:
+        logger.error(f"❌ Activity feed load failed: {e}")
+    scheduler.add_job(
+        activity_feed.trim,
+        IntervalTrigger(hours=1),
+        id="activity_feed_trim",
+        name="Activity Feed Trim",
+        replace_existing=True
+    )
+    scheduler.add_job(
+        purge_alert_rollups,
+        IntervalTrigger(hours=1),
+        id="alert_rollup_purge",
+        name="Alert Rollup Retention Purge",
+        max_instances=1,
+        coalesce=True,
+        replace_existing=True
+    )
+    
+    if settings.INDICATOR_INDEX_ENABLED:
+        indicator_scanner.attach(indicator_index)
+        try:
+            await indicator_index.rebuild()
+        except Exception as e:
+            logger.error(f"❌ Indicator index build failed: {e}")
+        scheduler.add_job(
+            indicator_index.refresh,
+            IntervalTrigger(seconds=settings.INDICATOR_INDEX_REFRESH_SECONDS),
+            id="indicator_index_refresh",
+            name="Indicator Match Index Refresh",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+    
+    try:
+        await cpe_index.load()
+    except Exception as e:
+        logger.error(f"❌ CPE index load failed: {e}")
+    
+    if settings.NVD_IMPORT_ENABLED:
+        scheduler.add_job(
+            nvd_importer.run_incremental,
+            IntervalTrigger(hours=settings.NVD_UPDATE_INTERVAL_HOURS),
+            id="nvd_incremental_import",
+            name="NVD Incremental CVE Import",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+    
     scheduler.add_job(
         correlation_engine.run_correlation_cycle,
         IntervalTrigger(minutes=settings.CORRELATION_CHECK_INTERVAL),
@@ -76,6 +181,27 @@ async def lifespan(app: FastAPI):
         replace_existing=True
     )
     
+    # Persist sampled system metrics and enforce per-tier retention
+    if settings.SYSTEM_METRICS_STORE_ENABLED:
+        scheduler.add_job(
+            metrics_store.flush,
+            IntervalTrigger(seconds=settings.SYSTEM_METRICS_FLUSH_SECONDS),
+            id="system_metrics_flush",
+            name="System Metrics Flush",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        scheduler.add_job(
+            metrics_store.purge,
+            IntervalTrigger(hours=1),
+            id="system_metrics_purge",
+            name="System Metrics Retention Purge",
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+    
     scheduler.start()
     logger.info("⏰ Background tasks scheduled")
     
@@ -100,6 +226,19 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down RTIP Platform...")
     scheduler.shutdown()
+    if settings.SYSTEM_METRICS_STORE_ENABLED:
+        try:
+            await metrics_store.flush()
+        except Exception as e:
+            logger.error(f"❌ Final system metrics flush failed: {e}")
+    system_monitor.stop()
+    loop_watchdog.stop()
+    if cloud_service:
+        try:
+            await cloud_service.close()
+        except Exception as e:
+            logger.error(f"❌ Cloud SIEM shutdown failed: {e}")
+    await write_queue.close()
     logger.info("✅ RTIP Platform shutdown complete")
 
 # Create FastAPI application
@@ -141,6 +280,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency per route template, exposed on /metrics
+app.add_middleware(PrometheusMiddleware)
+
 # Security scheme
 security = HTTPBearer()
 
@@ -184,18 +326,17 @@ async def root():
 async def health_check():
     """Enhanced health check endpoint with system monitoring."""
     try:
-        system_monitor = SystemMonitor()
         health_summary = await system_monitor.get_system_health_summary()
         
         return {
             "status": "healthy" if health_summary["overall_health"] in ["excellent", "good"] else "degraded",
-            "timestamp": "2025-01-20T15:48:55Z",
+            "timestamp": datetime.utcnow().isoformat(),
             "services": {
                 "api": "operational",
                 "database": "operational",
                 "scheduler": "operational" if scheduler.running else "stopped",
                 "feeds": "operational",
-                "monitoring": "operational",
+                "monitoring": "operational" if system_monitor.sampler.running else "stopped",
                 "training": "operational"
             },
             "system_health": health_summary,
@@ -207,19 +348,21 @@ async def health_check():
 
 @app.get("/metrics", tags=["Monitoring"])
 async def get_metrics(current_user: dict = Depends(get_current_user)):
-    """Get platform metrics for monitoring."""
+    """Prometheus text exposition of platform metrics."""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@app.get("/metrics/summary", tags=["Monitoring"])
+async def get_metrics_summary(current_user: dict = Depends(get_current_user)):
+    """Get a JSON summary of platform metrics."""
     from app.crud.crud_threat import get_threat_stats
-    from app.db.database import get_db
-    
-    system_monitor = SystemMonitor()
     
-    async with get_db() as db:
-        threat_stats = await get_threat_stats(db)
+    async with AsyncSessionLocal() as db:
+        stats = await get_threat_stats(db)
     
     system_health = await system_monitor.get_system_health_summary()
     
     return {
-        "threats": threat_stats,
+        "threats": stats,
         "system": system_health,
         "scheduler": {
             "running": scheduler.running,
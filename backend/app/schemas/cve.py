@@ -0,0 +1,45 @@
+"""
+Pydantic schemas for CVE-related API requests and responses.
+"""
+
+from pydantic import BaseModel, Field
+from typing import List, Optional, Dict
+from datetime import datetime
+
+class CVESummary(BaseModel):
+    """Schema for CVE details in listings and alongside exposure matches."""
+    id: str
+    severity: Optional[str] = None
+    cvss_score: Optional[float] = None
+    published_date: Optional[datetime] = None
+    description: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class CVEPage(BaseModel):
+    """Schema for a cursor-paginated page of CVEs."""
+    results: List[CVESummary]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page; null on the last page")
+    limit: int
+
+class ExposureCheckRequest(BaseModel):
+    """Schema for checking an asset inventory against known CVEs."""
+    cpes: List[str] = Field(..., min_items=1, max_items=10000, description="Asset CPEs (2.3 strings or 2.2 URIs)")
+    min_cvss_score: Optional[float] = Field(None, ge=0, le=10, description="Only report CVEs at or above this score")
+
+class ExposureResult(BaseModel):
+    """Schema for the exposure of one asset CPE."""
+    cpe: str
+    is_exposed: bool
+    cve_ids: List[str] = Field(default_factory=list)
+    version_known: bool = True
+    error: Optional[str] = None
+
+class ExposureCheckResponse(BaseModel):
+    """Schema for an exposure check over an asset inventory."""
+    results: List[ExposureResult]
+    cves: Dict[str, CVESummary]
+    total_checked: int
+    exposed_count: int
+    took_ms: float
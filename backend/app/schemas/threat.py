@@ -68,6 +68,12 @@ class ThreatIndicatorResponse(ThreatIndicatorBase):
     class Config:
         from_attributes = True
 
+class ThreatIndicatorPage(BaseModel):
+    """Schema for a cursor-paginated page of threat indicators."""
+    results: List[ThreatIndicatorResponse]
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page; null on the last page")
+    limit: int
+
 class ThreatSearchRequest(BaseModel):
     """Schema for threat search requests."""
     query: str = Field(..., min_length=1, description="Search query (IP, domain, URL, etc.)")
@@ -87,7 +93,8 @@ class ThreatSearchResponse(BaseModel):
 
 class ThreatCheckRequest(BaseModel):
     """Schema for checking if an indicator is malicious."""
-    indicators: List[str] = Field(..., min_items=1, max_items=100, description="List of indicators to check")
+    indicators: List[str] = Field(..., min_items=1, max_items=10000, description="List of indicators to check")
+    fuzzy: bool = Field(False, description="Fall back to CIDR, parent-domain and substring matching for misses")
 
 class ThreatCheckResult(BaseModel):
     """Schema for individual threat check result."""
@@ -103,6 +110,7 @@ class ThreatCheckResult(BaseModel):
     related_cves: List[str] = Field(default_factory=list)
     malware_family: Optional[str] = None
     threat_score: int = 0
+    match_type: Optional[str] = None
 
 class ThreatCheckResponse(BaseModel):
     """Schema for bulk threat check response."""
@@ -111,6 +119,37 @@ class ThreatCheckResponse(BaseModel):
     malicious_count: int
     execution_time_ms: float
 
+class ThreatScanRequest(BaseModel):
+    """Schema for scanning free text for known indicators."""
+    documents: List[str] = Field(..., min_items=1, max_items=1000, description="Log lines, email bodies or other text")
+    max_matches_per_document: int = Field(100, ge=1, le=1000)
+
+class ThreatScanMatch(BaseModel):
+    """Schema for one indicator occurrence in a scanned document."""
+    indicator: str
+    matched_text: str
+    offset: int
+    type: Optional[ThreatType] = None
+    severity: Optional[SeverityLevel] = None
+    confidence: int = 0
+    source: Optional[str] = None
+    indicator_ids: List[int] = Field(default_factory=list, description="Every indicator with this normalized value")
+
+class ThreatScanResult(BaseModel):
+    """Schema for the matches found in one document."""
+    document_index: int
+    is_malicious: bool
+    matches: List[ThreatScanMatch] = Field(default_factory=list)
+
+class ThreatScanResponse(BaseModel):
+    """Schema for batch scan response."""
+    results: List[ThreatScanResult]
+    total_documents: int
+    total_bytes: int
+    match_count: int
+    execution_time_ms: float
+    throughput_mb_s: float
+
 class ThreatStatsResponse(BaseModel):
     """Schema for threat statistics."""
     total_threats: int
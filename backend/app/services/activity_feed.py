@@ -0,0 +1,112 @@
+"""
+Recent platform activity served from a fixed-size in-memory ring.
+
+Events are appended to the activity_events table (so the ring survives
+restarts) and to a deque that dashboard reads are served from. The table
+is periodically trimmed to the same size as the ring.
+"""
+
+import logging
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional
+
+from sqlalchemy import select, delete, func, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import ActivityEvent
+
+logger = logging.getLogger(__name__)
+
+def _event_dict(event: ActivityEvent) -> Dict[str, Any]:
+    return {
+        "timestamp": event.timestamp.isoformat() if event.timestamp else None,
+        "type": event.event_type,
+        "message": event.message,
+        "severity": event.severity,
+        "indicator_id": event.indicator_id,
+    }
+
+class ActivityFeed:
+    """Append-only activity ring backed by the activity_events table."""
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = size or settings.ACTIVITY_RING_SIZE
+        self._ring: deque = deque(maxlen=self.size)
+
+    def stage(
+        self,
+        db: AsyncSession,
+        event_type: str,
+        message: str,
+        severity: str = "info",
+        indicator_id: Optional[int] = None
+    ) -> ActivityEvent:
+        """Add an event to the caller's transaction; publish() it after commit."""
+        event = ActivityEvent(
+            timestamp=datetime.utcnow(),
+            event_type=event_type,
+            message=message,
+            severity=severity,
+            indicator_id=indicator_id
+        )
+        db.add(event)
+        return event
+
+    def publish(self, event: ActivityEvent):
+        """Make a committed event visible to readers."""
+        self._ring.append(_event_dict(event))
+
+    async def record(
+        self,
+        event_type: str,
+        message: str,
+        severity: str = "info",
+        indicator_id: Optional[int] = None
+    ):
+        """Persist and publish a standalone event."""
+        async with AsyncSessionLocal() as db:
+            event = self.stage(db, event_type, message, severity, indicator_id)
+            await db.commit()
+        self.publish(event)
+
+    async def load(self):
+        """Warm the ring from the newest persisted events."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                select(ActivityEvent).order_by(desc(ActivityEvent.id)).limit(self.size)
+            )
+            events = result.scalars().all()
+        self._ring.clear()
+        self._ring.extend(_event_dict(event) for event in reversed(events))
+        logger.info(f"✅ Activity feed loaded {len(events)} events")
+
+    async def trim(self):
+        """Delete persisted events that have fallen out of the ring."""
+        async with AsyncSessionLocal() as db:
+            newest = (await db.execute(select(func.max(ActivityEvent.id)))).scalar()
+            if newest is None or newest <= self.size:
+                return
+            result = await db.execute(
+                delete(ActivityEvent).where(ActivityEvent.id <= newest - self.size)
+            )
+            await db.commit()
+        if result.rowcount:
+            logger.info(f"🧹 Trimmed {result.rowcount} activity events")
+
+    def get_recent(self, hours: int = 24, limit: int = 50) -> List[Dict[str, Any]]:
+        """Newest-first events from the last ``hours`` hours."""
+        cutoff = (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+        events = []
+        for event in reversed(self._ring):
+            if event["timestamp"] and event["timestamp"] < cutoff:
+                break
+            events.append(event)
+            if len(events) >= limit:
+                break
+        return events
+
+# Shared instance used by writers and the dashboard
+activity_feed = ActivityFeed()
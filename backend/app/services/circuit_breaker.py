@@ -0,0 +1,119 @@
+"""
+Circuit breaker for outbound integrations.
+"""
+
+from typing import Dict, Any, Optional
+from collections import deque
+from enum import Enum
+import logging
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised when a call is short-circuited by an open breaker."""
+    pass
+
+class CircuitState(str, Enum):
+    """Circuit breaker states."""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker over a sliding window of recent calls."""
+    
+    def __init__(
+        self,
+        name: str,
+        failure_rate_threshold: Optional[float] = None,
+        minimum_calls: Optional[int] = None,
+        window_size: Optional[int] = None,
+        open_seconds: Optional[float] = None,
+        half_open_max_calls: int = 1
+    ):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold or settings.CLOUD_BREAKER_FAILURE_RATE
+        self.minimum_calls = minimum_calls or settings.CLOUD_BREAKER_MIN_CALLS
+        self.open_seconds = open_seconds or settings.CLOUD_BREAKER_OPEN_SECONDS
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+        self._outcomes: deque = deque(maxlen=window_size or settings.CLOUD_BREAKER_WINDOW)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self.stats = {"short_circuited": 0, "times_opened": 0, "last_state_change": None}
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed; open circuits fail fast."""
+        if self.state == CircuitState.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.stats["short_circuited"] += 1
+                return False
+            self._transition(CircuitState.HALF_OPEN)
+        
+        if self.state == CircuitState.HALF_OPEN:
+            if self._half_open_calls >= self.half_open_max_calls:
+                self.stats["short_circuited"] += 1
+                return False
+            self._half_open_calls += 1
+        
+        return True
+    
+    @property
+    def is_open(self) -> bool:
+        return self.state == CircuitState.OPEN and time.monotonic() - self._opened_at < self.open_seconds
+    
+    def record_success(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.CLOSED)
+        elif self.state == CircuitState.OPEN:
+            # A successful health probe lets trial traffic through
+            self._transition(CircuitState.HALF_OPEN)
+        else:
+            self._outcomes.append(True)
+    
+    def record_failure(self):
+        if self.state == CircuitState.HALF_OPEN:
+            self.trip()
+            return
+        if self.state == CircuitState.OPEN:
+            # Keep an unhealthy sink open for another full period
+            self._opened_at = time.monotonic()
+            return
+        
+        self._outcomes.append(False)
+        if len(self._outcomes) >= self.minimum_calls and self.failure_rate >= self.failure_rate_threshold:
+            self.trip()
+    
+    def trip(self):
+        """Open the circuit immediately."""
+        self._opened_at = time.monotonic()
+        if self.state != CircuitState.OPEN:
+            self.stats["times_opened"] += 1
+            self._transition(CircuitState.OPEN)
+    
+    @property
+    def failure_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+    
+    def _transition(self, state: CircuitState):
+        logger.info(f"🔌 Circuit {self.name}: {self.state.value} → {state.value}")
+        self.state = state
+        self._half_open_calls = 0
+        self._outcomes.clear()
+        self.stats["last_state_change"] = time.time()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get breaker state and counters."""
+        return {
+            "state": self.state.value,
+            "failure_rate": round(self.failure_rate, 3),
+            "window_calls": len(self._outcomes),
+            "retry_in_seconds": round(max(self.open_seconds - (time.monotonic() - self._opened_at), 0.0), 1)
+            if self.state == CircuitState.OPEN else 0.0,
+            **self.stats
+        }
@@ -4,23 +4,56 @@ Coordinates Splunk Cloud and Elasticsearch Cloud integrations.
 """
 
 from typing import Dict, Any, List, Optional
+from collections import Counter
 import logging
 import asyncio
+import weakref
 from datetime import datetime
 import json
 
 from .splunk_integration import SplunkCloudService
 from .elasticsearch_integration import ElasticsearchCloudService
+from .splunk_hec import SplunkHECSender
+from .elasticsearch_bulk import ElasticsearchBulkIndexer
+from .cloud_outbox import CloudOutbox
+from .circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from .search_cache import SearchResultCache
+from app.core.config import settings
+from app.core.metrics import QUEUE_DEPTH, CACHE_REQUESTS, CACHE_HIT_RATIO
 
 logger = logging.getLogger(__name__)
 
+# Live services, read by the metric sources registered once below
+_services: "weakref.WeakSet[CloudAPIService]" = weakref.WeakSet()
+
 class CloudAPIService:
     """Service for managing cloud API integrations."""
     
     def __init__(self):
         self.splunk = SplunkCloudService()
         self.elasticsearch = ElasticsearchCloudService()
+        self.splunk_hec = SplunkHECSender()
+        self.es_bulk = ElasticsearchBulkIndexer(self.elasticsearch)
+        self.outbox = CloudOutbox() if settings.CLOUD_OUTBOX_ENABLED else None
+        self.breakers = {
+            "splunk": CircuitBreaker("splunk"),
+            "elasticsearch": CircuitBreaker("elasticsearch")
+        }
+        self._health_task: Optional[asyncio.Task] = None
+        self.search_cache = SearchResultCache()
         self.is_initialized = False
+        _services.add(self)
+    
+    def _queue_depths(self) -> Dict[str, int]:
+        """Buffered SIEM deliveries, sampled at metric scrape time."""
+        depths = {
+            "elasticsearch_bulk": self.es_bulk.queue.qsize(),
+            "splunk_hec": self.splunk_hec.buffered_events
+        }
+        if self.outbox:
+            for sink, backlog in self.outbox.backlog().items():
+                depths[f"outbox:{sink}"] = backlog
+        return depths
     
     async def initialize(self) -> bool:
         """Initialize all cloud service connections."""
@@ -37,20 +70,43 @@ class CloudAPIService:
             
             self.is_initialized = True
             
-            # Log connection status
+            if self.splunk_hec.enabled:
+                await self.splunk_hec.start()
+            
+            # Log connection status; unreachable sinks start with an open breaker
             if isinstance(splunk_connected, bool) and splunk_connected:
                 logger.info("✅ Splunk Cloud connected")
             else:
+                self.breakers["splunk"].trip()
                 logger.warning(f"⚠️ Splunk Cloud connection failed: {splunk_connected}")
             
             if isinstance(elastic_connected, bool) and elastic_connected:
                 logger.info("✅ Elasticsearch Cloud connected")
             else:
+                self.breakers["elasticsearch"].trip()
                 logger.warning(f"⚠️ Elasticsearch Cloud connection failed: {elastic_connected}")
             
             # Initialize Elasticsearch index template
             if isinstance(elastic_connected, bool) and elastic_connected:
                 await self.elasticsearch.create_index_template()
+                await self.es_bulk.start()
+            
+            if self.outbox:
+                if self.splunk.splunk_url or self.splunk_hec.enabled:
+                    self.outbox.register_sink(
+                        "splunk", self._deliver_to_splunk,
+                        available=lambda: not self.breakers["splunk"].is_open
+                    )
+                if any(self.elasticsearch.hosts):
+                    self.outbox.register_sink(
+                        "elasticsearch", self._deliver_to_elasticsearch,
+                        available=lambda: not self.breakers["elasticsearch"].is_open
+                    )
+                await self.outbox.start()
+                logger.info(f"📦 Cloud outbox draining to: {', '.join(self.outbox.sinks) or 'no sinks'}")
+            
+            if not self._health_task:
+                self._health_task = asyncio.create_task(self._probe_health())
             
             return True
             
@@ -69,16 +125,100 @@ class CloudAPIService:
     async def _connect_elasticsearch(self) -> bool:
         """Connect to Elasticsearch Cloud."""
         try:
-            return self.elasticsearch.connect()
+            return await self.elasticsearch.connect()
         except Exception as e:
             logger.error(f"❌ Elasticsearch connection error: {e}")
             return False
     
+    async def _guarded(self, sink: str, call):
+        """Run ``call()`` through the sink's circuit breaker, failing fast while it is open."""
+        breaker = self.breakers[sink]
+        if not breaker.allow_request():
+            raise CircuitOpenError(f"{sink} circuit is open")
+        
+        try:
+            result = await call()
+        except Exception:
+            breaker.record_failure()
+            raise
+        
+        # Sends report failure as False, searches as None
+        if result is False or result is None:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return result
+    
+    def _on_indexed(self, result):
+        """Invalidate cached searches once new indicators reach a sink."""
+        if result:
+            # Coalesced: steady ingestion would otherwise keep the cache empty
+            self.search_cache.request_invalidation()
+        return result
+    
+    async def _probe_health(self):
+        """Feed connection status into the breakers so open circuits can recover."""
+        while True:
+            await asyncio.sleep(settings.CLOUD_HEALTH_PROBE_INTERVAL)
+            try:
+                statuses = await self._collect_service_statuses()
+                for sink, status in statuses.items():
+                    breaker = self.breakers[sink]
+                    if status.get("status") == "connected":
+                        if breaker.state != CircuitState.CLOSED:
+                            breaker.record_success()
+                    else:
+                        breaker.record_failure()
+            except Exception as e:
+                logger.error(f"❌ Cloud health probe failed: {e}")
+    
+    async def _deliver_to_splunk(self, threats: List[Dict[str, Any]]) -> bool:
+        """Outbox sink: deliver a batch to Splunk."""
+        if self.splunk_hec.enabled:
+            async def send_all():
+                return all(await asyncio.gather(*(self.splunk_hec.send(threat) for threat in threats)))
+            return self._on_indexed(await self._guarded("splunk", send_all))
+        
+        def send_all_sdk():
+            return all(self.splunk.send_threat_data(threat) for threat in threats)
+        return self._on_indexed(await self._guarded("splunk", lambda: asyncio.to_thread(send_all_sdk)))
+    
+    async def _deliver_to_elasticsearch(self, threats: List[Dict[str, Any]]) -> bool:
+        """Outbox sink: deliver a batch to Elasticsearch."""
+        async def index_all():
+            return all(await asyncio.gather(*(self.es_bulk.index(threat) for threat in threats)))
+        return self._on_indexed(await self._guarded("elasticsearch", index_all))
+    
+    @property
+    def _outbox_active(self) -> bool:
+        """Only queue when a registered sink will drain the entries."""
+        return bool(self.outbox and self.outbox.sinks)
+    
+    def _queued_result(self, threat_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "threat_id": threat_data.get("id", "unknown"),
+            "timestamp": datetime.utcnow().isoformat(),
+            "services": {
+                sink: {"success": True, "queued": True, "error": None} for sink in self.outbox.sinks
+            },
+            "queued": True,
+            "overall_success": bool(self.outbox.sinks)
+        }
+    
     async def send_threat_intelligence(self, threat_data: Dict[str, Any]) -> Dict[str, Any]:
         """Send threat intelligence to both cloud services."""
         if not self.is_initialized:
             await self.initialize()
         
+        if self._outbox_active:
+            # Durable hand-off; the outbox workers deliver and retry per sink
+            await self.outbox.enqueue(threat_data)
+            return self._queued_result(threat_data)
+        
+        return await self._send_threat_direct(threat_data)
+    
+    async def _send_threat_direct(self, threat_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Deliver threat intelligence to both cloud services immediately."""
         results = {
             "threat_id": threat_data.get("id", "unknown"),
             "timestamp": datetime.utcnow().isoformat(),
@@ -91,10 +231,14 @@ class CloudAPIService:
         # Splunk task
         async def send_to_splunk():
             try:
-                success = await asyncio.to_thread(
-                    self.splunk.send_threat_data, threat_data
-                )
+                if self.splunk_hec.enabled:
+                    call = lambda: self.splunk_hec.send(threat_data)
+                else:
+                    call = lambda: asyncio.to_thread(self.splunk.send_threat_data, threat_data)
+                success = self._on_indexed(await self._guarded("splunk", call))
                 return {"service": "splunk", "success": success}
+            except CircuitOpenError as e:
+                return {"service": "splunk", "success": False, "error": str(e)}
             except Exception as e:
                 logger.error(f"❌ Splunk send error: {e}")
                 return {"service": "splunk", "success": False, "error": str(e)}
@@ -102,8 +246,12 @@ class CloudAPIService:
         # Elasticsearch task
         async def send_to_elasticsearch():
             try:
-                success = await self.elasticsearch.index_threat_data(threat_data)
+                success = self._on_indexed(
+                    await self._guarded("elasticsearch", lambda: self.es_bulk.index(threat_data))
+                )
                 return {"service": "elasticsearch", "success": success}
+            except CircuitOpenError as e:
+                return {"service": "elasticsearch", "success": False, "error": str(e)}
             except Exception as e:
                 logger.error(f"❌ Elasticsearch send error: {e}")
                 return {"service": "elasticsearch", "success": False, "error": str(e)}
@@ -127,51 +275,74 @@ class CloudAPIService:
             svc.get("success", False) for svc in results["services"].values()
         )
         
-        logger.info(f"📤 Threat intelligence sent - Overall: {results['overall_success']}")
+        logger.debug(f"📤 Threat intelligence sent - Overall: {results['overall_success']}")
         return results
     
+    async def send_threat_batch(self, threats: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Send many threats concurrently so they share batched deliveries."""
+        if not self.is_initialized:
+            await self.initialize()
+        
+        if self._outbox_active:
+            await self.outbox.enqueue_many(threats)
+            return [self._queued_result(threat) for threat in threats]
+        
+        results = await asyncio.gather(
+            *(self.send_threat_intelligence(threat) for threat in threats),
+            return_exceptions=True
+        )
+        return [
+            result if isinstance(result, dict) else {"overall_success": False, "error": str(result)}
+            for result in results
+        ]
+    
     async def search_threats(self, query: str, size: int = 100) -> Dict[str, Any]:
-        """Search for threats across all cloud services."""
+        """Search for threats across all cloud services, serving repeats from cache."""
         if not self.is_initialized:
             await self.initialize()
         
+        return await self.search_cache.get_or_load(
+            query, size, lambda: self._search_threats_uncached(query, size),
+            # Partial results would hide the failed backend for the whole TTL
+            cacheable=lambda result: result["complete"]
+        )
+    
+    async def _search_threats_uncached(self, query: str, size: int) -> Dict[str, Any]:
+        """Fan a search out to all cloud services and merge the results."""
         results = {
             "query": query,
             "timestamp": datetime.utcnow().isoformat(),
             "results": {}
         }
         
-        # Search services in parallel
-        async def search_splunk():
-            try:
-                return await asyncio.to_thread(
-                    self.splunk.search_threats, query, size
-                )
-            except Exception as e:
-                logger.error(f"❌ Splunk search error: {e}")
-                return []
-        
-        async def search_elasticsearch():
+        async def search(service: str, call):
+            """(data, error) for one backend; error is None on success."""
             try:
-                return await self.elasticsearch.search_threats(query, size)
+                data = await self._guarded(service, call)
+            except CircuitOpenError:
+                return [], "circuit open"
             except Exception as e:
-                logger.error(f"❌ Elasticsearch search error: {e}")
-                return []
+                logger.error(f"❌ {service.capitalize()} search error: {e}")
+                return [], str(e)
+            return (data, None) if isinstance(data, list) else ([], "search failed")
         
-        splunk_results, elastic_results = await asyncio.gather(
-            search_splunk(), search_elasticsearch(), return_exceptions=True
+        (splunk_results, splunk_error), (elastic_results, elastic_error) = await asyncio.gather(
+            search("splunk", lambda: self.splunk.search_threats_async(query, max_results=size)),
+            search("elasticsearch", lambda: self.elasticsearch.search_threats(query, size))
         )
         
         # Process results
-        results["results"]["splunk"] = {
-            "count": len(splunk_results) if isinstance(splunk_results, list) else 0,
-            "data": splunk_results if isinstance(splunk_results, list) else []
-        }
-        
-        results["results"]["elasticsearch"] = {
-            "count": len(elastic_results) if isinstance(elastic_results, list) else 0,
-            "data": elastic_results if isinstance(elastic_results, list) else []
-        }
+        for service, data, error in (
+            ("splunk", splunk_results, splunk_error),
+            ("elasticsearch", elastic_results, elastic_error)
+        ):
+            results["results"][service] = {
+                "success": error is None,
+                "error": error,
+                "count": len(data),
+                "data": data
+            }
+        results["complete"] = splunk_error is None and elastic_error is None
         
         # Combine and deduplicate results
         combined_results = []
@@ -201,9 +372,31 @@ class CloudAPIService:
         status = {
             "timestamp": datetime.utcnow().isoformat(),
             "overall_health": "unknown",
-            "services": {}
+            "services": await self._collect_service_statuses()
+        }
+        
+        status["circuit_breakers"] = {
+            sink: breaker.get_status() for sink, breaker in self.breakers.items()
         }
+        status["delivery"] = self.get_delivery_status()
+        status["search_cache"] = self.search_cache.get_status()
         
+        # Determine overall health
+        service_statuses = [
+            svc.get("status", "error") for svc in status["services"].values()
+        ]
+        
+        if all(s == "connected" for s in service_statuses):
+            status["overall_health"] = "healthy"
+        elif any(s == "connected" for s in service_statuses):
+            status["overall_health"] = "degraded"
+        else:
+            status["overall_health"] = "unhealthy"
+        
+        return status
+    
+    async def _collect_service_statuses(self) -> Dict[str, Dict[str, Any]]:
+        """Get connection status from each cloud service in parallel."""
         # Get service statuses in parallel
         async def get_splunk_status():
             try:
@@ -224,27 +417,14 @@ class CloudAPIService:
         )
         
         # Process statuses
-        status["services"]["splunk"] = splunk_status if isinstance(splunk_status, dict) else {
-            "status": "error", "error": str(splunk_status)
+        return {
+            "splunk": splunk_status if isinstance(splunk_status, dict) else {
+                "status": "error", "error": str(splunk_status)
+            },
+            "elasticsearch": elastic_status if isinstance(elastic_status, dict) else {
+                "status": "error", "error": str(elastic_status)
+            }
         }
-        
-        status["services"]["elasticsearch"] = elastic_status if isinstance(elastic_status, dict) else {
-            "status": "error", "error": str(elastic_status)
-        }
-        
-        # Determine overall health
-        service_statuses = [
-            svc.get("status", "error") for svc in status["services"].values()
-        ]
-        
-        if all(s == "connected" for s in service_statuses):
-            status["overall_health"] = "healthy"
-        elif any(s == "connected" for s in service_statuses):
-            status["overall_health"] = "degraded"
-        else:
-            status["overall_health"] = "unhealthy"
-        
-        return status
     
     async def get_threat_statistics(self) -> Dict[str, Any]:
         """Get combined threat statistics from all services."""
@@ -316,3 +496,46 @@ class CloudAPIService:
         )
         
         return results
+    
+    async def close(self):
+        """Flush pending deliveries and release connections."""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        if self.outbox:
+            await self.outbox.close()
+        await self.splunk_hec.close()
+        await self.es_bulk.close()
+        await self.elasticsearch.close()
+    
+    def get_delivery_status(self) -> Dict[str, Any]:
+        """Get outbox backlog and batching pipeline statistics."""
+        return {
+            "outbox": self.outbox.get_status() if self.outbox else {"enabled": False},
+            "splunk_hec": self.splunk_hec.get_status(),
+            "elasticsearch_bulk": self.es_bulk.get_status()
+        }
+
+def _queue_depth_samples():
+    depths = Counter()
+    for service in list(_services):
+        depths.update(service._queue_depths())
+    return [((queue,), depth) for queue, depth in depths.items()]
+
+def _search_cache_samples():
+    lookups = Counter()
+    for service in list(_services):
+        lookups.update({result: service.search_cache.stats[result] for result in ("hits", "coalesced", "misses")})
+    return lookups
+
+def _search_cache_requests():
+    return [(("federated_search", result), count) for result, count in _search_cache_samples().items()]
+
+def _search_cache_hit_ratio():
+    lookups = _search_cache_samples()
+    total = sum(lookups.values())
+    return [(("federated_search",), (lookups["hits"] + lookups["coalesced"]) / total if total else 0.0)]
+
+QUEUE_DEPTH.add_source(_queue_depth_samples)
+CACHE_REQUESTS.add_source(_search_cache_requests)
+CACHE_HIT_RATIO.add_source(_search_cache_hit_ratio)
@@ -0,0 +1,250 @@
+"""
+Durable outbox for cloud SIEM deliveries.
+Threats are appended to a local SQLite log and drained per sink by async workers.
+"""
+
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+import logging
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class CloudOutbox:
+    """Append-only outbox with per-sink delivery offsets."""
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.CLOUD_OUTBOX_PATH
+        self.batch_size = settings.CLOUD_OUTBOX_BATCH_SIZE
+        self.max_backoff = settings.CLOUD_OUTBOX_MAX_BACKOFF
+        self.sinks: Dict[str, Callable[[List[Dict[str, Any]]], Awaitable[bool]]] = {}
+        self._available: Dict[str, Callable[[], bool]] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._wakeups: Dict[str, asyncio.Event] = {}
+        self._compactor: Optional[asyncio.Task] = None
+    
+    def open(self):
+        """Open the outbox file and create its tables."""
+        if self._conn:
+            return
+        
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "payload TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sink_offsets ("
+            "sink TEXT PRIMARY KEY, "
+            "delivered_id INTEGER NOT NULL DEFAULT 0, "
+            "delivered_count INTEGER NOT NULL DEFAULT 0, "
+            "failures INTEGER NOT NULL DEFAULT 0, "
+            "last_error TEXT, "
+            "updated_at REAL)"
+        )
+        logger.info(f"📦 Cloud outbox opened: {self.path}")
+    
+    def register_sink(
+        self,
+        name: str,
+        deliver: Callable[[List[Dict[str, Any]]], Awaitable[bool]],
+        available: Optional[Callable[[], bool]] = None
+    ):
+        """Register a delivery callable that receives a batch and returns success.
+        
+        While ``available`` returns False the worker holds off without counting failures.
+        """
+        self.sinks[name] = deliver
+        if available:
+            self._available[name] = available
+        self._wakeups[name] = asyncio.Event()
+    
+    async def start(self):
+        """Start one drain worker per registered sink."""
+        self.open()
+        
+        with self._lock:
+            # New sinks start before the oldest retained entry so nothing queued is skipped
+            for sink in self.sinks:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO sink_offsets (sink, delivered_id, updated_at) VALUES (?, 0, ?)",
+                    (sink, time.time())
+                )
+        
+        for sink in self.sinks:
+            if sink not in self._workers:
+                self._workers[sink] = asyncio.create_task(self._drain(sink))
+        
+        if not self._compactor:
+            self._compactor = asyncio.create_task(self._compact_periodically())
+    
+    async def close(self):
+        """Stop the workers; undelivered entries stay on disk."""
+        for task in [*self._workers.values(), self._compactor]:
+            if task:
+                task.cancel()
+        self._workers.clear()
+        self._compactor = None
+        
+        if self._conn:
+            self._conn.close()
+            self._conn = None
+    
+    async def enqueue(self, payload: Dict[str, Any]) -> int:
+        """Append one entry and return its outbox id."""
+        return (await self.enqueue_many([payload]))[-1]
+    
+    async def enqueue_many(self, payloads: List[Dict[str, Any]]) -> List[int]:
+        """Append entries in one transaction and wake the sink workers."""
+        self.open()
+        rows = [(json.dumps(payload, default=str), time.time()) for payload in payloads]
+        ids = await asyncio.to_thread(self._append, rows)
+        
+        for event in self._wakeups.values():
+            event.set()
+        return ids
+    
+    def _append(self, rows: List[tuple]) -> List[int]:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            ids = [self._conn.execute(
+                "INSERT INTO outbox (payload, created_at) VALUES (?, ?)", row
+            ).lastrowid for row in rows]
+            self._conn.execute("COMMIT")
+            return ids
+    
+    def _read_batch(self, sink: str) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, payload FROM outbox WHERE id > "
+                "(SELECT delivered_id FROM sink_offsets WHERE sink = ?) ORDER BY id LIMIT ?",
+                (sink, self.batch_size)
+            ).fetchall()
+    
+    def _commit_offset(self, sink: str, delivered_id: int, count: int):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sink_offsets SET delivered_id = ?, delivered_count = delivered_count + ?, "
+                "failures = 0, last_error = NULL, updated_at = ? WHERE sink = ?",
+                (delivered_id, count, time.time(), sink)
+            )
+    
+    def _record_failure(self, sink: str, error: str):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE sink_offsets SET failures = failures + 1, last_error = ?, updated_at = ? WHERE sink = ?",
+                (error[:500], time.time(), sink)
+            )
+    
+    async def _drain(self, sink: str):
+        """Deliver entries past the sink's offset in batches, backing off on failure."""
+        deliver = self.sinks[sink]
+        available = self._available.get(sink)
+        wakeup = self._wakeups[sink]
+        backoff = 1.0
+        
+        while True:
+            try:
+                if available and not available():
+                    await asyncio.sleep(1.0)
+                    continue
+                
+                rows = await asyncio.to_thread(self._read_batch, sink)
+                if not rows:
+                    wakeup.clear()
+                    try:
+                        await asyncio.wait_for(wakeup.wait(), timeout=5.0)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                
+                delivered = await deliver([json.loads(payload) for _, payload in rows])
+                if not delivered:
+                    raise RuntimeError(f"{sink} rejected batch of {len(rows)}")
+                
+                await asyncio.to_thread(self._commit_offset, sink, rows[-1][0], len(rows))
+                backoff = 1.0
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Outbox delivery to {sink} failed, retrying in {backoff:.0f}s: {e}")
+                await asyncio.to_thread(self._record_failure, sink, str(e))
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+    
+    def _compact(self) -> int:
+        """Delete entries every registered sink has already delivered."""
+        with self._lock:
+            if not self.sinks:
+                # Nobody will ever read these entries
+                return self._conn.execute("DELETE FROM outbox").rowcount
+            
+            # Only sinks that are still registered hold entries back
+            low_water = self._conn.execute(
+                f"SELECT MIN(delivered_id) FROM sink_offsets WHERE sink IN ({','.join('?' * len(self.sinks))})",
+                list(self.sinks)
+            ).fetchone()[0]
+            if low_water is None:
+                return 0
+            return self._conn.execute("DELETE FROM outbox WHERE id <= ?", (low_water,)).rowcount
+    
+    async def _compact_periodically(self):
+        while True:
+            await asyncio.sleep(60)
+            try:
+                removed = await asyncio.to_thread(self._compact)
+                if removed:
+                    logger.debug(f"🧹 Compacted {removed} delivered outbox entries")
+            except Exception as e:
+                logger.error(f"❌ Outbox compaction failed: {e}")
+    
+    def backlog(self) -> Dict[str, int]:
+        """Undelivered entries per sink (cheap enough for metric scrapes)."""
+        if not self._conn:
+            return {}
+        
+        with self._lock:
+            offsets = self._conn.execute("SELECT sink, delivered_id FROM sink_offsets").fetchall()
+            return {sink: self._pending(delivered_id) for sink, delivered_id in offsets}
+    
+    def _pending(self, delivered_id: int) -> int:
+        # Counted rather than head - offset: compaction can empty the table past an offset
+        return self._conn.execute("SELECT COUNT(*) FROM outbox WHERE id > ?", (delivered_id,)).fetchone()[0]
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get backlog size and delivery state per sink."""
+        if not self._conn:
+            return {"enabled": False, "sinks": {}}
+        
+        with self._lock:
+            head = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM outbox").fetchone()[0]
+            offsets = self._conn.execute(
+                "SELECT sink, delivered_id, delivered_count, failures, last_error FROM sink_offsets"
+            ).fetchall()
+            sinks = {}
+            for sink, delivered_id, delivered_count, failures, last_error in offsets:
+                oldest = self._conn.execute(
+                    "SELECT MIN(created_at) FROM outbox WHERE id > ?", (delivered_id,)
+                ).fetchone()[0]
+                sinks[sink] = {
+                    "backlog": self._pending(delivered_id),
+                    "delivered": delivered_count,
+                    "consecutive_failures": failures,
+                    "last_error": last_error,
+                    "oldest_pending_seconds": round(time.time() - oldest, 1) if oldest else 0.0
+                }
+        
+        return {"enabled": True, "head": head, "sinks": sinks}
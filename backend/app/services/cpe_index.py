@@ -0,0 +1,327 @@
+"""
+Inverted index from CPE vendor:product to the CVEs that affect it.
+
+Each normalized (vendor, product) key holds the exact-version criteria of
+its CVEs in a hash map and the version-range criteria in an interval tree,
+so "which CVEs affect product X version Y" is a dict lookup plus a tree walk
+that skips ranges starting above or ending below Y, instead of a scan over
+every CVE's affected products. The index is loaded from the cpe_matches
+table at startup and updated by the NVD importer as batches commit, each
+update swapping in new maps so concurrent lookups see a consistent view.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Tuple, Iterable, Set
+
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import CPEMatch
+
+logger = logging.getLogger(__name__)
+
+ProductKey = Tuple[str, str]
+VersionKey = Tuple
+
+_CPE23_SPLIT = re.compile(r"(?<!\\):")
+_VERSION_TOKEN = re.compile(r"\d+|[a-z]+")
+_ANY_VERSION = {"", "*", "-"}
+
+RANGE_FIELDS = (
+    "version_start_including", "version_start_excluding",
+    "version_end_including", "version_end_excluding"
+)
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\(.)", r"\1", value).lower()
+
+def parse_cpe(cpe: str) -> Optional[Tuple[str, str, Optional[str]]]:
+    """(vendor, product, version) of a CPE 2.3 string or 2.2 URI; version None if unspecified."""
+    cpe = (cpe or "").strip()
+    if cpe.startswith("cpe:2.3:"):
+        parts = _CPE23_SPLIT.split(cpe)
+        fields = parts[3:6]
+    elif cpe.startswith("cpe:/"):
+        fields = cpe[5:].split(":")[1:4]
+    else:
+        return None
+
+    if len(fields) < 2 or fields[0] in _ANY_VERSION or fields[1] in _ANY_VERSION:
+        return None
+    vendor, product = _unescape(fields[0]), _unescape(fields[1])
+    version = _unescape(fields[2]) if len(fields) > 2 else ""
+    return vendor, product, (None if version in _ANY_VERSION else version)
+
+def version_key(version: str) -> VersionKey:
+    """
+    Sortable key for a version string: numeric components compare as numbers
+    and sort after alphabetic ones (1.0.rc1 < 1.0.1). Orderings such as
+    1.0 vs 1.0rc1 are approximate; NVD ranges rarely depend on them.
+    """
+    return tuple(
+        (1, int(token), "") if token.isdigit() else (0, 0, token)
+        for token in _VERSION_TOKEN.findall(version.lower())
+    )
+
+def cpe_match_rows(cve_id: str, matches: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """CPEMatch rows for the vulnerable match criteria of one CVE."""
+    rows = []
+    for match in matches:
+        parsed = parse_cpe(match.get("criteria"))
+        if not parsed:
+            continue
+        vendor, product, version = parsed
+        row = {
+            "cve_id": cve_id,
+            "vendor": vendor,
+            "product": product,
+            "version": version,
+            "criteria": match["criteria"]
+        }
+        for field in RANGE_FIELDS:
+            row[field] = match.get(field)
+        rows.append(row)
+    return rows
+
+class VersionRange:
+    """Version interval of one CVE criterion; open ends are None."""
+
+    __slots__ = ("cve_id", "low", "low_inclusive", "high", "high_inclusive")
+
+    def __init__(self, cve_id: str, low, low_inclusive: bool, high, high_inclusive: bool):
+        self.cve_id = cve_id
+        self.low = low
+        self.low_inclusive = low_inclusive
+        self.high = high
+        self.high_inclusive = high_inclusive
+
+    @property
+    def sort_key(self) -> VersionKey:
+        return self.low if self.low is not None else ()
+
+    def contains(self, version: VersionKey) -> bool:
+        if self.low is not None and (version < self.low or (version == self.low and not self.low_inclusive)):
+            return False
+        if self.high is not None and (version > self.high or (version == self.high and not self.high_inclusive)):
+            return False
+        return True
+
+class ProductEntries:
+    """Exact-version map and range interval tree of one vendor:product.
+
+    The ranges, sorted by lower bound, form an implicit balanced tree: the
+    root of ranges[lo:hi] is its middle element and ``max_highs`` holds the
+    largest upper bound in each subtree, so a lookup prunes subtrees that end
+    below the version as well as those that start above it.
+    """
+
+    __slots__ = ("exact", "ranges", "lows", "max_highs")
+
+    def __init__(self, exact: Dict[VersionKey, Set[str]], ranges: List[VersionRange]):
+        self.exact = exact
+        self.ranges = sorted(ranges, key=lambda r: r.sort_key)
+        self.lows = [r.sort_key for r in self.ranges]
+        self.max_highs: List[Tuple] = [None] * len(self.ranges)
+        self._build(0, len(self.ranges))
+
+    @staticmethod
+    def _high_key(candidate: VersionRange) -> Tuple:
+        # Open upper ends sort above every bounded one
+        return (1,) if candidate.high is None else (0, candidate.high)
+
+    def _build(self, lo: int, hi: int) -> Optional[Tuple]:
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        highest = self._high_key(self.ranges[mid])
+        for child in (self._build(lo, mid), self._build(mid + 1, hi)):
+            if child is not None and child > highest:
+                highest = child
+        self.max_highs[mid] = highest
+        return highest
+
+    def match(self, version: Optional[VersionKey]) -> Set[str]:
+        if version is None:
+            # Unknown asset version: every CVE of the product may apply
+            return {cve for cves in self.exact.values() for cve in cves} | {r.cve_id for r in self.ranges}
+        matched = set(self.exact.get(version, ()))
+        floor = (0, version)
+        stack = [(0, len(self.ranges))]
+        while stack:
+            lo, hi = stack.pop()
+            if lo >= hi:
+                continue
+            mid = (lo + hi) // 2
+            if self.max_highs[mid] < floor:
+                continue  # every range in this subtree ends below the version
+            stack.append((lo, mid))
+            if self.lows[mid] > version:
+                continue  # this range and everything right of it start above
+            candidate = self.ranges[mid]
+            if candidate.contains(version):
+                matched.add(candidate.cve_id)
+            stack.append((mid + 1, hi))
+        return matched
+
+# (cve_id, vendor, product, version, start_including, start_excluding, end_including, end_excluding)
+Criterion = Tuple[str, str, str, Optional[str], Optional[str], Optional[str], Optional[str], Optional[str]]
+
+CRITERION_COLUMNS = (
+    CPEMatch.cve_id, CPEMatch.vendor, CPEMatch.product, CPEMatch.version,
+    CPEMatch.version_start_including, CPEMatch.version_start_excluding,
+    CPEMatch.version_end_including, CPEMatch.version_end_excluding
+)
+
+def criterion_from_row(row: Dict[str, Any]) -> Criterion:
+    """Compact tuple form of a CPEMatch row dict, as held by the index."""
+    return (row["cve_id"], row["vendor"], row["product"], row["version"]) + tuple(
+        row[field] for field in RANGE_FIELDS
+    )
+
+def _build_products(criteria: Iterable[Criterion]) -> Dict[ProductKey, ProductEntries]:
+    exact: Dict[ProductKey, Dict[VersionKey, Set[str]]] = defaultdict(lambda: defaultdict(set))
+    ranges: Dict[ProductKey, List[VersionRange]] = defaultdict(list)
+    for cve_id, vendor, product, version, start_inc, start_exc, end_inc, end_exc in criteria:
+        key = (vendor, product)
+        if version and not (start_inc or start_exc or end_inc or end_exc):
+            exact[key][version_key(version)].add(cve_id)
+            continue
+        low = start_inc or start_exc
+        high = end_inc or end_exc
+        ranges[key].append(VersionRange(
+            cve_id,
+            version_key(low) if low else None,
+            bool(start_inc),
+            version_key(high) if high else None,
+            bool(end_inc)
+        ))
+    return {
+        key: ProductEntries(dict(exact.get(key, {})), ranges.get(key, []))
+        for key in set(exact) | set(ranges)
+    }
+
+class CPEIndex:
+    """In-memory vendor:product -> CVE index with version intervals."""
+
+    def __init__(self):
+        self._products: Optional[Dict[ProductKey, ProductEntries]] = None
+        self._criteria_by_cve: Dict[str, List[Criterion]] = {}
+        self._cves_by_product: Dict[ProductKey, Set[str]] = {}
+        self.stats = {
+            "last_load": None,
+            "last_load_seconds": 0.0,
+            "updates": 0,
+            "lookups": 0,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self._products is not None
+
+    async def load(self):
+        """Build the index from the cpe_matches table and swap it in."""
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(*CRITERION_COLUMNS))
+            criteria = [tuple(row) for row in result.all()]
+
+        criteria_by_cve = defaultdict(list)
+        cves_by_product = defaultdict(set)
+        for criterion in criteria:
+            criteria_by_cve[criterion[0]].append(criterion)
+            cves_by_product[(criterion[1], criterion[2])].add(criterion[0])
+        products = await asyncio.to_thread(_build_products, criteria)
+
+        self._products = products
+        self._criteria_by_cve = dict(criteria_by_cve)
+        self._cves_by_product = dict(cves_by_product)
+        self.stats["last_load"] = datetime.utcnow().isoformat()
+        self.stats["last_load_seconds"] = round(time.perf_counter() - started, 3)
+        logger.info(
+            f"✅ CPE index loaded: {len(criteria)} criteria over {len(products)} products "
+            f"in {self.stats['last_load_seconds']}s"
+        )
+
+    def replace(self, criteria_by_cve: Dict[str, List[Criterion]]):
+        """Replace the criteria of the given CVEs (an empty list removes a CVE).
+
+        Lookups may run in worker threads, so the maps are updated on copies
+        that are then swapped in rather than mutated in place.
+        """
+        if self._products is None:
+            return
+
+        products = dict(self._products)
+        criteria_index = dict(self._criteria_by_cve)
+        cves_by_product = dict(self._cves_by_product)
+
+        def product_cves(key: ProductKey) -> Set[str]:
+            # Copy each touched product's set once before changing it
+            if key not in touched:
+                cves_by_product[key] = set(cves_by_product.get(key, ()))
+                touched.add(key)
+            return cves_by_product[key]
+
+        touched = set()
+        for cve_id, criteria in criteria_by_cve.items():
+            for _, vendor, product, *_ in criteria_index.pop(cve_id, ()):
+                product_cves((vendor, product)).discard(cve_id)
+            if criteria:
+                criteria_index[cve_id] = criteria
+            for _, vendor, product, *_ in criteria:
+                product_cves((vendor, product)).add(cve_id)
+
+        # Rebuild only the affected products
+        rebuilt = _build_products(
+            criterion
+            for key in touched
+            for cve_id in cves_by_product[key]
+            for criterion in criteria_index[cve_id]
+            if (criterion[1], criterion[2]) == key
+        )
+        for key in touched:
+            if key in rebuilt:
+                products[key] = rebuilt[key]
+            else:
+                products.pop(key, None)
+                cves_by_product.pop(key, None)
+
+        self._products = products
+        self._criteria_by_cve = criteria_index
+        self._cves_by_product = cves_by_product
+        self.stats["updates"] += len(criteria_by_cve)
+
+    def match(self, cpe: str) -> Optional[Set[str]]:
+        """CVE ids affecting a CPE, or None if the CPE cannot be parsed."""
+        return self.match_many([cpe])[cpe]
+
+    def match_many(self, cpes: List[str]) -> Dict[str, Optional[Set[str]]]:
+        """Match a batch of CPEs against one consistent view of the index."""
+        products = self._products or {}
+        results = {}
+        for cpe in cpes:
+            parsed = parse_cpe(cpe)
+            if not parsed:
+                results[cpe] = None
+                continue
+            vendor, product, version = parsed
+            entries = products.get((vendor, product))
+            results[cpe] = entries.match(version_key(version) if version else None) if entries else set()
+        self.stats["lookups"] += len(cpes)
+        return results
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "products": len(self._products or {}),
+            "cves": len(self._criteria_by_cve),
+            **self.stats,
+        }
+
+# Shared instance fed by the NVD importer
+cpe_index = CPEIndex()
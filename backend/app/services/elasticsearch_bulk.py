@@ -0,0 +1,145 @@
+"""
+Bulk indexing pipeline for Elasticsearch threat documents.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+import asyncio
+import time
+from datetime import datetime
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bulk item statuses worth retrying: rejected by a full queue or a transient node error
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class ElasticsearchBulkIndexer:
+    """Buffers threat documents and indexes them through the _bulk API."""
+    
+    def __init__(self, es_service):
+        self.es_service = es_service
+        self.batch_size = settings.SIEM_ELASTICSEARCH_BULK_BATCH_SIZE
+        self.flush_interval = settings.SIEM_ELASTICSEARCH_BULK_FLUSH_INTERVAL
+        self.max_retries = settings.SIEM_ELASTICSEARCH_BULK_MAX_RETRIES
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.SIEM_ELASTICSEARCH_BULK_BUFFER_SIZE)
+        self._worker: Optional[asyncio.Task] = None
+        self.stats = {
+            "documents_indexed": 0,
+            "documents_failed": 0,
+            "documents_retried": 0,
+            "bulk_requests": 0,
+            "last_flush": None
+        }
+    
+    async def start(self):
+        """Start the background bulk worker."""
+        if not self._worker:
+            self._worker = asyncio.create_task(self._run())
+            logger.info("✅ Elasticsearch bulk indexer started")
+    
+    async def close(self):
+        """Index everything still buffered and stop the worker."""
+        if not self._worker:
+            return
+        
+        await self.queue.join()
+        self._worker.cancel()
+        self._worker = None
+    
+    async def submit(self, threat_data: Dict[str, Any]) -> asyncio.Future:
+        """Buffer a document, waiting for space when the buffer is full."""
+        if not self._worker:
+            await self.start()
+        
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((self.es_service.build_document(threat_data), future))
+        return future
+    
+    async def index(self, threat_data: Dict[str, Any]) -> bool:
+        """Index one document through the bulk pipeline and wait for the outcome."""
+        return await (await self.submit(threat_data))
+    
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            try:
+                await self._index_batch(batch)
+            except Exception as e:
+                logger.error(f"❌ Elasticsearch bulk batch failed: {e}")
+                # Items already settled by an earlier attempt were counted there
+                unsettled = [future for _, future in batch if not future.done()]
+                for future in unsettled:
+                    future.set_result(False)
+                self.stats["documents_failed"] += len(unsettled)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+    
+    async def _index_batch(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]):
+        """Index a batch, retrying only the items the cluster rejected transiently."""
+        if not self.es_service.es_client:
+            if not await self.es_service.connect():
+                raise ConnectionError("Elasticsearch is not connected")
+        
+        # One daily index per batch rather than per document
+        index_name = f"{self.es_service.index_prefix}-{datetime.utcnow().strftime('%Y.%m.%d')}"
+        pending = batch
+        delay = 0.5
+        
+        for attempt in range(self.max_retries + 1):
+            operations = []
+            for doc, _ in pending:
+                operations.append({"index": {"_index": index_name}})
+                operations.append(doc)
+            
+            response = await self.es_service.es_client.bulk(operations=operations)
+            self.stats["bulk_requests"] += 1
+            
+            retry = []
+            items = response["items"]
+            for position, (doc, future) in enumerate(pending):
+                # An item missing from the response is treated as a transient failure
+                item = items[position] if position < len(items) else {}
+                result = item.get("index", {})
+                status = result.get("status", 500)
+                
+                if status < 300:
+                    self.stats["documents_indexed"] += 1
+                    future.set_result(True)
+                elif status in RETRYABLE_STATUSES and attempt < self.max_retries:
+                    retry.append((doc, future))
+                else:
+                    self.stats["documents_failed"] += 1
+                    logger.warning(f"⚠️ Elasticsearch rejected document: {result.get('error')}")
+                    future.set_result(False)
+            
+            if not retry:
+                break
+            
+            self.stats["documents_retried"] += len(retry)
+            pending = retry
+            await asyncio.sleep(delay)
+            delay *= 2
+        
+        self.stats["last_flush"] = time.time()
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get bulk indexer statistics."""
+        return {
+            "buffered_documents": self.queue.qsize(),
+            "buffer_capacity": self.queue.maxsize,
+            **self.stats
+        }
@@ -2,15 +2,17 @@
 Remote Elasticsearch Cloud integration service for KRSN-RT2I.
 """
 
-from elasticsearch import Elasticsearch
-from elasticsearch_dsl import Document, Text, Keyword, Date, Integer, Float, Boolean, connections
+from elasticsearch import AsyncElasticsearch
 from typing import Dict, Any, List, Optional
 import logging
+import asyncio
 import json
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from app.core.config import settings
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -23,9 +25,9 @@ class ElasticsearchCloudService:
         self.password = os.getenv("ELASTICSEARCH_PASSWORD", "")
         self.api_key = os.getenv("ELASTICSEARCH_API_KEY", "")
         self.index_prefix = os.getenv("ELASTICSEARCH_INDEX_PREFIX", "rtip")
-        self.es_client = None
+        self.es_client: Optional[AsyncElasticsearch] = None
         
-    def connect(self) -> bool:
+    async def connect(self) -> bool:
         """Connect to Elasticsearch Cloud."""
         try:
             logger.info("🔗 Connecting to Elasticsearch Cloud...")
@@ -39,27 +41,29 @@ class ElasticsearchCloudService:
                 # Use basic authentication
                 auth_config["basic_auth"] = (self.username, self.password)
             
-            # Create Elasticsearch client
-            self.es_client = Elasticsearch(
+            if self.es_client:
+                await self.es_client.close()
+            
+            # Create pooled async Elasticsearch client
+            self.es_client = AsyncElasticsearch(
                 hosts=self.hosts,
                 **auth_config,
                 verify_certs=True,
                 ssl_show_warn=False,
-                request_timeout=30,
+                connections_per_node=settings.SIEM_ELASTICSEARCH_CONNECTIONS_PER_NODE,
+                request_timeout=settings.SIEM_ELASTICSEARCH_REQUEST_TIMEOUT,
                 retry_on_timeout=True,
                 max_retries=3
             )
             
             # Test connection
-            if self.es_client.ping():
-                cluster_info = self.es_client.info()
+            status_client = self.es_client.options(request_timeout=settings.SIEM_ELASTICSEARCH_STATUS_TIMEOUT)
+            if await status_client.ping():
+                cluster_info = await status_client.info()
                 logger.info(f"✅ Connected to Elasticsearch Cloud")
                 logger.info(f"📊 Cluster: {cluster_info['cluster_name']}")
                 logger.info(f"🏷️ Version: {cluster_info['version']['number']}")
                 
-                # Set up default connection for elasticsearch-dsl
-                connections.add_connection('default', self.es_client)
-                
                 return True
             else:
                 logger.error("❌ Elasticsearch ping failed")
@@ -73,7 +77,7 @@ class ElasticsearchCloudService:
         """Create index template for threat intelligence data."""
         try:
             if not self.es_client:
-                if not self.connect():
+                if not await self.connect():
                     return False
             
             template_name = f"{self.index_prefix}-template"
@@ -111,7 +115,7 @@ class ElasticsearchCloudService:
             }
             
             # Create or update template
-            self.es_client.indices.put_index_template(
+            await self.es_client.indices.put_index_template(
                 name=template_name,
                 body=template_body
             )
@@ -123,32 +127,35 @@ class ElasticsearchCloudService:
             logger.error(f"❌ Failed to create index template: {e}")
             return False
     
+    def build_document(self, threat_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Map threat data onto the index template fields."""
+        return {
+            "timestamp": datetime.utcnow(),
+            "indicator_value": threat_data.get("value", ""),
+            "indicator_type": threat_data.get("type", ""),
+            "severity": threat_data.get("severity", "medium"),
+            "confidence": threat_data.get("confidence", 0.0),
+            "source": threat_data.get("source", "krsn-rt2i"),
+            "description": threat_data.get("description", ""),
+            "threat_score": threat_data.get("threat_score", 0),
+            "is_active": threat_data.get("is_active", True),
+            "metadata": threat_data.get("metadata", {})
+        }
+    
     async def index_threat_data(self, threat_data: Dict[str, Any]) -> bool:
-        """Index threat intelligence data to Elasticsearch Cloud."""
+        """Index a single document; bulk traffic should go through ElasticsearchBulkIndexer."""
         try:
             if not self.es_client:
-                if not self.connect():
+                if not await self.connect():
                     return False
             
-            # Prepare document
-            doc = {
-                "timestamp": datetime.utcnow(),
-                "indicator_value": threat_data.get("value", ""),
-                "indicator_type": threat_data.get("type", ""),
-                "severity": threat_data.get("severity", "medium"),
-                "confidence": threat_data.get("confidence", 0.0),
-                "source": threat_data.get("source", "krsn-rt2i"),
-                "description": threat_data.get("description", ""),
-                "threat_score": threat_data.get("threat_score", 0),
-                "is_active": threat_data.get("is_active", True),
-                "metadata": threat_data.get("metadata", {})
-            }
+            doc = self.build_document(threat_data)
             
             # Generate index name with date
-            index_name = f"{self.index_prefix}-{datetime.now().strftime('%Y.%m.%d')}"
+            index_name = f"{self.index_prefix}-{datetime.utcnow().strftime('%Y.%m.%d')}"
             
             # Index document
-            response = self.es_client.index(
+            response = await self.es_client.index(
                 index=index_name,
                 body=doc
             )
@@ -160,12 +167,12 @@ class ElasticsearchCloudService:
             logger.error(f"❌ Failed to index threat data: {e}")
             return False
     
-    async def search_threats(self, query: str, size: int = 100) -> List[Dict]:
-        """Search for threats in Elasticsearch Cloud."""
+    async def search_threats(self, query: str, size: int = 100) -> Optional[List[Dict]]:
+        """Search for threats in Elasticsearch Cloud; None if the search failed."""
         try:
             if not self.es_client:
-                if not self.connect():
-                    return []
+                if not await self.connect():
+                    return None
             
             # Build search query
             search_body = {
@@ -187,7 +194,7 @@ class ElasticsearchCloudService:
             
             # Execute search across all indices
             index_pattern = f"{self.index_prefix}-*"
-            response = self.es_client.search(
+            response = await self.es_client.search(
                 index=index_pattern,
                 body=search_body
             )
@@ -205,13 +212,13 @@ class ElasticsearchCloudService:
             
         except Exception as e:
             logger.error(f"❌ Elasticsearch search failed: {e}")
-            return []
+            return None
     
     async def get_threat_statistics(self) -> Dict[str, Any]:
         """Get threat intelligence statistics from Elasticsearch."""
         try:
             if not self.es_client:
-                if not self.connect():
+                if not await self.connect():
                     return {}
             
             index_pattern = f"{self.index_prefix}-*"
@@ -240,7 +247,7 @@ class ElasticsearchCloudService:
                 }
             }
             
-            response = self.es_client.search(
+            response = await self.es_client.search(
                 index=index_pattern,
                 body=agg_body
             )
@@ -275,13 +282,18 @@ class ElasticsearchCloudService:
         """Get Elasticsearch Cloud connection status."""
         try:
             if not self.es_client:
-                connected = self.connect()
+                connected = await self.connect()
             else:
-                connected = self.es_client.ping()
+                connected = await self.es_client.options(
+                    request_timeout=settings.SIEM_ELASTICSEARCH_STATUS_TIMEOUT
+                ).ping()
             
             if connected:
-                cluster_info = self.es_client.info()
-                cluster_health = self.es_client.cluster.health()
+                status_client = self.es_client.options(request_timeout=settings.SIEM_ELASTICSEARCH_STATUS_TIMEOUT)
+                cluster_info, cluster_health = await asyncio.gather(
+                    status_client.info(),
+                    status_client.cluster.health()
+                )
                 
                 return {
                     "status": "connected",
@@ -305,3 +317,9 @@ class ElasticsearchCloudService:
                 "error": str(e),
                 "timestamp": datetime.utcnow().isoformat()
             }
+    
+    async def close(self):
+        """Close the client and its connection pool."""
+        if self.es_client:
+            await self.es_client.close()
+            self.es_client = None
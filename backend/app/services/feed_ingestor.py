@@ -4,10 +4,22 @@ Integrates with cloud services for threat data distribution.
 """
 
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 import logging
+import hashlib
+import json
+import time
 import httpx
 import asyncio
+from apscheduler.triggers.interval import IntervalTrigger
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.metrics import FEED_RECORDS, FEED_RUNS
+from app.db.database import AsyncSessionLocal
+from app.db.models import Feed
+from app.crud.crud_feed import get_feed_checkpoint, get_feed_checkpoints, save_feed_checkpoint
+from app.services.activity_feed import activity_feed
 
 logger = logging.getLogger(__name__)
 
@@ -21,28 +33,156 @@ class FeedIngestor:
                 "name": "AbuseIPDB",
                 "url": "https://api.abuseipdb.com/api/v2/blacklist",
                 "type": "ip_blacklist",
-                "active": True
+                "active": True,
+                "update_frequency": 60
             },
             {
                 "name": "CISA KEV",
                 "url": "https://www.cisa.gov/sites/default/files/feeds/known_exploited_vulnerabilities.json",
                 "type": "vulnerability",
-                "active": True
+                "active": True,
+                "update_frequency": 360
             },
             {
                 "name": "Sample Threat Feed",
                 "url": None,
                 "type": "sample",
-                "active": True
+                "active": True,
+                "update_frequency": 60
             }
         ]
         self.ingestion_stats = {
             "total_threats_processed": 0,
             "cloud_submissions": 0,
             "last_ingestion": None,
-            "errors": 0
+            "errors": 0,
+            "feeds": {}
+        }
+        self.scheduler = None
+        # Per-feed scheduling state, keyed by feed name
+        self.feed_schedule: Dict[str, Dict[str, Any]] = {
+            feed["name"]: self._new_schedule_state(feed) for feed in self.feeds
+        }
+    
+    def _new_schedule_state(self, feed: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the initial scheduling state for a feed."""
+        return {
+            "base_frequency": feed.get("update_frequency", settings.FEED_UPDATE_INTERVAL),
+            "backoff_factor": 1,
+            "unchanged_runs": 0,
+            "fingerprint": None,
+            "last_run": None,
+            "last_duration_seconds": None
         }
     
+    def _job_id(self, feed_name: str) -> str:
+        return f"feed_ingestion:{feed_name}"
+    
+    def _build_trigger(self, feed_name: str) -> IntervalTrigger:
+        state = self.feed_schedule[feed_name]
+        return IntervalTrigger(
+            minutes=state["base_frequency"] * state["backoff_factor"],
+            jitter=settings.FEED_SCHEDULE_JITTER_SECONDS
+        )
+    
+    async def load_feed_frequencies(self):
+        """Load update frequencies from the feeds table, registering unknown feeds."""
+        try:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(Feed))
+                rows = {row.name: row for row in result.scalars().all()}
+                
+                for feed in self.feeds:
+                    row = rows.get(feed["name"])
+                    if row is None:
+                        db.add(Feed(
+                            name=feed["name"],
+                            url=feed["url"],
+                            feed_type=feed["type"],
+                            is_active=feed["active"],
+                            update_frequency=feed["update_frequency"]
+                        ))
+                        continue
+                    
+                    feed["active"] = bool(row.is_active)
+                    if row.update_frequency:
+                        feed["update_frequency"] = row.update_frequency
+                        self.feed_schedule[feed["name"]]["base_frequency"] = row.update_frequency
+                
+                await db.commit()
+            logger.info("📋 Feed update frequencies loaded")
+        except Exception as e:
+            logger.error(f"❌ Failed to load feed frequencies, using defaults: {e}")
+    
+    def schedule_feeds(self, scheduler):
+        """Register one non-overlapping job per active feed on the scheduler."""
+        self.scheduler = scheduler
+        
+        for feed in self.feeds:
+            if not feed.get("active", False):
+                continue
+            
+            scheduler.add_job(
+                self.run_feed,
+                self._build_trigger(feed["name"]),
+                args=[feed["name"]],
+                id=self._job_id(feed["name"]),
+                name=f"Threat Feed Ingestion: {feed['name']}",
+                max_instances=1,
+                coalesce=True,
+                replace_existing=True
+            )
+        
+        logger.info(f"⏰ Scheduled {len([f for f in self.feeds if f.get('active', False)])} feed jobs")
+    
+    async def run_feed(self, feed_name: str):
+        """Run ingestion for a single feed and adapt its schedule."""
+        feed = next((f for f in self.feeds if f["name"] == feed_name), None)
+        if not feed or not feed.get("active", False):
+            return
+        
+        threats_processed = await self._ingest_feed(feed)
+        self.ingestion_stats["total_threats_processed"] += threats_processed
+        self.ingestion_stats["last_ingestion"] = datetime.utcnow().isoformat()
+        self._reschedule_feed(feed_name)
+        
+        if threats_processed:
+            try:
+                await activity_feed.record(
+                    "feed_update", f"{feed_name} feed updated ({threats_processed} records)"
+                )
+            except Exception as e:
+                logger.warning(f"⚠️ Could not record feed activity: {e}")
+    
+    def _reschedule_feed(self, feed_name: str):
+        """Apply the current backoff factor to the feed's scheduled job."""
+        if not self.scheduler:
+            return
+        
+        job = self.scheduler.get_job(self._job_id(feed_name))
+        if not job:
+            return
+        
+        interval = self.feed_schedule[feed_name]["base_frequency"] * self.feed_schedule[feed_name]["backoff_factor"]
+        if job.trigger.interval.total_seconds() != interval * 60:
+            self.scheduler.reschedule_job(job.id, trigger=self._build_trigger(feed_name))
+            logger.info(f"⏱️ Rescheduled feed {feed_name} to every {interval} minutes")
+    
+    def _record_feed_run(self, feed_name: str, digest: str, duration: float):
+        """Track run duration and back off when the feed returned unchanged data."""
+        state = self.feed_schedule.setdefault(feed_name, self._new_schedule_state({}))
+        
+        if digest == state["fingerprint"]:
+            state["unchanged_runs"] += 1
+            state["backoff_factor"] = min(state["backoff_factor"] * 2, settings.FEED_MAX_BACKOFF_FACTOR)
+        else:
+            state["unchanged_runs"] = 0
+            state["backoff_factor"] = 1
+        
+        state["fingerprint"] = digest
+        state["last_run"] = datetime.utcnow().isoformat()
+        state["last_duration_seconds"] = round(duration, 3)
+    
     async def run_ingestion_cycle(self):
         """Run a complete ingestion cycle for all active feeds."""
         logger.info("🔄 Starting feed ingestion cycle...")
@@ -71,31 +211,174 @@ class FeedIngestor:
         
         try:
             threats_processed = 0
+            started = time.monotonic()
+            
+            # In a real implementation, make HTTP request to feed URL
+            # For now, simulate threat data ingestion
+            sample_threats = await self._simulate_threat_data(feed)
+            fingerprint = self._fingerprint(sample_threats)
+            
+            checkpoint = await self._load_checkpoint(feed["name"])
+            source_latest = max(
+                (ts for ts in (self._item_timestamp(t) for t in sample_threats) if ts),
+                default=None
+            )
+            
+            if checkpoint and not checkpoint.cycle_complete and checkpoint.cycle_fingerprint == fingerprint:
+                # Resume an interrupted cycle from the last committed batch
+                start_index = checkpoint.item_index or 0
+                logger.info(f"⏩ Resuming {feed['name']} at item {start_index}")
+            else:
+                start_index = 0
             
-            if feed["url"]:
-                # In a real implementation, make HTTP request to feed URL
-                # For now, simulate threat data ingestion
-                sample_threats = await self._simulate_threat_data(feed)
-                threats_processed = len(sample_threats)
+            # The committed watermark only moves when a cycle completes, so a resumed
+            # cycle filters to the same item list that item_index was counted against
+            watermark = checkpoint.watermark if checkpoint else None
+            if watermark:
+                # Only items newer than the committed watermark are new work
+                sample_threats = [
+                    t for t in sample_threats
+                    if (self._item_timestamp(t) or datetime.max) > watermark
+                ]
+            cycle_latest = max(
+                (ts for ts in (self._item_timestamp(t) for t in sample_threats) if ts),
+                default=None
+            )
+            
+            progress = self.ingestion_stats["feeds"].setdefault(feed["name"], self._new_progress())
+            progress["source_latest_at"] = source_latest
+            progress["watermark"] = watermark
+            
+            batch_size = settings.FEED_INGESTION_BATCH_SIZE
+            for batch_start in range(start_index, len(sample_threats), batch_size):
+                batch = sample_threats[batch_start:batch_start + batch_size]
                 
                 # Send threats to cloud services if available
-                if self.cloud_service and sample_threats:
-                    await self._send_threats_to_cloud(sample_threats, feed["name"])
-            else:
-                # Generate sample threat data for testing
-                sample_threats = await self._simulate_threat_data(feed)
-                threats_processed = len(sample_threats)
+                if self.cloud_service and batch:
+                    progress["cloud_submissions"] += await self._send_threats_to_cloud(batch, feed["name"])
+                
+                threats_processed += len(batch)
+                progress["total_records"] += len(batch)
+                FEED_RECORDS.labels(feed["name"]).inc(len(batch))
+                
+                elapsed = time.monotonic() - started
+                progress["records_per_second"] = round(threats_processed / elapsed, 2) if elapsed > 0 else 0.0
                 
-                if self.cloud_service and sample_threats:
-                    await self._send_threats_to_cloud(sample_threats, feed["name"])
+                await self._save_checkpoint(feed["name"], progress, {
+                    "cycle_fingerprint": fingerprint,
+                    "cycle_complete": False,
+                    "item_index": batch_start + len(batch),
+                    **({"cycle_started_at": datetime.utcnow()} if batch_start == start_index == 0 else {})
+                })
             
+            # Every filtered item has now been processed, including any before a resume
+            if cycle_latest and (not watermark or cycle_latest > watermark):
+                progress["watermark"] = cycle_latest
+            await self._save_checkpoint(feed["name"], progress, {
+                "cycle_fingerprint": fingerprint,
+                "cycle_complete": True,
+                "item_index": 0
+            })
+            
+            self._record_feed_run(feed["name"], fingerprint, time.monotonic() - started)
+            FEED_RUNS.labels(feed["name"], "success").inc()
             logger.info(f"✅ Successfully ingested {threats_processed} threats from {feed['name']}")
             return threats_processed
             
         except Exception as e:
+            progress = self.ingestion_stats["feeds"].setdefault(feed["name"], self._new_progress())
+            progress["errors"] += 1
+            FEED_RUNS.labels(feed["name"], "error").inc()
+            await self._save_checkpoint(feed["name"], progress, {})
             logger.error(f"❌ Failed to ingest feed {feed['name']}: {e}")
             return 0
     
+    def _new_progress(self) -> Dict[str, Any]:
+        return {
+            "total_records": 0,
+            "cloud_submissions": 0,
+            "errors": 0,
+            "records_per_second": 0.0,
+            "watermark": None,
+            "source_latest_at": None
+        }
+    
+    def _fingerprint(self, threats: List[Dict[str, Any]]) -> str:
+        """Digest of the indicator content of a feed payload."""
+        return hashlib.sha256(json.dumps(
+            sorted((t.get("value"), t.get("type"), t.get("severity")) for t in threats),
+            default=str
+        ).encode()).hexdigest()
+    
+    def _item_timestamp(self, threat: Dict[str, Any]) -> Optional[datetime]:
+        """Source timestamp of a feed item as naive UTC, if it carries one."""
+        value = (threat.get("metadata") or {}).get("detection_time") or threat.get("last_seen")
+        if not value:
+            return None
+        if not isinstance(value, datetime):
+            try:
+                # fromisoformat() only accepts a "Z" suffix from Python 3.11
+                value = datetime.fromisoformat(value[:-1] + "+00:00" if value.endswith("Z") else value)
+            except (TypeError, ValueError):
+                return None
+        # Watermarks are stored naive; aware and naive datetimes do not compare
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    
+    async def _load_checkpoint(self, feed_name: str):
+        try:
+            async with AsyncSessionLocal() as db:
+                return await get_feed_checkpoint(db, feed_name)
+        except Exception as e:
+            logger.error(f"❌ Failed to load checkpoint for {feed_name}: {e}")
+            return None
+    
+    async def _save_checkpoint(self, feed_name: str, progress: Dict[str, Any], cycle: Dict[str, Any]):
+        try:
+            async with AsyncSessionLocal() as db:
+                await save_feed_checkpoint(db, feed_name, {
+                    **cycle,
+                    "watermark": progress["watermark"],
+                    "source_latest_at": progress["source_latest_at"],
+                    "total_records": progress["total_records"],
+                    "cloud_submissions": progress["cloud_submissions"],
+                    "errors": progress["errors"],
+                    "records_per_second": progress["records_per_second"]
+                })
+        except Exception as e:
+            logger.error(f"❌ Failed to save checkpoint for {feed_name}: {e}")
+    
+    async def restore_state(self):
+        """Restore ingestion statistics from persisted feed checkpoints."""
+        try:
+            async with AsyncSessionLocal() as db:
+                checkpoints = await get_feed_checkpoints(db)
+        except Exception as e:
+            logger.error(f"❌ Failed to restore ingestion state: {e}")
+            return
+        
+        for checkpoint in checkpoints:
+            self.ingestion_stats["feeds"][checkpoint.feed_name] = {
+                "total_records": checkpoint.total_records or 0,
+                "cloud_submissions": checkpoint.cloud_submissions or 0,
+                "errors": checkpoint.errors or 0,
+                "records_per_second": checkpoint.records_per_second or 0.0,
+                "watermark": checkpoint.watermark,
+                "source_latest_at": checkpoint.source_latest_at
+            }
+            self.ingestion_stats["total_threats_processed"] += checkpoint.total_records or 0
+            self.ingestion_stats["cloud_submissions"] += checkpoint.cloud_submissions or 0
+            self.ingestion_stats["errors"] += checkpoint.errors or 0
+            
+            if checkpoint.updated_at and (
+                not self.ingestion_stats["last_ingestion"]
+                or checkpoint.updated_at.isoformat() > self.ingestion_stats["last_ingestion"]
+            ):
+                self.ingestion_stats["last_ingestion"] = checkpoint.updated_at.isoformat()
+        
+        logger.info(f"♻️ Restored ingestion state for {len(checkpoints)} feeds")
+    
     async def _simulate_threat_data(self, feed: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate sample threat data for testing purposes."""
         await asyncio.sleep(0.1)  # Simulate processing time
@@ -155,30 +438,61 @@ class FeedIngestor:
                 }
             ]
     
-    async def _send_threats_to_cloud(self, threats: List[Dict[str, Any]], feed_name: str):
-        """Send threat data to cloud services."""
+    async def _send_threats_to_cloud(self, threats: List[Dict[str, Any]], feed_name: str) -> int:
+        """Send threat data to cloud services and return the number delivered."""
         if not self.cloud_service:
-            return
+            return 0
         
+        submitted = 0
         try:
-            for threat in threats:
-                result = await self.cloud_service.send_threat_intelligence(threat)
+            results = await self.cloud_service.send_threat_batch(threats)
+            for threat, result in zip(threats, results):
                 if result.get("overall_success", False):
-                    self.ingestion_stats["cloud_submissions"] += 1
+                    submitted += 1
                     logger.debug(f"☁️ Threat sent to cloud: {threat.get('value', 'Unknown')}")
                 else:
                     logger.warning(f"⚠️ Failed to send threat to cloud: {result}")
         except Exception as e:
             logger.error(f"❌ Error sending threats to cloud from {feed_name}: {e}")
+        
+        self.ingestion_stats["cloud_submissions"] += submitted
+        return submitted
     
     async def get_feed_status(self) -> Dict[str, Any]:
         """Get the status of all feeds."""
+        schedule = {}
+        for name, state in self.feed_schedule.items():
+            job = self.scheduler.get_job(self._job_id(name)) if self.scheduler else None
+            schedule[name] = {
+                "interval_minutes": state["base_frequency"] * state["backoff_factor"],
+                "base_frequency": state["base_frequency"],
+                "backoff_factor": state["backoff_factor"],
+                "unchanged_runs": state["unchanged_runs"],
+                "last_run": state["last_run"],
+                "last_duration_seconds": state["last_duration_seconds"],
+                "next_run": job.next_run_time.isoformat() if job and job.next_run_time else None
+            }
+        
+        progress = {}
+        for name, feed_progress in self.ingestion_stats["feeds"].items():
+            watermark = feed_progress.get("watermark")
+            source_latest = feed_progress.get("source_latest_at")
+            progress[name] = {
+                "total_records": feed_progress["total_records"],
+                "records_per_second": feed_progress["records_per_second"],
+                "watermark": watermark.isoformat() if watermark else None,
+                "lag_seconds": max((source_latest - watermark).total_seconds(), 0.0)
+                if watermark and source_latest else None
+            }
+        
         return {
             "total_feeds": len(self.feeds),
             "active_feeds": len([f for f in self.feeds if f.get("active", False)]),
             "last_run": self.ingestion_stats.get("last_ingestion"),
             "statistics": self.ingestion_stats,
             "feeds": self.feeds,
+            "schedule": schedule,
+            "progress": progress,
             "cloud_integration": self.cloud_service is not None
         }
     
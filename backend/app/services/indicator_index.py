@@ -0,0 +1,474 @@
+"""
+In-memory indicator match index for sub-millisecond threat lookups.
+
+Built from active ThreatIndicator rows and kept current from updated_at
+deltas. Lookups never touch the database:
+
+- exact values (IPs, hashes, emails, domains, URLs) in a hash map
+- IPv4/IPv6 networks in a binary radix tree (longest-prefix containment)
+- domains in a reversed-label trie (parent-domain matches)
+- URLs by normalized prefix at path-segment boundaries
+"""
+
+import asyncio
+import ipaddress
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.crud.crud_threat import normalize_indicator
+from app.db.database import AsyncSessionLocal
+from app.db.models import ThreatIndicator
+
+logger = logging.getLogger(__name__)
+
+# Re-read a little before the watermark: timestamps may be second-precision
+# (SQLite CURRENT_TIMESTAMP) and re-applying a row is idempotent
+DELTA_OVERLAP = timedelta(seconds=1)
+
+INDEX_COLUMNS = (
+    ThreatIndicator.id,
+    ThreatIndicator.value,
+    ThreatIndicator.type,
+    ThreatIndicator.severity,
+    ThreatIndicator.confidence,
+    ThreatIndicator.source,
+    ThreatIndicator.first_seen,
+    ThreatIndicator.last_seen,
+    ThreatIndicator.is_active,
+    ThreatIndicator.extra_metadata,
+    ThreatIndicator.updated_at,
+)
+
+def entry_from_row(row) -> Dict[str, Any]:
+    """Detach the fields needed for match results from a row or ORM object."""
+    return {
+        "id": row.id,
+        "value": row.value,
+        "type": row.type,
+        "severity": row.severity,
+        "confidence": row.confidence,
+        "source": row.source,
+        "first_seen": row.first_seen,
+        "last_seen": row.last_seen,
+        "extra_metadata": row.extra_metadata or {},
+    }
+
+class IPRadixTree:
+    """Binary radix tree over IP network prefixes; nodes are [zero, one, entry, owner].
+
+    copy() is O(1): the copy shares every node and copies a node the first
+    time it changes one (nodes it owns carry its owner token).
+    """
+
+    def __init__(self):
+        self._owner = object()
+        self._roots = {4: self._new_node(), 6: self._new_node()}
+        self.size = 0
+
+    def copy(self) -> "IPRadixTree":
+        clone = IPRadixTree.__new__(IPRadixTree)
+        clone._owner = object()
+        clone._roots = dict(self._roots)
+        clone.size = self.size
+        return clone
+
+    def _new_node(self) -> list:
+        return [None, None, None, self._owner]
+
+    def _own(self, node: list) -> list:
+        return node if node[3] is self._owner else [node[0], node[1], node[2], self._owner]
+
+    def _path(self, network, create: bool) -> Optional[list]:
+        """Owned node for network's prefix (path-copied), or None if absent and not create."""
+        node = self._roots[network.version] = self._own(self._roots[network.version])
+        bits = int(network.network_address)
+        width = network.max_prefixlen
+        for depth in range(network.prefixlen):
+            bit = (bits >> (width - 1 - depth)) & 1
+            child = node[bit]
+            if child is None:
+                if not create:
+                    return None
+                child = self._new_node()
+            else:
+                child = self._own(child)
+            node[bit] = child
+            node = child
+        return node
+
+    def insert(self, network, entry: Dict[str, Any]):
+        node = self._path(network, create=True)
+        if node[2] is None:
+            self.size += 1
+        node[2] = entry
+
+    def remove(self, network, indicator_id: int):
+        node = self._path(network, create=False)
+        if node is not None and node[2] is not None and node[2]["id"] == indicator_id:
+            node[2] = None
+            self.size -= 1
+
+    def longest_match(self, address) -> Optional[Dict[str, Any]]:
+        node = self._roots[address.version]
+        bits = int(address)
+        width = address.max_prefixlen
+        best = node[2]
+        for depth in range(width):
+            node = node[(bits >> (width - 1 - depth)) & 1]
+            if node is None:
+                break
+            if node[2] is not None:
+                best = node[2]
+        return best
+
+class DomainTrie:
+    """Trie keyed by reversed domain labels (com -> evil -> www); copy() works like IPRadixTree's."""
+
+    ENTRY = "\0"
+    OWNER = "\1"
+
+    def __init__(self):
+        self._owner = object()
+        self._root: Dict[str, Any] = {self.OWNER: self._owner}
+        self.size = 0
+
+    def copy(self) -> "DomainTrie":
+        clone = DomainTrie.__new__(DomainTrie)
+        clone._owner = object()
+        clone._root = self._root
+        clone.size = self.size
+        return clone
+
+    def _own(self, node: Dict[str, Any]) -> Dict[str, Any]:
+        if node[self.OWNER] is self._owner:
+            return node
+        node = dict(node)
+        node[self.OWNER] = self._owner
+        return node
+
+    def _path(self, domain: str, create: bool) -> Optional[Dict[str, Any]]:
+        node = self._root = self._own(self._root)
+        for label in reversed(domain.split(".")):
+            child = node.get(label)
+            if child is None:
+                if not create:
+                    return None
+                child = {self.OWNER: self._owner}
+            else:
+                child = self._own(child)
+            node[label] = child
+            node = child
+        return node
+
+    def insert(self, domain: str, entry: Dict[str, Any]):
+        node = self._path(domain, create=True)
+        if self.ENTRY not in node:
+            self.size += 1
+        node[self.ENTRY] = entry
+
+    def remove(self, domain: str, indicator_id: int):
+        node = self._path(domain, create=False)
+        if node is None:
+            return
+        if node.get(self.ENTRY, {}).get("id") == indicator_id:
+            del node[self.ENTRY]
+            self.size -= 1
+
+    def longest_match(self, domain: str) -> Optional[Dict[str, Any]]:
+        node = self._root
+        best = None
+        for label in reversed(domain.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            best = node.get(self.ENTRY, best)
+        return best
+
+class IndexSnapshot:
+    """One consistent generation of the match structures.
+
+    A snapshot readers can see is never modified: changes are applied to a
+    copy() which then replaces it.
+    """
+
+    def __init__(self):
+        self.exact: Dict[str, Dict[str, Any]] = {}
+        self.networks = IPRadixTree()
+        self.domains = DomainTrie()
+        self.url_prefixes: Dict[str, Dict[str, Any]] = {}
+        # indicator id -> (normalized key, entry), so updates can drop the old value
+        self.entries: Dict[int, Tuple[str, Dict[str, Any]]] = {}
+        # normalized key -> ids of every indicator sharing it (e.g. "Evil.com" and "evil.com")
+        self.owners: Dict[str, FrozenSet[int]] = {}
+
+    def copy(self) -> "IndexSnapshot":
+        """A new snapshot sharing this one's contents; changing it leaves this one intact."""
+        clone = IndexSnapshot.__new__(IndexSnapshot)
+        clone.exact = dict(self.exact)
+        clone.networks = self.networks.copy()
+        clone.domains = self.domains.copy()
+        clone.url_prefixes = dict(self.url_prefixes)
+        clone.entries = dict(self.entries)
+        clone.owners = dict(self.owners)
+        return clone
+
+    def add(self, entry: Dict[str, Any]):
+        key = normalize_indicator(entry["value"])
+        self.remove(entry["id"])
+        self.entries[entry["id"]] = (key, entry)
+        self.owners[key] = self.owners.get(key, frozenset()) | {entry["id"]}
+        self._insert(key, entry)
+
+    def _insert(self, key: str, entry: Dict[str, Any]):
+        network = _parse_network(key)
+        if network is not None:
+            self.networks.insert(network, entry)
+            return
+
+        current = self.exact.get(key)
+        if current is None or (entry["confidence"] or 0) >= (current["confidence"] or 0):
+            self.exact[key] = entry
+        if "://" in key:
+            self.url_prefixes[key.rstrip("/")] = entry
+        elif "." in key and "@" not in key and "/" not in key:
+            self.domains.insert(key, entry)
+
+    def remove(self, indicator_id: int):
+        key, _ = self.entries.pop(indicator_id, (None, None))
+        if key is None:
+            return
+
+        owners = self.owners[key] - {indicator_id}
+        if owners:
+            self.owners[key] = owners
+        else:
+            del self.owners[key]
+
+        network = _parse_network(key)
+        if network is not None:
+            self.networks.remove(network, indicator_id)
+        else:
+            if self.exact.get(key, {}).get("id") == indicator_id:
+                del self.exact[key]
+            if self.url_prefixes.get(key.rstrip("/"), {}).get("id") == indicator_id:
+                del self.url_prefixes[key.rstrip("/")]
+            elif "://" not in key:
+                self.domains.remove(key, indicator_id)
+
+        # Hand the key back to the remaining owners, most confident last so it wins
+        remaining = sorted((self.entries[owner][1] for owner in owners), key=lambda e: e["confidence"] or 0)
+        for entry in remaining:
+            self._insert(key, entry)
+
+    def match(self, indicator: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        key = normalize_indicator(indicator)
+        entry = self.exact.get(key)
+        if entry is not None:
+            return entry, "exact"
+
+        try:
+            address = ipaddress.ip_address(key)
+        except ValueError:
+            address = None
+        if address is not None:
+            entry = self.networks.longest_match(address)
+            return (entry, "cidr") if entry else (None, None)
+
+        if "://" in key:
+            entry = self._match_url_prefix(key)
+            if entry is not None:
+                return entry, "url_prefix"
+            host = key.split("://", 1)[1].split("/", 1)[0].split(":", 1)[0]
+        elif "/" in key or "@" in key:
+            return None, None
+        else:
+            host = key
+
+        entry = self.domains.longest_match(host) if "." in host else None
+        return (entry, "domain_suffix") if entry else (None, None)
+
+    def _match_url_prefix(self, url: str) -> Optional[Dict[str, Any]]:
+        """Longest stored URL that prefixes url at a path-segment boundary."""
+        base = url.split("?", 1)[0].split("#", 1)[0].rstrip("/")
+        scheme, rest = base.split("://", 1)
+        segments = rest.split("/")
+        for end in range(len(segments), 0, -1):
+            entry = self.url_prefixes.get(f"{scheme}://{'/'.join(segments[:end])}")
+            if entry is not None:
+                return entry
+        return None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "indicators": len(self.entries),
+            "exact_values": len(self.exact),
+            "networks": self.networks.size,
+            "domains": self.domains.size,
+            "url_prefixes": len(self.url_prefixes),
+        }
+
+def _parse_network(key: str):
+    """Return an ip_network for CIDR keys (not single addresses)."""
+    if "/" not in key or "://" in key:
+        return None
+    try:
+        network = ipaddress.ip_network(key, strict=False)
+    except ValueError:
+        return None
+    return network if network.prefixlen < network.max_prefixlen else None
+
+def _build_snapshot(entries: List[Dict[str, Any]]) -> IndexSnapshot:
+    snapshot = IndexSnapshot()
+    for entry in entries:
+        snapshot.add(entry)
+    return snapshot
+
+class IndicatorMatchIndex:
+    """Atomically swapped in-memory index over active threat indicators."""
+
+    def __init__(self):
+        self._snapshot: Optional[IndexSnapshot] = None
+        self._watermark: Optional[datetime] = None
+        self._lock = asyncio.Lock()
+        self.generation = 0
+        self._listeners = []
+        self.stats = {
+            "last_rebuild": None,
+            "last_rebuild_seconds": 0.0,
+            "last_refresh": None,
+            "deltas_applied": 0,
+            "lookups": 0,
+        }
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def network_tree(self) -> IPRadixTree:
+        """CIDR radix tree of the current snapshot; entries carry the indicator id."""
+        return self._snapshot.networks
+
+    def add_listener(self, callback):
+        """Register callback(index) to run after every rebuild or applied change."""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        self.generation += 1
+        for callback in self._listeners:
+            try:
+                callback(self)
+            except Exception as e:
+                logger.error(f"❌ Indicator index listener failed: {e}")
+
+    def entries(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """(normalized key, entry) pairs of the current snapshot."""
+        return list(self._snapshot.entries.values()) if self._snapshot else []
+
+    async def rebuild(self):
+        """Full rebuild from the database, built off-loop and swapped in."""
+        async with self._lock:
+            started = time.perf_counter()
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(*INDEX_COLUMNS).where(ThreatIndicator.is_active == True)
+                )
+                rows = result.all()
+
+            entries = [entry_from_row(row) for row in rows]
+            watermark = max((row.updated_at for row in rows if row.updated_at), default=None)
+            snapshot = await asyncio.to_thread(_build_snapshot, entries)
+
+            self._snapshot = snapshot
+            self._watermark = watermark
+            self.stats["last_rebuild"] = datetime.utcnow().isoformat()
+            self.stats["last_rebuild_seconds"] = round(time.perf_counter() - started, 3)
+            logger.info(
+                f"✅ Indicator index rebuilt: {len(entries)} indicators "
+                f"in {self.stats['last_rebuild_seconds']}s"
+            )
+        self._notify()
+
+    async def refresh(self):
+        """Apply rows changed since the last watermark; falls back to a full rebuild."""
+        if self._snapshot is None or self._watermark is None:
+            await self.rebuild()
+            return
+
+        async with self._lock:
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(
+                    select(*INDEX_COLUMNS).where(
+                        ThreatIndicator.updated_at >= self._watermark - DELTA_OVERLAP
+                    )
+                )
+                rows = result.all()
+
+            self.stats["last_refresh"] = datetime.utcnow().isoformat()
+            if not rows:
+                return
+
+            if len(rows) > settings.INDICATOR_INDEX_MAX_DELTA:
+                changed = None
+            else:
+                # Applied to a copy and swapped in: readers holding the old snapshot are unaffected
+                snapshot = self._snapshot.copy()
+                changed = 0
+                for row in rows:
+                    current = snapshot.entries.get(row.id)
+                    if row.is_active:
+                        entry = entry_from_row(row)
+                        if current is None or current[1] != entry:
+                            snapshot.add(entry)
+                            changed += 1
+                    elif current is not None:
+                        snapshot.remove(row.id)
+                        changed += 1
+                if changed:
+                    self._snapshot = snapshot
+                # Database timestamps only: the app and database clocks may disagree
+                self._watermark = max(
+                    (row.updated_at for row in rows if row.updated_at), default=self._watermark
+                )
+                self.stats["deltas_applied"] += changed
+
+        if changed is None:
+            await self.rebuild()
+        elif changed:
+            logger.debug(f"🔄 Indicator index applied {changed} changes")
+            self._notify()
+
+    def remove(self, indicator_id: int):
+        """Drop a deleted indicator immediately (hard deletes leave no delta row)."""
+        if self._snapshot is not None and indicator_id in self._snapshot.entries:
+            snapshot = self._snapshot.copy()
+            snapshot.remove(indicator_id)
+            self._snapshot = snapshot
+            self._notify()
+
+    def match(self, indicator: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Match one indicator; returns (entry, match_type) or (None, None)."""
+        self.stats["lookups"] += 1
+        return self._snapshot.match(indicator)
+
+    def match_many(self, indicators: List[str]) -> Dict[str, Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        snapshot = self._snapshot
+        self.stats["lookups"] += len(indicators)
+        return {indicator: snapshot.match(indicator) for indicator in indicators}
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "generation": self.generation,
+            "watermark": self._watermark.isoformat() if self._watermark else None,
+            **(self._snapshot.get_stats() if self._snapshot else {}),
+            **self.stats,
+        }
+
+# Shared instance used by the API and the scheduler
+indicator_index = IndicatorMatchIndex()
@@ -0,0 +1,152 @@
+"""
+Event loop watchdog for finding blocking calls.
+
+A heartbeat callback reschedules itself on the event loop every interval
+and a watchdog thread checks how overdue it is. When the loop has not run
+the heartbeat for longer than the threshold, some callback is blocking it:
+the watchdog reads the loop thread's current stack, which still points at
+the offender, and records it in a ring buffer. The loop-side cost is one
+short timer callback per interval; nothing wraps or times individual
+callbacks.
+"""
+
+from typing import Dict, Any, List, Optional
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+from app.core.metrics import LOOP_STALLS, LOOP_STALL_DURATION
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+STACK_LIMIT = 40
+
+def _is_project_frame(filename: str) -> bool:
+    return filename.startswith(PROJECT_ROOT) and "site-packages" not in filename
+
+def _format_frame(frame: traceback.FrameSummary) -> str:
+    return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+class LoopWatchdog:
+    """Detects event loop stalls and captures the stack of the blocking callback."""
+
+    def __init__(
+        self,
+        interval_ms: Optional[int] = None,
+        threshold_ms: Optional[int] = None,
+        ring_size: Optional[int] = None
+    ):
+        self.interval = (interval_ms or settings.LOOP_WATCHDOG_INTERVAL_MS) / 1000
+        self.threshold = (threshold_ms or settings.LOOP_WATCHDOG_THRESHOLD_MS) / 1000
+        self.stalls: deque = deque(maxlen=ring_size or settings.LOOP_WATCHDOG_RING_SIZE)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._handle: Optional[asyncio.TimerHandle] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._expected = 0.0  # perf_counter time the next heartbeat is due
+        self._current: Optional[Dict[str, Any]] = None  # stall in progress
+        self.stats = {
+            "stalls": 0,
+            "last_lag_ms": 0.0,
+            "max_lag_ms": 0.0
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start watching ``loop``; must be called from the loop's thread."""
+        if self.running:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._expected = time.perf_counter() + self.interval
+        self._handle = self._loop.call_later(self.interval, self._beat)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(
+            f"✅ Event loop watchdog started ({self.threshold * 1000:.0f}ms threshold)"
+        )
+
+    def stop(self):
+        self._stop.set()
+        if self._handle:
+            self._handle.cancel()
+            self._handle = None
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _beat(self):
+        """Heartbeat on the loop: measure how late it ran and close any open stall."""
+        now = time.perf_counter()
+        lag = max(0.0, now - self._expected)
+        with self._lock:
+            stall, self._current = self._current, None
+            self._expected = now + self.interval
+        if stall is not None:
+            stall["lag_ms"] = round(lag * 1000, 1)
+            stall["ongoing"] = False
+            LOOP_STALL_DURATION.observe(lag)
+
+        lag_ms = lag * 1000
+        self.stats["last_lag_ms"] = round(lag_ms, 1)
+        if lag_ms > self.stats["max_lag_ms"]:
+            self.stats["max_lag_ms"] = round(lag_ms, 1)
+        self._handle = self._loop.call_later(self.interval, self._beat)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                if self._current is not None or time.perf_counter() - self._expected < self.threshold:
+                    continue
+                stall = self._current = self._capture()
+            self.stalls.append(stall)
+            self.stats["stalls"] += 1
+            LOOP_STALLS.inc()
+            logger.warning(f"⚠️ Event loop blocked in {stall['offender']}")
+
+    def _capture(self) -> Dict[str, Any]:
+        """Snapshot the loop thread's stack while it is still blocked."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack: List[traceback.FrameSummary] = traceback.extract_stack(frame)[-STACK_LIMIT:] if frame else []
+        offender = next((f for f in reversed(stack) if _is_project_frame(f.filename)), stack[-1] if stack else None)
+        return {
+            "detected_at": datetime.utcnow().isoformat(),
+            "lag_ms": None,  # Filled in when the loop resumes
+            "ongoing": True,
+            "offender": _format_frame(offender) if offender else "unknown",
+            "stack": [
+                f"{_format_frame(f)}: {f.line}" if f.line else _format_frame(f)
+                for f in stack
+            ]
+        }
+
+    def get_stalls(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Recorded stalls, newest first."""
+        stalls = list(self.stalls)[::-1]
+        return stalls[:limit] if limit else stalls
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "recorded": len(self.stalls),
+            **self.stats
+        }
+
+# Shared watchdog; started in the application lifespan
+loop_watchdog = LoopWatchdog()
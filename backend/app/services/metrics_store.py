@@ -0,0 +1,203 @@
+"""
+Persistent, downsampled storage for system metrics.
+
+Samples buffered by the monitoring sampler are flushed periodically: the
+raw rows go out in one batched insert and are rolled up in memory into
+1-minute, 1-hour and 1-day min/avg/max buckets, which are merged into their
+tier tables in the same transaction. Each tier has its own retention and is
+purged in committed batches. Range queries read the finest tier that still
+covers the requested start and fits the point budget, so long ranges never
+scan raw rows.
+"""
+
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
+import logging
+import numpy as np
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.crud.crud_metric import (
+    insert_metric_samples, merge_metric_rollups, purge_metrics_before, get_metric_series
+)
+from app.services.monitoring import SAMPLE_FIELDS, system_monitor
+
+logger = logging.getLogger(__name__)
+
+METRIC_UNITS = {
+    "cpu_usage": "percent",
+    "memory_usage": "percent",
+    "disk_usage": "percent",
+    "net_sent_bytes_per_sec": "bytes/s",
+    "net_recv_bytes_per_sec": "bytes/s",
+    "loop_lag_ms": "ms"
+}
+
+# Rollup tier -> bucket width in seconds
+ROLLUP_RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+TIERS = ("raw",) + tuple(ROLLUP_RESOLUTIONS)
+
+def _aggregate(name: str, timestamps: np.ndarray, values: np.ndarray, resolution: int) -> List[Dict[str, Any]]:
+    """Bucket time-ordered samples into rollup rows (UTC-aligned buckets)."""
+    buckets = np.floor(timestamps / resolution) * resolution
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, buckets.size])
+    sums = np.add.reduceat(values, starts)
+    mins = np.minimum.reduceat(values, starts)
+    maxs = np.maximum.reduceat(values, starts)
+    return [
+        {
+            "metric_name": name,
+            "bucket": datetime.utcfromtimestamp(buckets[start]),
+            "sample_count": int(count),
+            "value_sum": float(total),
+            "value_min": float(low),
+            "value_max": float(high)
+        }
+        for start, count, total, low, high in zip(starts, counts, sums, mins, maxs)
+    ]
+
+class MetricsStore:
+    """Flushes sampled system metrics to the database and serves range queries."""
+
+    def __init__(self, sampler):
+        self.sampler = sampler
+        self.max_points = settings.SYSTEM_METRICS_MAX_POINTS
+        self._flushed_until = 0.0  # Timestamp of the newest sample already persisted
+        self.stats = {
+            "flushes": 0,
+            "samples_written": 0,
+            "last_flush": None,
+            "last_purge": None,
+            "last_purged": {}
+        }
+
+    def retention(self, tier: str) -> timedelta:
+        if tier == "raw":
+            return timedelta(hours=settings.SYSTEM_METRICS_RAW_RETENTION_HOURS)
+        return timedelta(days={
+            "1m": settings.SYSTEM_METRICS_1M_RETENTION_DAYS,
+            "1h": settings.SYSTEM_METRICS_1H_RETENTION_DAYS,
+            "1d": settings.SYSTEM_METRICS_1D_RETENTION_DAYS
+        }[tier])
+
+    def resolution(self, tier: str) -> float:
+        return self.sampler.interval if tier == "raw" else ROLLUP_RESOLUTIONS[tier]
+
+    async def flush(self) -> int:
+        """Persist samples taken since the last flush with their rollups, in one transaction."""
+        snapshot = self.sampler.ring.snapshot()
+        new = snapshot["timestamp"] > self._flushed_until
+        timestamps = snapshot["timestamp"][new]
+        if not timestamps.size:
+            return 0
+
+        raw_rows: List[Dict[str, Any]] = []
+        rollups: Dict[str, List[Dict[str, Any]]] = {tier: [] for tier in ROLLUP_RESOLUTIONS}
+        for name in SAMPLE_FIELDS:
+            values = snapshot[name][new]
+            valid = ~np.isnan(values)
+            if not valid.any():
+                continue
+            sample_times, sample_values = timestamps[valid], values[valid]
+            unit = METRIC_UNITS.get(name)
+            raw_rows.extend(
+                {
+                    "metric_name": name,
+                    "metric_value": float(value),
+                    "metric_unit": unit,
+                    "timestamp": datetime.utcfromtimestamp(ts)
+                }
+                for ts, value in zip(sample_times, sample_values)
+            )
+            for tier, resolution in ROLLUP_RESOLUTIONS.items():
+                rollups[tier].extend(_aggregate(name, sample_times, sample_values, resolution))
+
+        async with AsyncSessionLocal() as db:
+            await insert_metric_samples(db, raw_rows)
+            for tier, rows in rollups.items():
+                await merge_metric_rollups(db, tier, rows)
+            await db.commit()
+
+        self._flushed_until = float(timestamps[-1])
+        self.stats["flushes"] += 1
+        self.stats["samples_written"] += len(raw_rows)
+        self.stats["last_flush"] = datetime.utcnow().isoformat()
+        logger.debug(f"📊 Persisted {len(raw_rows)} system metric samples")
+        return len(raw_rows)
+
+    async def purge(self) -> Dict[str, int]:
+        """Drop raw samples and rollup buckets past their tier's retention."""
+        now = datetime.utcnow()
+        removed = {}
+        try:
+            async with AsyncSessionLocal() as db:
+                for tier in TIERS:
+                    removed[tier] = await purge_metrics_before(
+                        db, tier, now - self.retention(tier), settings.SYSTEM_METRICS_PURGE_BATCH_SIZE
+                    )
+        except Exception as e:
+            logger.error(f"❌ System metrics purge failed: {e}")
+        self.stats["last_purge"] = now.isoformat()
+        self.stats["last_purged"] = removed
+        if any(removed.values()):
+            logger.info(f"🧹 Purged system metrics: {removed}")
+        return removed
+
+    def select_tier(self, start: datetime, end: datetime) -> str:
+        """Finest tier whose retention covers ``start`` and whose points fit the budget."""
+        now = datetime.utcnow()
+        span = (end - start).total_seconds()
+        for tier in TIERS:
+            if start >= now - self.retention(tier) and span / self.resolution(tier) <= self.max_points:
+                return tier
+        return TIERS[-1]
+
+    async def query(
+        self,
+        metric_names: List[str],
+        start: datetime,
+        end: datetime,
+        tier: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Min/avg/max series per metric from the selected (or given) tier."""
+        tier = tier or self.select_tier(start, end)
+        query_start = start
+        if tier != "raw":
+            # Include the bucket that contains ``start``
+            resolution = ROLLUP_RESOLUTIONS[tier]
+            epoch = (start - datetime(1970, 1, 1)).total_seconds()
+            query_start = datetime.utcfromtimestamp(epoch - epoch % resolution)
+
+        async with AsyncSessionLocal() as db:
+            rows = await get_metric_series(db, tier, metric_names, query_start, end)
+
+        series = {
+            name: {"unit": METRIC_UNITS.get(name), "timestamps": [], "min": [], "avg": [], "max": [], "samples": []}
+            for name in metric_names
+        }
+        for name, timestamp, low, avg, high, samples in rows:
+            points = series[name]
+            points["timestamps"].append(timestamp.isoformat())
+            points["min"].append(round(low, 3))
+            points["avg"].append(round(avg, 3))
+            points["max"].append(round(high, 3))
+            points["samples"].append(samples)
+
+        return {
+            "tier": tier,
+            "resolution_seconds": self.resolution(tier),
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "series": series
+        }
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "retention": {tier: str(self.retention(tier)) for tier in TIERS},
+            "flushed_until": datetime.utcfromtimestamp(self._flushed_until).isoformat() if self._flushed_until else None,
+            **self.stats
+        }
+
+# Shared store fed from the system monitor's sampler
+metrics_store = MetricsStore(system_monitor.sampler)
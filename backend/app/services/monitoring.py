@@ -1,27 +1,219 @@
 """
 System monitoring service for tracking platform health.
+
+A background sampler thread reads psutil at a fixed interval into
+fixed-size NumPy ring buffers, so health and metrics endpoints only copy
+the latest snapshot and never block the event loop on psutil calls.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 import asyncio
+import threading
+import time
+import numpy as np
 import psutil
 from datetime import datetime
 
+from app.core.config import settings
+from app.core.metrics import SYSTEM_RESOURCE_USAGE, EVENT_LOOP_LAG
+
 logger = logging.getLogger(__name__)
 
+SAMPLE_FIELDS = (
+    "cpu_usage",
+    "memory_usage",
+    "disk_usage",
+    "net_sent_bytes_per_sec",
+    "net_recv_bytes_per_sec",
+    "loop_lag_ms"
+)
+
+class MetricsRing:
+    """Fixed-size ring of timestamped samples, one NumPy array per field.
+
+    Once full, each append overwrites the oldest row, so readers copy under
+    the same lock the writer holds rather than racing it for that slot.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.values = {field: np.zeros(capacity, dtype=np.float64) for field in SAMPLE_FIELDS}
+        self.count = 0  # Total samples written
+        self._lock = threading.Lock()
+
+    def append(self, timestamp: float, sample: Dict[str, float]):
+        with self._lock:
+            slot = self.count % self.capacity
+            self.timestamps[slot] = timestamp
+            for field, array in self.values.items():
+                array[slot] = sample.get(field, np.nan)
+            self.count += 1
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            count = self.count
+            if not count:
+                return None
+            slot = (count - 1) % self.capacity
+            return {
+                "timestamp": float(self.timestamps[slot]),
+                **{field: float(array[slot]) for field, array in self.values.items()}
+            }
+
+    def snapshot(self, seconds: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Copies of the buffered samples, oldest first, optionally only the last N seconds."""
+        with self._lock:
+            count = self.count
+            size = min(count, self.capacity)
+            order = (np.arange(count - size, count) % self.capacity) if size else np.arange(0)
+            # Fancy indexing copies, so the arrays are stable once the lock is released
+            timestamps = self.timestamps[order]
+            values = {field: array[order] for field, array in self.values.items()}
+        keep = timestamps >= time.time() - seconds if seconds else slice(None)
+        return {
+            "timestamp": timestamps[keep],
+            **{field: column[keep] for field, column in values.items()}
+        }
+
+class MetricsSampler:
+    """Daemon thread sampling psutil and event-loop lag into a MetricsRing."""
+
+    def __init__(self, interval: Optional[float] = None, capacity: Optional[int] = None):
+        self.interval = interval or settings.SYSTEM_METRICS_INTERVAL_SECONDS
+        self.ring = MetricsRing(capacity or settings.SYSTEM_METRICS_RING_SIZE)
+        self.details: Dict[str, Any] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._last_net = None
+        self._loop_lag_ms = np.nan
+        self._probe_pending = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start sampling; loop lag is measured on ``loop`` when given."""
+        if self.running:
+            return
+        self._loop = loop
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="metrics-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ System metrics sampler started ({self.interval}s interval)")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        # The first cpu_percent(None) call only sets the baseline; take the
+        # first real sample soon so health checks have data shortly after startup
+        psutil.cpu_percent(interval=None)
+        delay = min(1.0, self.interval)
+        while not self._stop.wait(delay):
+            delay = self.interval
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error(f"❌ Metrics sample failed: {e}")
+
+    def _probe_loop(self):
+        """Post a callback to the event loop; the delay until it runs is the loop lag."""
+        if self._loop is None or self._loop.is_closed() or self._probe_pending:
+            return
+        posted = time.perf_counter()
+
+        def probe():
+            self._loop_lag_ms = (time.perf_counter() - posted) * 1000
+            self._probe_pending = False
+
+        self._probe_pending = True
+        try:
+            self._loop.call_soon_threadsafe(probe)
+        except RuntimeError:
+            self._probe_pending = False
+
+    def _sample(self):
+        now = time.time()
+        memory = psutil.virtual_memory()
+        disk = psutil.disk_usage('.')
+        network = psutil.net_io_counters()
+
+        sent_rate = recv_rate = np.nan
+        if network and self._last_net:
+            last_time, last_network = self._last_net
+            elapsed = now - last_time
+            if elapsed > 0:
+                sent_rate = (network.bytes_sent - last_network.bytes_sent) / elapsed
+                recv_rate = (network.bytes_recv - last_network.bytes_recv) / elapsed
+        self._last_net = (now, network) if network else None
+
+        # A probe still pending after a whole interval means the loop is stalled at least that long
+        loop_lag = self._loop_lag_ms
+        if self._probe_pending:
+            loop_lag = max(loop_lag if not np.isnan(loop_lag) else 0.0, self.interval * 1000)
+
+        self.ring.append(now, {
+            "cpu_usage": psutil.cpu_percent(interval=None),
+            "memory_usage": memory.percent,
+            "disk_usage": disk.used / disk.total * 100 if disk.total else 0.0,
+            "net_sent_bytes_per_sec": sent_rate,
+            "net_recv_bytes_per_sec": recv_rate,
+            "loop_lag_ms": loop_lag
+        })
+        self.details = {
+            "timestamp": datetime.utcfromtimestamp(now).isoformat(),
+            "cpu_count": psutil.cpu_count(),
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "used": memory.used,
+                "usage_percent": memory.percent
+            },
+            "disk": {
+                "total": disk.total,
+                "used": disk.used,
+                "free": disk.free,
+                "usage_percent": disk.used / disk.total * 100 if disk.total else 0.0
+            },
+            "network": {
+                "bytes_sent": network.bytes_sent,
+                "bytes_recv": network.bytes_recv,
+                "packets_sent": network.packets_sent,
+                "packets_recv": network.packets_recv
+            } if network else {"error": "Network stats unavailable"},
+            "processes": len(psutil.pids())
+        }
+        self._probe_loop()
+
 class SystemMonitor:
     """Service for monitoring system health and performance."""
     
     def __init__(self):
+        self.sampler = MetricsSampler()
         self.metrics = {
             "cpu_usage": 0.0,
             "memory_usage": 0.0,
             "disk_usage": 0.0,
+            "loop_lag_ms": 0.0,
             "network_active": True,
-            "database_status": "healthy"
+            "database_status": "healthy",
+            "sampled_at": None
         }
     
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        """Start the background sampler."""
+        self.sampler.start(loop)
+    
+    def stop(self):
+        self.sampler.stop()
+    
     async def run_monitoring_cycle(self):
         """Run system monitoring cycle."""
         logger.info("📊 Running system monitoring cycle...")
@@ -34,25 +226,16 @@ class SystemMonitor:
             logger.error(f"❌ System monitoring failed: {e}")
     
     async def _collect_metrics(self):
-        """Collect system performance metrics."""
-        try:
-            # CPU metrics
-            self.metrics["cpu_usage"] = psutil.cpu_percent(interval=1)
-            
-            # Memory metrics
-            memory = psutil.virtual_memory()
-            self.metrics["memory_usage"] = memory.percent
-            
-            # Disk metrics
-            disk = psutil.disk_usage('.')
-            self.metrics["disk_usage"] = (disk.used / disk.total) * 100
-            
-            # Network status
-            self.metrics["network_active"] = True  # Simplified check
-            
-            logger.info("📈 System metrics collected")
-        except Exception as e:
-            logger.error(f"❌ Failed to collect metrics: {e}")
+        """Refresh metrics from the sampler's latest sample (no blocking calls)."""
+        latest = self.sampler.ring.latest()
+        if not latest:
+            return
+        
+        for field in ("cpu_usage", "memory_usage", "disk_usage", "loop_lag_ms"):
+            value = latest[field]
+            self.metrics[field] = 0.0 if np.isnan(value) else round(value, 2)
+        self.metrics["network_active"] = not np.isnan(latest["net_recv_bytes_per_sec"])
+        self.metrics["sampled_at"] = datetime.utcfromtimestamp(latest["timestamp"]).isoformat()
     
     async def _check_system_health(self):
         """Check overall system health."""
@@ -65,9 +248,13 @@ class SystemMonitor:
         
         if self.metrics["disk_usage"] > 90:
             logger.warning("⚠️ High disk usage detected")
+        
+        if self.metrics["loop_lag_ms"] > 500:
+            logger.warning("⚠️ High event loop lag detected")
     
     async def get_system_health_summary(self) -> Dict[str, Any]:
         """Get comprehensive system health summary."""
+        await self._collect_metrics()
         
         # Determine overall health status
         health_score = 100
@@ -90,7 +277,45 @@ class SystemMonitor:
         return {
             "overall_health": overall_health,
             "health_score": health_score,
-            "metrics": self.metrics,
+            "metrics": dict(self.metrics),
             "timestamp": datetime.utcnow().isoformat(),
             "alerts": []  # Would contain active system alerts
         }
+    
+    def _resource_samples(self):
+        latest = self.sampler.ring.latest()
+        if latest:
+            for field, resource in (("cpu_usage", "cpu"), ("memory_usage", "memory"), ("disk_usage", "disk")):
+                yield (resource,), latest[field]
+    
+    def _loop_lag_samples(self):
+        latest = self.sampler.ring.latest()
+        if latest and not np.isnan(latest["loop_lag_ms"]):
+            yield (), latest["loop_lag_ms"] / 1000
+    
+    def get_history(self, seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Buffered samples with min/avg/max per field."""
+        snapshot = self.sampler.ring.snapshot(seconds)
+        summary = {}
+        for field in SAMPLE_FIELDS:
+            values = snapshot[field][~np.isnan(snapshot[field])]
+            summary[field] = {
+                "min": float(values.min()),
+                "avg": float(values.mean()),
+                "max": float(values.max())
+            } if values.size else None
+        return {
+            "interval_seconds": self.sampler.interval,
+            "samples": int(snapshot["timestamp"].size),
+            "timestamps": [datetime.utcfromtimestamp(ts).isoformat() for ts in snapshot["timestamp"]],
+            "series": {
+                field: [None if np.isnan(value) else round(float(value), 3) for value in snapshot[field]]
+                for field in SAMPLE_FIELDS
+            },
+            "summary": summary
+        }
+
+# Shared monitor; its sampler is started in the application lifespan
+system_monitor = SystemMonitor()
+SYSTEM_RESOURCE_USAGE.add_source(system_monitor._resource_samples)
+EVENT_LOOP_LAG.add_source(system_monitor._loop_lag_samples)
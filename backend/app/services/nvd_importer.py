@@ -0,0 +1,454 @@
+"""
+Streaming importer for NVD CVE data.
+
+Reads NVD JSON (the 2.0 REST API pages or the 1.1 yearly feed files, gzipped
+or not) incrementally: items are decoded one at a time out of the enclosing
+array, so memory stays bounded by the batch size instead of the feed size.
+Records are normalized, their CVSS scores mapped to severities in one
+vectorized call per batch, and written with batched ``INSERT ... ON CONFLICT``
+upserts; their vulnerable CPE criteria go to cpe_matches and the CPE index.
+Progress and the "modified since" watermark are kept in the ``nvd`` feed
+checkpoint.
+"""
+
+import asyncio
+import gzip
+import json
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, AsyncIterator
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import FEED_RECORDS, FEED_RUNS
+from app.db.database import AsyncSessionLocal
+from app.crud.crud_cve import (
+    bulk_upsert_cves, get_cve_modified_dates, replace_cpe_matches, _calculate_severities_from_cvss
+)
+from app.crud.crud_feed import get_feed_checkpoint, save_feed_checkpoint
+from app.services.cpe_index import cpe_index, cpe_match_rows, criterion_from_row
+
+logger = logging.getLogger(__name__)
+
+FEED_NAME = "nvd"
+READ_CHUNK_SIZE = 1 << 20
+# The NVD API rejects lastModified ranges longer than 120 days
+API_MAX_WINDOW_DAYS = 120
+
+_ARRAY_START = re.compile(r'"(?:CVE_Items|vulnerabilities)"\s*:\s*\[')
+# NVD match range keys -> CPEMatch columns
+_RANGE_KEYS = {
+    "versionStartIncluding": "version_start_including",
+    "versionStartExcluding": "version_start_excluding",
+    "versionEndIncluding": "version_end_including",
+    "versionEndExcluding": "version_end_excluding",
+}
+_TOTAL_RESULTS = re.compile(r'"(?:totalResults|CVE_data_numberOfCVEs)"\s*:\s*"?(\d+)')
+
+class NVDStreamParser:
+    """Incrementally decodes the items of the CVE array in an NVD JSON document."""
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._in_array = False
+        self.done = False
+        self.total_results: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Add text and return every item that is now complete."""
+        self._buffer += chunk
+        if not self._in_array:
+            match = _ARRAY_START.search(self._buffer)
+            if not match:
+                return []
+            header = _TOTAL_RESULTS.search(self._buffer, 0, match.start())
+            if header:
+                self.total_results = int(header.group(1))
+            self._buffer = self._buffer[match.end():]
+            self._in_array = True
+
+        items = []
+        buffer = self._buffer
+        position = 0
+        while not self.done:
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                self.done = True
+                break
+            try:
+                item, position = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Item continues in the next chunk
+                break
+            items.append(item)
+
+        self._buffer = buffer[position:]
+        return items
+
+    def close(self):
+        """Raise if the document ended in the middle of the array."""
+        if self._in_array and not self.done:
+            raise ValueError("NVD document ended before the end of the CVE array")
+
+def _parse_nvd_date(value: Optional[str]) -> Optional[datetime]:
+    """NVD timestamps as naive UTC datetimes."""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def _english(entries: List[Dict[str, Any]]) -> Optional[str]:
+    for entry in entries or []:
+        if entry.get("lang") == "en":
+            return entry.get("value")
+    return (entries or [{}])[0].get("value")
+
+def _unique(values) -> List[str]:
+    return list(dict.fromkeys(value for value in values if value))
+
+def _iter_cpe_matches(nodes: List[Dict[str, Any]]):
+    """Flatten configuration nodes (1.1 nests children, 2.0 nests nodes)."""
+    for node in nodes or []:
+        yield from node.get("cpeMatch") or node.get("cpe_match") or []
+        yield from _iter_cpe_matches(node.get("children"))
+
+def parse_nvd_item(item: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Normalize an NVD 2.0 or 1.1 CVE item into CVEData columns (severity excluded)."""
+    cve = item.get("cve", item)
+
+    if "CVE_data_meta" in cve:
+        # 1.1 feed layout
+        cve_id = cve["CVE_data_meta"].get("ID")
+        description = _english(cve.get("description", {}).get("description_data"))
+        references = [ref.get("url") for ref in cve.get("references", {}).get("reference_data", [])]
+        weaknesses = [
+            entry.get("value")
+            for problem in cve.get("problemtype", {}).get("problemtype_data", [])
+            for entry in problem.get("description", [])
+        ]
+        nodes = item.get("configurations", {}).get("nodes", [])
+        impact = item.get("impact", {})
+        cvss_score = impact.get("baseMetricV3", {}).get("cvssV3", {}).get("baseScore")
+        if cvss_score is None:
+            cvss_score = impact.get("baseMetricV2", {}).get("cvssV2", {}).get("baseScore")
+        published = item.get("publishedDate")
+        modified = item.get("lastModifiedDate")
+        rejected = (description or "").startswith("** REJECT **")
+    else:
+        # 2.0 API layout
+        cve_id = cve.get("id")
+        description = _english(cve.get("descriptions"))
+        references = [ref.get("url") for ref in cve.get("references", [])]
+        weaknesses = [
+            entry.get("value")
+            for weakness in cve.get("weaknesses", [])
+            for entry in weakness.get("description", [])
+        ]
+        nodes = [
+            node
+            for configuration in cve.get("configurations", [])
+            for node in configuration.get("nodes", [])
+        ]
+        metrics = cve.get("metrics", {})
+        cvss_score = None
+        for version in ("cvssMetricV40", "cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+            entries = metrics.get(version) or []
+            primary = next((m for m in entries if m.get("type") == "Primary"), entries[0] if entries else None)
+            if primary:
+                cvss_score = primary.get("cvssData", {}).get("baseScore")
+                break
+        published = cve.get("published")
+        modified = cve.get("lastModified")
+        rejected = cve.get("vulnStatus") == "Rejected"
+
+    if not cve_id:
+        return None
+
+    cpe_matches = [
+        {
+            "criteria": match.get("criteria") or match.get("cpe23Uri"),
+            **{column: match.get(key) for key, column in _RANGE_KEYS.items()}
+        }
+        for match in _iter_cpe_matches(nodes)
+        if match.get("vulnerable", True) and (match.get("criteria") or match.get("cpe23Uri"))
+    ]
+
+    return {
+        "id": cve_id,
+        "description": description,
+        "cvss_score": cvss_score,
+        "published_date": _parse_nvd_date(published),
+        "modified_date": _parse_nvd_date(modified),
+        "references": _unique(references),
+        "affected_products": _unique(match["criteria"] for match in cpe_matches),
+        "cpe_matches": cpe_matches,
+        "tags": _unique(weakness for weakness in weaknesses if weakness and weakness.startswith("CWE-")),
+        "is_active": not rejected,
+    }
+
+def _is_stale(record: Dict[str, Any], stored: Optional[datetime]) -> bool:
+    """Whether bulk_upsert_cves would skip ``record`` over a row modified at ``stored``."""
+    return stored is not None and record["modified_date"] is not None and stored >= record["modified_date"]
+
+class NVDImporter:
+    """Imports NVD feeds into cve_data in batched upserts with progress tracking."""
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size or settings.NVD_IMPORT_BATCH_SIZE
+        self._lock = asyncio.Lock()
+        self.progress = self._new_progress(None)
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _new_progress(self, source: Optional[str]) -> Dict[str, Any]:
+        return {
+            "status": "idle",
+            "source": source,
+            "modified_since": None,
+            "started_at": None,
+            "finished_at": None,
+            "records_read": 0,
+            "records_written": 0,
+            "records_skipped": 0,
+            "total_expected": None,
+            "bytes_read": 0,
+            "records_per_second": 0.0,
+            "watermark": None,
+            "last_error": None
+        }
+
+    async def get_watermark(self) -> Optional[datetime]:
+        """Newest NVD modification time already imported."""
+        async with AsyncSessionLocal() as db:
+            checkpoint = await get_feed_checkpoint(db, FEED_NAME)
+        return checkpoint.watermark if checkpoint else None
+
+    async def import_file(self, path: str, modified_since: Optional[datetime] = None) -> Dict[str, Any]:
+        """Import an NVD JSON feed file (``.json`` or ``.json.gz``)."""
+        return await self._run(f"file:{path}", self._iter_file_items(path), modified_since, None)
+
+    async def import_api(self, modified_since: Optional[datetime] = None) -> Dict[str, Any]:
+        """Import from the NVD API, all CVEs or only those modified since a time."""
+        window_end = datetime.utcnow()
+        return await self._run(
+            "api", self._iter_api_items(modified_since, window_end), modified_since, window_end
+        )
+
+    async def run_incremental(self) -> Dict[str, Any]:
+        """Import everything modified since the stored watermark (scheduled job)."""
+        if self.running:
+            logger.info("⏭️ NVD import already running, skipping incremental update")
+            return self.get_status()
+        return await self.import_api(await self.get_watermark())
+
+    async def _iter_file_items(self, path: str) -> AsyncIterator[Dict[str, Any]]:
+        opener = gzip.open if path.endswith(".gz") else open
+        parser = NVDStreamParser()
+
+        def read_items(handle):
+            chunk = handle.read(READ_CHUNK_SIZE)
+            return len(chunk), (parser.feed(chunk) if chunk else None)
+
+        with opener(path, "rt", encoding="utf-8") as handle:
+            while True:
+                size, items = await asyncio.to_thread(read_items, handle)
+                if items is None:
+                    break
+                self.progress["bytes_read"] += size
+                self.progress["total_expected"] = parser.total_results
+                for item in items:
+                    yield item
+        parser.close()
+
+    async def _iter_api_items(
+        self,
+        modified_since: Optional[datetime],
+        window_end: datetime
+    ) -> AsyncIterator[Dict[str, Any]]:
+        headers = {"apiKey": settings.NVD_API_KEY} if settings.NVD_API_KEY else {}
+        # Public rate limits: 5 requests / 30s without a key, 50 with one
+        page_delay = 0.6 if settings.NVD_API_KEY else 6.0
+
+        windows = [(None, None)]
+        if modified_since:
+            windows = []
+            start = modified_since
+            while start < window_end:
+                end = min(start + timedelta(days=API_MAX_WINDOW_DAYS), window_end)
+                windows.append((start, end))
+                start = end
+
+        expected = 0
+        async with httpx.AsyncClient(timeout=settings.NVD_API_TIMEOUT, headers=headers) as client:
+            for start, end in windows:
+                start_index = 0
+                while True:
+                    params = {"startIndex": start_index, "resultsPerPage": settings.NVD_API_PAGE_SIZE}
+                    if start:
+                        params["lastModStartDate"] = start.isoformat(timespec="milliseconds") + "Z"
+                        params["lastModEndDate"] = end.isoformat(timespec="milliseconds") + "Z"
+
+                    parser = NVDStreamParser()
+                    page_items = 0
+                    async with client.stream("GET", settings.NVD_API_URL, params=params) as response:
+                        response.raise_for_status()
+                        async for chunk in response.aiter_text():
+                            self.progress["bytes_read"] += len(chunk)
+                            for item in await asyncio.to_thread(parser.feed, chunk):
+                                page_items += 1
+                                yield item
+                            if parser.total_results is not None and start_index == 0:
+                                self.progress["total_expected"] = expected + parser.total_results
+                    parser.close()
+
+                    total = parser.total_results or 0
+                    start_index += page_items
+                    if not page_items or start_index >= total:
+                        expected += total
+                        break
+                    await asyncio.sleep(page_delay)
+
+    async def _run(
+        self,
+        source: str,
+        items: AsyncIterator[Dict[str, Any]],
+        modified_since: Optional[datetime],
+        window_end: Optional[datetime]
+    ) -> Dict[str, Any]:
+        if self.running:
+            raise RuntimeError("An NVD import is already running")
+
+        async with self._lock:
+            previous = await self.get_watermark()
+            progress = self.progress = self._new_progress(source)
+            progress.update({
+                "status": "running",
+                "modified_since": modified_since.isoformat() if modified_since else None,
+                "started_at": datetime.utcnow().isoformat(),
+                "watermark": previous.isoformat() if previous else None
+            })
+            started = time.monotonic()
+            newest = previous
+            logger.info(f"📥 NVD import started from {source}")
+
+            try:
+                batch: Dict[str, Dict[str, Any]] = {}
+                async for item in items:
+                    progress["records_read"] += 1
+                    record = parse_nvd_item(item)
+                    if not record or (
+                        modified_since and record["modified_date"] and record["modified_date"] <= modified_since
+                    ):
+                        progress["records_skipped"] += 1
+                        continue
+
+                    # Keep one row per id so a statement never updates a row twice
+                    current = batch.get(record["id"])
+                    if not current or (record["modified_date"] or datetime.min) >= (current["modified_date"] or datetime.min):
+                        batch[record["id"]] = record
+                    if record["modified_date"] and (not newest or record["modified_date"] > newest):
+                        newest = record["modified_date"]
+
+                    if len(batch) >= self.batch_size:
+                        await self._flush(list(batch.values()), progress, started, newest)
+                        batch = {}
+
+                await self._flush(list(batch.values()), progress, started, newest)
+
+                # An API window is complete up to the time it was requested
+                watermark = max(filter(None, [newest, window_end]), default=None)
+                async with AsyncSessionLocal() as db:
+                    await save_feed_checkpoint(db, FEED_NAME, {
+                        "cycle_complete": True,
+                        "item_index": 0,
+                        "watermark": watermark,
+                        "total_records": progress["records_written"]
+                    })
+                progress["watermark"] = watermark.isoformat() if watermark else None
+                progress["status"] = "completed"
+                FEED_RUNS.labels(FEED_NAME, "success").inc()
+                logger.info(
+                    f"✅ NVD import completed - {progress['records_written']} CVEs written, "
+                    f"{progress['records_skipped']} skipped ({progress['records_per_second']} records/s)"
+                )
+            except Exception as e:
+                progress["status"] = "failed"
+                FEED_RUNS.labels(FEED_NAME, "error").inc()
+                progress["last_error"] = str(e)
+                logger.error(f"❌ NVD import from {source} failed: {e}")
+                raise
+            finally:
+                progress["finished_at"] = datetime.utcnow().isoformat()
+
+        return self.get_status()
+
+    async def _flush(
+        self,
+        batch: List[Dict[str, Any]],
+        progress: Dict[str, Any],
+        started: float,
+        newest: Optional[datetime]
+    ):
+        """Upsert one batch and record progress in the same transaction."""
+        if not batch:
+            return
+
+        severities = _calculate_severities_from_cvss([record["cvss_score"] for record in batch])
+        for record, severity in zip(batch, severities):
+            record["severity"] = severity
+
+        elapsed = time.monotonic() - started
+        async with AsyncSessionLocal() as db:
+            # The upsert skips records not newer than the stored row; keep that row's criteria too
+            stored = await get_cve_modified_dates(db, [record["id"] for record in batch])
+            fresh = [record for record in batch if not _is_stale(record, stored.get(record["id"]))]
+            stale, batch = len(batch) - len(fresh), fresh
+            cpe_rows = {
+                record["id"]: cpe_match_rows(record["id"], record["cpe_matches"]) if record["is_active"] else []
+                for record in batch
+            }
+            written = progress["records_written"] + len(batch)
+
+            await bulk_upsert_cves(db, batch)
+            await replace_cpe_matches(db, cpe_rows)
+            # The watermark only advances once the whole import has completed
+            await save_feed_checkpoint(db, FEED_NAME, {
+                "cycle_complete": False,
+                "item_index": progress["records_read"],
+                "source_latest_at": newest,
+                "total_records": written,
+                "records_per_second": round(written / elapsed, 2) if elapsed > 0 else 0.0
+            })
+
+        cpe_index.replace({
+            cve_id: [criterion_from_row(row) for row in rows]
+            for cve_id, rows in cpe_rows.items()
+        })
+        progress["records_skipped"] += stale
+        FEED_RECORDS.labels(FEED_NAME).inc(len(batch))
+        progress["records_written"] = written
+        progress["records_per_second"] = round(written / elapsed, 2) if elapsed > 0 else 0.0
+        logger.info(f"📦 NVD import: {written} CVEs written ({progress['records_per_second']} records/s)")
+
+    def get_status(self) -> Dict[str, Any]:
+        """Current or last import progress."""
+        status = dict(self.progress)
+        expected = status["total_expected"]
+        status["percent_complete"] = (
+            round(min(100.0, status["records_read"] / expected * 100), 1) if expected else None
+        )
+        return status
+
+# Shared importer used by the API and the scheduler
+nvd_importer = NVDImporter()
@@ -0,0 +1,198 @@
+"""
+Response cache for polled dashboard endpoints.
+"""
+
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from collections import OrderedDict, defaultdict
+import logging
+import asyncio
+import hashlib
+import json
+import time
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+from app.core.metrics import CACHE_REQUESTS, CACHE_HIT_RATIO
+
+logger = logging.getLogger(__name__)
+
+class CachedResponse:
+    """Serialized response body with its ETag and freshness window."""
+
+    __slots__ = ("body", "etag", "fresh_until", "stale_until")
+
+    def __init__(self, body: bytes, ttl_seconds: float, stale_seconds: float):
+        now = time.monotonic()
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.fresh_until = now + ttl_seconds
+        self.stale_until = self.fresh_until + stale_seconds
+
+class ResponseCache:
+    """
+    TTL cache for JSON responses with single-flight recomputation,
+    stale-while-revalidate and strong ETags.
+
+    Loaders must not depend on request-scoped resources (such as the request's
+    DB session): a stale entry is refreshed in the background after the
+    request that triggered it has finished.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, stale_seconds: Optional[float] = None):
+        self.max_entries = max_entries or settings.DASHBOARD_CACHE_MAX_ENTRIES
+        self.stale_seconds = stale_seconds if stale_seconds is not None else settings.DASHBOARD_CACHE_STALE_SECONDS
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._refresh_tasks = set()
+        self.stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {
+            "hits": 0,
+            "misses": 0,
+            "stale_served": 0,
+            "coalesced": 0,
+            "not_modified": 0,
+            "refreshes": 0,
+            "errors": 0
+        })
+
+    @staticmethod
+    def make_key(name: str, params: Dict[str, Any]) -> Tuple:
+        return (name, tuple(sorted(params.items())))
+
+    async def respond(
+        self,
+        request: Request,
+        name: str,
+        params: Dict[str, Any],
+        ttl_seconds: float,
+        loader: Callable[[], Awaitable[Any]]
+    ) -> Response:
+        """Serve ``name`` from cache, answering If-None-Match with 304 when unchanged."""
+        key = self.make_key(name, params)
+        stats = self.stats[name]
+        now = time.monotonic()
+
+        entry = self._entries.get(key)
+        if entry and entry.fresh_until > now:
+            stats["hits"] += 1
+            status = "HIT"
+        elif entry and entry.stale_until > now:
+            stats["stale_served"] += 1
+            status = "STALE"
+            self._refresh_in_background(key, name, ttl_seconds, loader)
+        else:
+            if key in self._inflight:
+                stats["coalesced"] += 1
+                status = "HIT"
+            else:
+                stats["misses"] += 1
+                status = "MISS"
+            entry = await self._load(key, name, ttl_seconds, loader)
+
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": "no-cache",
+            "X-Cache": status
+        }
+        if self._etag_matches(request.headers.get("if-none-match"), entry.etag):
+            stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def _etag_matches(header: Optional[str], etag: str) -> bool:
+        if not header:
+            return False
+        candidates = [candidate.strip() for candidate in header.split(",")]
+        return "*" in candidates or etag in candidates
+
+    async def _load(self, key: Tuple, name: str, ttl_seconds: float, loader) -> CachedResponse:
+        """Run the loader once for all concurrent callers of the same key."""
+        inflight = self._inflight.get(key)
+        if inflight:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await loader()
+            body = json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+            entry = CachedResponse(body, ttl_seconds, self.stale_seconds)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            self.stats[name]["errors"] += 1
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure isn't logged by the loop
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        future.set_result(entry)
+        self._store(key, entry)
+        return entry
+
+    def _refresh_in_background(self, key: Tuple, name: str, ttl_seconds: float, loader):
+        if key in self._inflight:
+            return
+        self.stats[name]["refreshes"] += 1
+        task = asyncio.get_running_loop().create_task(self._refresh(key, name, ttl_seconds, loader))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh(self, key: Tuple, name: str, ttl_seconds: float, loader):
+        try:
+            await self._load(key, name, ttl_seconds, loader)
+        except Exception as e:
+            # Keep serving the stale copy until its window runs out
+            logger.warning(f"⚠️ Background refresh of {name} failed: {e}")
+
+    def _store(self, key: Tuple, entry: CachedResponse):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop cached responses, optionally only those of one endpoint."""
+        if name is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == name]:
+            del self._entries[key]
+
+    def register_metrics(self, cache_name: str):
+        """Expose per-endpoint lookup counters and hit ratios on /metrics."""
+        def requests():
+            for name, stats in list(self.stats.items()):
+                for result in ("hits", "stale_served", "coalesced", "misses"):
+                    yield (f"{cache_name}:{name}", result), stats[result]
+
+        def hit_ratios():
+            for name, status in self.get_status()["endpoints"].items():
+                yield (f"{cache_name}:{name}",), status["hit_ratio"]
+
+        CACHE_REQUESTS.add_source(requests)
+        CACHE_HIT_RATIO.add_source(hit_ratios)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get per-endpoint hit/miss counters and hit ratios."""
+        endpoints = {}
+        for name, stats in self.stats.items():
+            cached = stats["hits"] + stats["stale_served"] + stats["coalesced"]
+            served = cached + stats["misses"]
+            endpoints[name] = {
+                **stats,
+                "hit_ratio": round(cached / served, 3) if served else 0.0
+            }
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "stale_seconds": self.stale_seconds,
+            "endpoints": endpoints
+        }
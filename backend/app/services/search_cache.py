@@ -0,0 +1,159 @@
+"""
+Result cache for federated threat searches.
+"""
+
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+from collections import OrderedDict
+import logging
+import asyncio
+import json
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SearchResultCache:
+    """TTL + LRU cache with single-flight loading and generation-based invalidation."""
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttl_seconds: Optional[float] = None
+    ):
+        self.max_entries = max_entries or settings.SEARCH_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or settings.SEARCH_CACHE_MAX_BYTES
+        self.ttl_seconds = ttl_seconds or settings.SEARCH_CACHE_TTL_SECONDS
+        # key -> (expires_at, size_bytes, value)
+        self._entries: "OrderedDict[Tuple[str, int], Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, int], asyncio.Future] = {}
+        self._bytes = 0
+        self.generation = 0
+        self.invalidate_interval = settings.SEARCH_CACHE_INVALIDATE_INTERVAL_SECONDS
+        self._last_invalidation = float("-inf")
+        self._pending_invalidation: Optional[asyncio.TimerHandle] = None
+        self.stats = {
+            "hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "uncached": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "invalidations_deferred": 0
+        }
+    
+    @staticmethod
+    def make_key(query: str, size: int) -> Tuple[str, int]:
+        """Normalize a query so trivially different spellings share an entry."""
+        return (" ".join(query.split()), size)
+    
+    async def get_or_load(
+        self,
+        query: str,
+        size: int,
+        loader: Callable[[], Awaitable[Dict[str, Any]]],
+        cacheable: Optional[Callable[[Dict[str, Any]], bool]] = None
+    ) -> Dict[str, Any]:
+        """Return a cached result or run ``loader`` once for all concurrent callers.
+        
+        Loaded values rejected by ``cacheable`` (e.g. partial results after a
+        backend failure) are returned to waiting callers but not stored.
+        """
+        key = self.make_key(query, size)
+        
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[2]
+        if entry:
+            self._remove(key)
+        
+        inflight = self._inflight.get(key)
+        if inflight:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight)
+        
+        self.stats["misses"] += 1
+        generation = self.generation
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure isn't logged by the loop
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        
+        future.set_result(value)
+        if cacheable is not None and not cacheable(value):
+            self.stats["uncached"] += 1
+        elif generation == self.generation:
+            # Results loaded across an invalidation may already be stale
+            self._store(key, value)
+        return value
+    
+    def request_invalidation(self):
+        """Invalidate now, or once the rate limit allows if one ran recently.
+        
+        Cached results are then at most ``invalidate_interval`` seconds behind
+        a delivery, however many deliveries arrive in between.
+        """
+        if self._pending_invalidation is not None:
+            return
+        wait = self._last_invalidation + self.invalidate_interval - time.monotonic()
+        if wait <= 0:
+            self.invalidate()
+            return
+        self.stats["invalidations_deferred"] += 1
+        self._pending_invalidation = asyncio.get_running_loop().call_later(wait, self.invalidate)
+    
+    def invalidate(self):
+        """Drop all entries, e.g. after new indicators were indexed."""
+        if self._pending_invalidation is not None:
+            self._pending_invalidation.cancel()
+            self._pending_invalidation = None
+        self._last_invalidation = time.monotonic()
+        self.generation += 1
+        if self._entries:
+            self.stats["invalidations"] += 1
+        self._entries.clear()
+        self._bytes = 0
+    
+    def _store(self, key: Tuple[str, int], value: Dict[str, Any]):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+        
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats["evictions"] += 1
+    
+    def _remove(self, key: Tuple[str, int]):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get cache size, memory use and hit ratio."""
+        lookups = self.stats["hits"] + self.stats["misses"] + self.stats["coalesced"]
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "memory_bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hit_ratio": round((self.stats["hits"] + self.stats["coalesced"]) / lookups, 3) if lookups else 0.0,
+            **self.stats
+        }
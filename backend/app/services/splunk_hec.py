@@ -0,0 +1,230 @@
+"""
+Batched Splunk HTTP Event Collector (HEC) sender for KRSN-RT2I.
+"""
+
+from typing import Dict, Any, List, Optional, Tuple
+import logging
+import asyncio
+import gzip
+import json
+import time
+import uuid
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SplunkHECSender:
+    """Async sender that batches events into gzipped newline-delimited HEC payloads."""
+    
+    def __init__(self):
+        self.url = settings.SIEM_SPLUNK_HEC_URL.rstrip("/")
+        self.token = settings.SIEM_SPLUNK_HEC_TOKEN
+        self.index = settings.SIEM_SPLUNK_INDEX
+        self.max_events = settings.SIEM_SPLUNK_HEC_BATCH_EVENTS
+        self.max_bytes = settings.SIEM_SPLUNK_HEC_BATCH_BYTES
+        self.flush_interval = settings.SIEM_SPLUNK_HEC_FLUSH_INTERVAL
+        self.use_ack = settings.SIEM_SPLUNK_HEC_ACK
+        self.channel = str(uuid.uuid4())
+        self.client: Optional[httpx.AsyncClient] = None
+        self._buffer: List[Tuple[bytes, asyncio.Future]] = []
+        self._buffer_bytes = 0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._pending_flushes: set = set()
+        self.stats = {
+            "events_sent": 0,
+            "events_failed": 0,
+            "batches_sent": 0,
+            "bytes_sent": 0,
+            "last_flush": None
+        }
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url and self.token)
+    
+    async def start(self):
+        """Open the pooled HEC connection and start the periodic flusher."""
+        if not self.enabled or self.client:
+            return
+        
+        self.client = httpx.AsyncClient(
+            base_url=self.url,
+            headers={
+                "Authorization": f"Splunk {self.token}",
+                "X-Splunk-Request-Channel": self.channel
+            },
+            limits=httpx.Limits(
+                max_connections=settings.SIEM_SPLUNK_HEC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.SIEM_SPLUNK_HEC_MAX_CONNECTIONS
+            ),
+            timeout=httpx.Timeout(30.0, connect=5.0),
+            verify=settings.SIEM_SPLUNK_HEC_VERIFY_SSL
+        )
+        self._flush_task = asyncio.create_task(self._flush_periodically())
+        logger.info(f"✅ Splunk HEC sender started: {self.url}")
+    
+    async def close(self):
+        """Flush buffered events and release the connection pool."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        await self.flush()
+        if self._pending_flushes:
+            await asyncio.gather(*self._pending_flushes, return_exceptions=True)
+        
+        if self.client:
+            await self.client.aclose()
+            self.client = None
+    
+    def build_event(self, threat_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Wrap threat data in a HEC event envelope."""
+        return {
+            "time": time.time(),
+            "index": self.index,
+            "source": "krsn-rt2i",
+            "sourcetype": "threat_intelligence",
+            "event": threat_data
+        }
+    
+    def submit(self, threat_data: Dict[str, Any]) -> asyncio.Future:
+        """Buffer one event; the returned future resolves once its batch is acknowledged.
+        
+        Without a started sender nothing would ever flush the buffer, so the
+        future resolves to False straight away.
+        """
+        future = asyncio.get_running_loop().create_future()
+        if not self.client:
+            self.stats["events_failed"] += 1
+            future.set_result(False)
+            return future
+        
+        line = json.dumps(self.build_event(threat_data), default=str).encode() + b"\n"
+        
+        self._buffer.append((line, future))
+        self._buffer_bytes += len(line)
+        
+        if len(self._buffer) >= self.max_events or self._buffer_bytes >= self.max_bytes:
+            task = asyncio.create_task(self.flush())
+            self._pending_flushes.add(task)
+            task.add_done_callback(self._pending_flushes.discard)
+        
+        return future
+    
+    async def send(self, threat_data: Dict[str, Any]) -> bool:
+        """Send one event through the batcher and wait for its acknowledgement.
+        
+        Returns False immediately when HEC is not configured.
+        """
+        if not self.enabled:
+            return False
+        if not self.client:
+            await self.start()
+        return await self.submit(threat_data)
+    
+    async def flush(self):
+        """Send all buffered events in batches bounded by count and size."""
+        while self._buffer:
+            await self._send_batch(self._take_batch())
+    
+    def _take_batch(self) -> List[Tuple[bytes, asyncio.Future]]:
+        count, size = 0, 0
+        for line, _ in self._buffer:
+            if count and (count >= self.max_events or size + len(line) > self.max_bytes):
+                break
+            count += 1
+            size += len(line)
+        
+        batch, self._buffer = self._buffer[:count], self._buffer[count:]
+        self._buffer_bytes -= size
+        return batch
+    
+    async def _send_batch(self, batch: List[Tuple[bytes, asyncio.Future]]):
+        futures = [future for _, future in batch]
+        success = False
+        try:
+            payload = await asyncio.to_thread(gzip.compress, b"".join(line for line, _ in batch), 6)
+            success = await self._post_batch(payload)
+            
+            if success:
+                self.stats["events_sent"] += len(batch)
+                self.stats["batches_sent"] += 1
+                self.stats["bytes_sent"] += len(payload)
+            else:
+                self.stats["events_failed"] += len(batch)
+        except Exception as e:
+            self.stats["events_failed"] += len(batch)
+            logger.error(f"❌ Splunk HEC batch failed: {e}")
+        finally:
+            self.stats["last_flush"] = time.time()
+            for future in futures:
+                if not future.done():
+                    future.set_result(success)
+    
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"❌ Splunk HEC periodic flush failed: {e}")
+    
+    async def _post_batch(self, payload: bytes, attempts: int = 3) -> bool:
+        """POST a gzipped batch, retrying when HEC reports it is busy."""
+        if not self.client:
+            return False
+        
+        delay = 0.5
+        for attempt in range(attempts):
+            response = await self.client.post(
+                "/services/collector/event",
+                content=payload,
+                headers={"Content-Encoding": "gzip", "Content-Type": "application/json"}
+            )
+            
+            if response.status_code in (429, 503) and attempt < attempts - 1:
+                await asyncio.sleep(delay)
+                delay *= 2
+                continue
+            
+            if response.status_code != 200:
+                logger.error(f"❌ Splunk HEC rejected batch: {response.status_code} {response.text}")
+                return False
+            
+            ack_id = response.json().get("ackId")
+            if self.use_ack and ack_id is not None:
+                return await self._wait_for_ack(ack_id)
+            return True
+        
+        return False
+    
+    async def _wait_for_ack(self, ack_id: int) -> bool:
+        """Poll the HEC acknowledgement endpoint until the batch is indexed."""
+        deadline = time.monotonic() + settings.SIEM_SPLUNK_HEC_ACK_TIMEOUT
+        delay = 0.2
+        
+        while time.monotonic() < deadline:
+            response = await self.client.post("/services/collector/ack", json={"acks": [ack_id]})
+            if response.status_code == 200 and response.json().get("acks", {}).get(str(ack_id)):
+                return True
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 5.0)
+        
+        logger.warning(f"⚠️ Splunk HEC ack {ack_id} timed out")
+        return False
+    
+    @property
+    def buffered_events(self) -> int:
+        return len(self._buffer)
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Get HEC sender statistics."""
+        return {
+            "enabled": self.enabled,
+            "buffered_events": self.buffered_events,
+            "buffered_bytes": self._buffer_bytes,
+            **self.stats
+        }
@@ -6,11 +6,15 @@ import splunklib.client as client
 import splunklib.results as results
 from typing import Dict, Any, List, Optional
 import logging
+import asyncio
 import json
+import time
 from datetime import datetime
 import os
 from dotenv import load_dotenv
 
+from app.core.config import settings
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,7 @@ class SplunkCloudService:
         self.token = os.getenv("SPLUNK_TOKEN", "")
         self.index = os.getenv("SPLUNK_INDEX", "rtip_threats")
         self.service = None
+        self._index = None
         
     def connect(self) -> bool:
         """Connect to Splunk Cloud instance."""
@@ -48,6 +53,8 @@ class SplunkCloudService:
                     scheme="https"
                 )
             
+            self._index = None
+            
             # Test connection
             apps = self.service.apps
             logger.info(f"✅ Connected to Splunk Cloud: {self.splunk_url}")
@@ -65,8 +72,10 @@ class SplunkCloudService:
                 if not self.connect():
                     return False
             
-            # Get the index
-            myindex = self.service.indexes[self.index]
+            # Resolve the index once; the lookup is a REST round trip
+            if self._index is None:
+                self._index = self.service.indexes[self.index]
+            myindex = self._index
             
             # Prepare event data
             event_data = {
@@ -86,12 +95,12 @@ class SplunkCloudService:
             logger.error(f"❌ Failed to send threat data to Splunk: {e}")
             return False
     
-    def search_threats(self, query: str, earliest_time: str = "-24h") -> List[Dict]:
-        """Search for threats in Splunk Cloud."""
+    def search_threats(self, query: str, earliest_time: str = "-24h") -> Optional[List[Dict]]:
+        """Search for threats in Splunk Cloud; None if the search could not run."""
         try:
             if not self.service:
                 if not self.connect():
-                    return []
+                    return None
             
             # Build search query
             search_query = f'search index={self.index} {query} earliest={earliest_time}'
@@ -99,9 +108,11 @@ class SplunkCloudService:
             # Execute search
             job = self.service.jobs.create(search_query)
             
-            # Wait for job to complete
+            # Wait for job to complete, backing off between status polls
+            delay = 0.1
             while not job.is_done():
-                pass
+                time.sleep(delay)
+                delay = min(delay * 2, 2.0)
             
             # Get results
             result_list = []
@@ -114,7 +125,76 @@ class SplunkCloudService:
             
         except Exception as e:
             logger.error(f"❌ Splunk search failed: {e}")
-            return []
+            return None
+    
+    async def search_threats_async(
+        self,
+        query: str,
+        earliest_time: str = "-24h",
+        max_results: int = 100,
+        timeout: Optional[float] = None
+    ) -> Optional[List[Dict]]:
+        """Search for threats without tying up a worker thread while the job runs.
+        
+        Returns None when the search failed or timed out, so callers can tell a
+        failure from an empty result.
+        """
+        timeout = timeout or settings.SIEM_SPLUNK_SEARCH_TIMEOUT
+        job = None
+        finished = False
+        
+        try:
+            if not self.service:
+                if not await asyncio.to_thread(self.connect):
+                    return None
+            
+            search_query = f'search index={self.index} {query} earliest={earliest_time} | head {max_results}'
+            job = await asyncio.to_thread(self.service.jobs.create, search_query)
+            
+            # Poll job status with exponential backoff instead of spinning
+            deadline = time.monotonic() + timeout
+            delay = 0.1
+            while not await asyncio.to_thread(job.is_done):
+                if time.monotonic() + delay > deadline:
+                    raise asyncio.TimeoutError(f"Splunk search exceeded {timeout}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 2.0)
+            
+            # Stream results page by page
+            result_list = []
+            page_size = min(max_results, 1000)
+            while len(result_list) < max_results:
+                page = await asyncio.to_thread(
+                    self._read_results_page, job, page_size, len(result_list)
+                )
+                result_list.extend(page)
+                if len(page) < page_size:
+                    break
+            
+            finished = True
+            logger.info(f"🔍 Splunk search returned {len(result_list)} results")
+            return result_list[:max_results]
+            
+        except asyncio.TimeoutError as e:
+            logger.warning(f"⚠️ Splunk search cancelled: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"❌ Splunk search failed: {e}")
+            return None
+        finally:
+            if job is not None and not finished:
+                # Don't leave abandoned jobs running on the search head
+                try:
+                    await asyncio.shield(asyncio.to_thread(job.cancel))
+                except Exception as e:
+                    logger.debug(f"Failed to cancel Splunk job: {e}")
+    
+    def _read_results_page(self, job, count: int, offset: int) -> List[Dict]:
+        """Read one page of job results."""
+        return [
+            result for result in results.ResultsReader(job.results(count=count, offset=offset))
+            if isinstance(result, dict)
+        ]
     
     def get_connection_status(self) -> Dict[str, Any]:
         """Get Splunk Cloud connection status."""
@@ -0,0 +1,175 @@
+"""
+Incrementally maintained threat indicator statistics.
+
+The CRUD write paths report inserts, updates and deletes here, so dashboard
+statistics are served from memory instead of six aggregate queries per
+request. A periodic reconciliation recomputes everything from the database
+with two GROUP BY queries (the second over an index range scan of recent
+rows), correcting drift from writes made by other processes or outside the
+CRUD layer.
+"""
+
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+
+from sqlalchemy import select, func
+
+from app.core.metrics import THREAT_INDICATORS
+from app.db.database import AsyncSessionLocal
+from app.db.models import ThreatIndicator
+
+logger = logging.getLogger(__name__)
+
+RECENT_WINDOW_HOURS = 24
+
+# (is_active, severity, type, source)
+StatsKey = Tuple[bool, Optional[str], Optional[str], Optional[str]]
+
+def _enum_value(value) -> Optional[str]:
+    return value.value if hasattr(value, "value") else value
+
+def _hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+def recent_window_start(now: Optional[datetime] = None) -> datetime:
+    """Start of the "recent" window: the current hour and the 23 before it."""
+    return _hour(now or datetime.utcnow()) - timedelta(hours=RECENT_WINDOW_HOURS - 1)
+
+def _created_hour(dialect: str):
+    """SQL expression truncating created_at to the hour."""
+    if dialect == "postgresql":
+        return func.date_trunc("hour", ThreatIndicator.created_at)
+    return func.strftime("%Y-%m-%d %H:00:00", ThreatIndicator.created_at)
+
+def _as_datetime(value) -> datetime:
+    # SQLite returns the strftime() text
+    return datetime.strptime(value, "%Y-%m-%d %H:%M:%S") if isinstance(value, str) else value
+
+class ThreatStatsAggregate:
+    """In-memory counters by active flag, severity, type, source and created hour."""
+
+    def __init__(self):
+        self._groups: Counter = Counter()
+        self._hourly: Counter = Counter()
+        self.ready = False
+        self.last_reconciled: Optional[datetime] = None
+        self.last_drift = 0
+
+    @staticmethod
+    def key_of(threat) -> StatsKey:
+        """Snapshot the counted attributes of a ThreatIndicator."""
+        return (
+            bool(threat.is_active),
+            _enum_value(threat.severity),
+            _enum_value(threat.type),
+            threat.source,
+        )
+
+    def record_insert(self, threat):
+        self._groups[self.key_of(threat)] += 1
+        if threat.created_at:
+            self._hourly[_hour(threat.created_at)] += 1
+
+    def record_update(self, before: StatsKey, threat):
+        after = self.key_of(threat)
+        if before != after:
+            self._groups[before] -= 1
+            self._groups[after] += 1
+
+    def record_delete(self, before: StatsKey, created_at: Optional[datetime]):
+        self._groups[before] -= 1
+        if created_at and _hour(created_at) in self._hourly:
+            self._hourly[_hour(created_at)] -= 1
+
+    async def reconcile(self):
+        """Recompute all counters from the database and swap them in."""
+        cutoff = recent_window_start()
+        async with AsyncSessionLocal() as db:
+            grouped = await db.execute(
+                select(
+                    ThreatIndicator.is_active,
+                    ThreatIndicator.severity,
+                    ThreatIndicator.type,
+                    ThreatIndicator.source,
+                    func.count(ThreatIndicator.id)
+                ).group_by(
+                    ThreatIndicator.is_active,
+                    ThreatIndicator.severity,
+                    ThreatIndicator.type,
+                    ThreatIndicator.source
+                )
+            )
+            groups = Counter()
+            for is_active, severity, threat_type, source, count in grouped.all():
+                groups[(bool(is_active), _enum_value(severity), _enum_value(threat_type), source)] += count
+
+            hour = _created_hour(db.get_bind().dialect.name)
+            recent = await db.execute(
+                select(hour, func.count(ThreatIndicator.id))
+                .where(ThreatIndicator.created_at >= cutoff)
+                .group_by(hour)
+            )
+            hourly = Counter({_as_datetime(bucket): count for bucket, count in recent.all()})
+
+        drift = sum(abs(groups[key] - self._groups[key]) for key in set(groups) | set(self._groups))
+        if self.ready and drift:
+            logger.info(f"🔄 Threat stats reconciled (drift: {drift})")
+
+        self._groups = groups
+        self._hourly = hourly
+        self.last_drift = drift
+        self.last_reconciled = datetime.utcnow()
+        self.ready = True
+
+    def _prune(self, cutoff: datetime):
+        for hour in [hour for hour in self._hourly if hour < cutoff]:
+            del self._hourly[hour]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Statistics in the shape returned by crud_threat.get_threat_stats."""
+        self._prune(recent_window_start())
+
+        by_severity, by_type, by_source = Counter(), Counter(), Counter()
+        total = active = 0
+        for (is_active, severity, threat_type, source), count in self._groups.items():
+            total += count
+            if not is_active or count <= 0:
+                continue
+            active += count
+            by_severity[severity] += count
+            by_type[threat_type] += count
+            by_source[source] += count
+
+        return {
+            "total_threats": total,
+            "active_threats": active,
+            "recent_threats_24h": sum(self._hourly.values()),
+            "threats_by_severity": dict(by_severity),
+            "threats_by_type": dict(by_type),
+            "threats_by_source": dict(by_source),
+            "last_updated": datetime.utcnow()
+        }
+
+    def metric_samples(self):
+        """Indicator counts for /metrics; nothing until the aggregate is loaded."""
+        if not self.ready:
+            return
+        stats = self.get_stats()
+        yield ("total",), stats["total_threats"]
+        yield ("active",), stats["active_threats"]
+        yield ("recent_24h",), stats["recent_threats_24h"]
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "groups": len(self._groups),
+            "hour_buckets": len(self._hourly),
+            "last_reconciled": self.last_reconciled.isoformat() if self.last_reconciled else None,
+            "last_drift": self.last_drift,
+        }
+
+# Shared instance updated by the CRUD layer
+threat_stats = ThreatStatsAggregate()
+THREAT_INDICATORS.add_source(threat_stats.metric_samples)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark indicator search: LIKE scan vs. the indexed search backend.
+
+Usage:
+    python benchmark_search.py --rows 10000000 --db data/search_benchmark.db
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select, desc, or_, insert
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.database import Base
+from app.db.models import ThreatIndicator
+from app.db.search_index import install_search_index, search_condition
+
+BATCH_SIZE = 50_000
+QUERIES = ["185.220", "evil-domain", "payload", "zz9", "c2 beacon"]
+
+def random_indicator(i: int, now: datetime) -> dict:
+    kind = i % 3
+    if kind == 0:
+        value = f"{random.randint(1, 223)}.{random.randint(0, 255)}.{random.randint(0, 255)}.{random.randint(1, 254)}"
+        itype = "IP"
+    elif kind == 1:
+        label = "".join(random.choices(string.ascii_lowercase, k=10))
+        value = f"{label}-{i}.example.net"
+        itype = "DOMAIN"
+    else:
+        value = "".join(random.choices("0123456789abcdef", k=64))
+        itype = "HASH"
+    if i % 100_000 == 0:
+        value = f"evil-domain-{i}.com"
+    return {
+        "value": value,
+        "type": itype,
+        "severity": random.choice(["LOW", "MEDIUM", "HIGH", "CRITICAL"]),
+        "confidence": random.random(),
+        "description": random.choice(["Tor exit node", "Malware payload host", "C2 beacon", "Phishing kit"]),
+        "first_seen": now,
+        "last_seen": now - timedelta(seconds=i),
+        "source": "benchmark",
+        "is_active": True,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def populate(engine, rows: int) -> None:
+    now = datetime.utcnow()
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        for offset in range(0, rows, BATCH_SIZE):
+            batch = [random_indicator(i, now) for i in range(offset, min(offset + BATCH_SIZE, rows))]
+            conn.execute(insert(ThreatIndicator), batch)
+            print(f"  inserted {offset + len(batch):,}/{rows:,}", end="\r")
+    print(f"\n📦 Populated {rows:,} rows in {time.perf_counter() - started:.1f}s")
+
+def time_query(engine, condition, repeat: int) -> float:
+    query = select(ThreatIndicator.id).where(condition).order_by(
+        desc(ThreatIndicator.last_seen)
+    ).limit(50)
+    timings = []
+    with engine.connect() as conn:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            conn.execute(query).fetchall()
+            timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default="data/search_benchmark.db")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reuse", action="store_true", help="Skip population if the database exists")
+    args = parser.parse_args()
+
+    os.makedirs(os.path.dirname(args.db) or ".", exist_ok=True)
+    if os.path.exists(args.db) and not args.reuse:
+        os.remove(args.db)
+
+    engine = create_engine(f"sqlite:///{args.db}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        count = conn.execute(select(ThreatIndicator.id).limit(1)).first()
+    if count is None:
+        populate(engine, args.rows)
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if not install_search_index(conn):
+            sys.exit("❌ Search index could not be built (SQLite needs FTS5 with the trigram tokenizer)")
+    print(f"🔎 Search index built in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'query':<16}{'LIKE scan (ms)':>16}{'indexed (ms)':>16}")
+    for q in QUERIES:
+        scan = or_(
+            ThreatIndicator.value.ilike(f"%{q}%"),
+            ThreatIndicator.description.ilike(f"%{q}%")
+        )
+        indexed = search_condition(
+            "sqlite", "threat_indicators_fts", ThreatIndicator.id,
+            ThreatIndicator.value, ThreatIndicator.description, q
+        )
+        print(f"{q:<16}{time_query(engine, scan, args.repeat):>16.1f}{time_query(engine, indexed, args.repeat):>16.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Import NVD CVE data into the RTIP database.
+
+Usage:
+    python import_nvd.py --file nvdcve-1.1-2023.json.gz [--file ...]
+    python import_nvd.py --api                  # changes since the last import
+    python import_nvd.py --api --full           # the whole NVD corpus
+    python import_nvd.py --api --modified-since 2024-01-01T00:00:00
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.db.database import create_tables
+from app.services.nvd_importer import nvd_importer
+
+async def run(args):
+    await create_tables()
+    modified_since = datetime.fromisoformat(args.modified_since) if args.modified_since else None
+
+    for path in args.file or []:
+        status = await nvd_importer.import_file(path, modified_since)
+        print(f"📄 {path}: {status['records_written']} written, {status['records_skipped']} skipped")
+
+    if args.api:
+        if modified_since or args.full:
+            status = await nvd_importer.import_api(modified_since)
+        else:
+            status = await nvd_importer.run_incremental()
+        print(f"🌐 NVD API: {status['records_written']} written, {status['records_skipped']} skipped")
+
+    watermark = await nvd_importer.get_watermark()
+    print(f"✅ Watermark: {watermark.isoformat() if watermark else 'none'}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", action="append", help="NVD JSON feed file (.json or .json.gz); repeatable")
+    parser.add_argument("--api", action="store_true", help="Import from the NVD API")
+    parser.add_argument("--full", action="store_true", help="With --api, ignore the stored watermark")
+    parser.add_argument("--modified-since", help="Only import CVEs modified after this ISO timestamp (UTC)")
+    args = parser.parse_args()
+
+    if not args.file and not args.api:
+        parser.error("give --file and/or --api")
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
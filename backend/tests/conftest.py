@@ -0,0 +1,42 @@
+"""
+Shared fixtures for the backend test suite.
+
+Tests run against a throwaway SQLite database; DATABASE_URL is pointed at it
+before the application modules (and their engine) are imported.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='rtip-tests-')}/test.db")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import delete
+
+from app.db.database import Base, engine, create_tables
+
+@pytest.fixture
+def run():
+    """Run a coroutine on a fresh loop, releasing pooled connections afterwards."""
+    def runner(coro):
+        async def wrapped():
+            try:
+                return await coro
+            finally:
+                await engine.dispose()
+        return asyncio.run(wrapped())
+    return runner
+
+@pytest.fixture
+def db(run):
+    """Empty application tables for each test."""
+    async def reset():
+        await create_tables()
+        async with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(delete(table))
+    run(reset())
@@ -0,0 +1,86 @@
+"""
+Alert rollups: alerts with and without an indicator are counted, top indicators
+ignore the unattributed bucket and expired buckets are purged.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import (
+    AlertRollupDaily, AlertRollupHourly, IndicatorType, ThreatIndicator, ThreatSeverity
+)
+from app.crud import crud_alert
+
+async def _indicator(value):
+    async with AsyncSessionLocal() as session:
+        threat = ThreatIndicator(value=value, type=IndicatorType.DOMAIN, severity=ThreatSeverity.LOW, confidence=0.1)
+        session.add(threat)
+        await session.commit()
+        return threat.id
+
+async def _alert(indicator_id, severity=ThreatSeverity.LOW):
+    async with AsyncSessionLocal() as session:
+        await crud_alert.create_alert(session, "title", "message", severity, indicator_id)
+
+def test_unattributed_alerts_are_counted(db, run):
+    async def main():
+        indicator_id = await _indicator("evil.example")
+        await _alert(indicator_id)
+        await _alert(None, ThreatSeverity.HIGH)
+        await _alert(None, ThreatSeverity.MEDIUM)
+        async with AsyncSessionLocal() as session:
+            count = await crud_alert.count_alerts_since(session, 24)
+            top = await crud_alert.get_top_indicators(session, 24)
+            rows = (await session.execute(
+                select(AlertRollupHourly).where(AlertRollupHourly.indicator_id.is_(None))
+            )).scalars().all()
+        return indicator_id, count, top, rows
+
+    indicator_id, count, top, rows = run(main())
+    assert count == 3
+    assert [entry["id"] for entry in top] == [indicator_id]
+    # Both unattributed alerts landed in one bucket row carrying the worst severity
+    assert len(rows) == 1
+    assert rows[0].alert_count == 2
+    assert rows[0].max_severity == 3
+
+def test_expired_rollups_are_purged(db, run, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_ROLLUP_HOURLY_RETENTION_DAYS", 7)
+    monkeypatch.setattr(settings, "ALERT_ROLLUP_DAILY_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "ALERT_ROLLUP_PURGE_BATCH_SIZE", 2)
+    now = datetime(2026, 10, 19, 12)
+
+    async def main():
+        async with AsyncSessionLocal() as session:
+            for days in (1, 6, 8, 9, 10):
+                bucket = now - timedelta(days=days)
+                session.add(AlertRollupHourly(bucket=bucket, alert_count=1, max_severity=1))
+                session.add(AlertRollupDaily(bucket=bucket, alert_count=1, max_severity=1))
+            session.add(AlertRollupDaily(bucket=now - timedelta(days=31), alert_count=1, max_severity=1))
+            await session.commit()
+            removed = await crud_alert.purge_expired_rollups(session, now)
+            hourly = (await session.execute(select(AlertRollupHourly.bucket))).scalars().all()
+            daily = (await session.execute(select(AlertRollupDaily.bucket))).scalars().all()
+        return removed, hourly, daily
+
+    removed, hourly, daily = run(main())
+    assert removed == {"hourly": 3, "daily": 1}
+    assert sorted(hourly) == [now - timedelta(days=6), now - timedelta(days=1)]
+    assert len(daily) == 5
+
+def test_hourly_retention_covers_the_hourly_windows(db, run, monkeypatch):
+    monkeypatch.setattr(settings, "ALERT_ROLLUP_HOURLY_RETENTION_DAYS", 0)
+    now = datetime(2026, 10, 19, 12)
+
+    async def main():
+        async with AsyncSessionLocal() as session:
+            session.add(AlertRollupHourly(
+                bucket=now - timedelta(hours=crud_alert.HOURLY_ROLLUP_MAX_HOURS - 1), alert_count=1, max_severity=1
+            ))
+            await session.commit()
+            return await crud_alert.purge_expired_rollups(session, now)
+
+    assert run(main())["hourly"] == 0
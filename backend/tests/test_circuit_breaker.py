@@ -0,0 +1,70 @@
+"""
+Failure-rate circuit breaker for the SIEM sinks.
+"""
+
+import time
+
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+
+def _breaker(**kwargs):
+    options = dict(failure_rate_threshold=0.5, minimum_calls=4, window_size=10, open_seconds=0.05)
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+def test_stays_closed_below_minimum_calls():
+    breaker = _breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.allow_request()
+
+def test_trips_at_failure_rate_and_fails_fast():
+    breaker = _breaker()
+    breaker.record_success()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.is_open
+    assert not breaker.allow_request()
+    assert breaker.stats["short_circuited"] == 1
+    assert breaker.stats["times_opened"] == 1
+
+def test_half_open_trial_closes_on_success():
+    breaker = _breaker()
+    breaker.trip()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Only one trial call at a time
+    assert not breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.failure_rate == 0.0
+
+def test_half_open_trial_failure_reopens():
+    breaker = _breaker()
+    breaker.trip()
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats["times_opened"] == 2
+
+def test_failed_probe_extends_open_period():
+    breaker = _breaker()
+    breaker.trip()
+    time.sleep(0.04)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.is_open
+    assert not breaker.allow_request()
+
+def test_successful_probe_allows_trial_traffic():
+    breaker = _breaker(open_seconds=60)
+    breaker.trip()
+    breaker.record_success()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
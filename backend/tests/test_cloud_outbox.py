@@ -0,0 +1,120 @@
+"""
+Durable SIEM outbox: per-sink offsets, retry on failure and compaction.
+"""
+
+import asyncio
+
+from app.services.cloud_outbox import CloudOutbox
+
+async def _wait_for(predicate, timeout=3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+def test_entries_are_delivered_in_order_per_sink(tmp_path):
+    outbox = CloudOutbox(str(tmp_path / "outbox.db"))
+    delivered = {"a": [], "b": []}
+
+    async def main():
+        for sink in delivered:
+            async def deliver(batch, sink=sink):
+                delivered[sink].extend(item["n"] for item in batch)
+                return True
+            outbox.register_sink(sink, deliver)
+        await outbox.start()
+        await outbox.enqueue_many([{"n": n} for n in range(5)])
+        await outbox.enqueue({"n": 5})
+        await _wait_for(lambda: all(len(items) == 6 for items in delivered.values()))
+        status = outbox.get_status()
+        await outbox.close()
+        return status
+
+    status = asyncio.run(main())
+    assert delivered == {"a": list(range(6)), "b": list(range(6))}
+    assert {sink: info["backlog"] for sink, info in status["sinks"].items()} == {"a": 0, "b": 0}
+    assert status["sinks"]["a"]["delivered"] == 6
+
+def test_rejected_batches_are_retried_without_advancing(tmp_path):
+    outbox = CloudOutbox(str(tmp_path / "outbox.db"))
+    attempts = []
+
+    async def deliver(batch):
+        attempts.append([item["n"] for item in batch])
+        return len(attempts) > 1
+
+    async def main():
+        outbox.register_sink("flaky", deliver)
+        await outbox.enqueue_many([{"n": 1}, {"n": 2}])
+        await outbox.start()
+        await _wait_for(lambda: len(attempts) == 1)
+        failed = outbox.get_status()["sinks"]["flaky"]
+        await _wait_for(lambda: outbox.backlog() == {"flaky": 0})
+        await outbox.close()
+        return failed
+
+    failed = asyncio.run(main())
+    assert attempts == [[1, 2], [1, 2]]
+    assert failed["backlog"] == 2
+    assert failed["consecutive_failures"] == 1
+    assert "rejected batch of 2" in failed["last_error"]
+
+def test_unavailable_sink_holds_entries_without_failures(tmp_path):
+    outbox = CloudOutbox(str(tmp_path / "outbox.db"))
+    calls = []
+
+    async def deliver(batch):
+        calls.append(batch)
+        return True
+
+    async def main():
+        outbox.register_sink("down", deliver, available=lambda: False)
+        await outbox.start()
+        await outbox.enqueue({"n": 1})
+        await asyncio.sleep(0.1)
+        status = outbox.get_status()["sinks"]["down"]
+        await outbox.close()
+        return status
+
+    status = asyncio.run(main())
+    assert calls == []
+    assert status["backlog"] == 1 and status["consecutive_failures"] == 0
+
+def test_undelivered_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "outbox.db")
+
+    async def first_run():
+        outbox = CloudOutbox(path)
+        outbox.register_sink("sink", lambda batch: asyncio.sleep(0, False), available=lambda: False)
+        await outbox.start()
+        await outbox.enqueue_many([{"n": 1}, {"n": 2}])
+        await outbox.close()
+
+    delivered = []
+
+    async def second_run():
+        outbox = CloudOutbox(path)
+        async def deliver(batch):
+            delivered.extend(item["n"] for item in batch)
+            return True
+        outbox.register_sink("sink", deliver)
+        await outbox.start()
+        await _wait_for(lambda: len(delivered) == 2)
+        await outbox.close()
+
+    asyncio.run(first_run())
+    asyncio.run(second_run())
+    assert delivered == [1, 2]
+
+def test_compaction_keeps_entries_a_sink_still_needs(tmp_path):
+    outbox = CloudOutbox(str(tmp_path / "outbox.db"))
+    outbox.open()
+    outbox.register_sink("fast", None)
+    outbox.register_sink("slow", None)
+    outbox._append([("{}", 0.0)] * 4)
+    for sink, delivered_id in (("fast", 4), ("slow", 2)):
+        outbox._conn.execute(
+            "INSERT INTO sink_offsets (sink, delivered_id, updated_at) VALUES (?, ?, 0)", (sink, delivered_id)
+        )
+    assert outbox._compact() == 2
+    assert outbox.backlog() == {"fast": 0, "slow": 2}
@@ -0,0 +1,71 @@
+"""
+Federated search across the SIEM backends: failures are reported, fed to the
+circuit breakers and never cached.
+"""
+
+import asyncio
+
+from app.services.cloud_api_service import CloudAPIService
+
+def _service(splunk_result, elastic_result):
+    service = CloudAPIService()
+    service.is_initialized = True
+    calls = {"splunk": 0, "elasticsearch": 0}
+
+    async def splunk_search(query, max_results=100):
+        calls["splunk"] += 1
+        return splunk_result
+
+    async def elastic_search(query, size=100):
+        calls["elasticsearch"] += 1
+        return elastic_result
+
+    service.splunk.search_threats_async = splunk_search
+    service.elasticsearch.search_threats = elastic_search
+    return service, calls
+
+def test_failed_backend_is_reported_and_not_cached():
+    service, calls = _service(None, [{"indicator_value": "evil.com"}])
+
+    async def main():
+        first = await service.search_threats("evil.com")
+        await service.search_threats("evil.com")
+        return first
+
+    result = asyncio.run(main())
+    assert result["complete"] is False
+    assert result["results"]["splunk"]["success"] is False
+    assert result["results"]["splunk"]["error"] == "search failed"
+    assert result["results"]["elasticsearch"]["success"] is True
+    assert result["combined"]["count"] == 1
+    # Both calls reached the backends: the partial result was not cached
+    assert calls == {"splunk": 2, "elasticsearch": 2}
+    assert service.breakers["splunk"].failure_rate == 1.0
+    assert service.breakers["elasticsearch"].failure_rate == 0.0
+
+def test_empty_result_is_a_success_and_cached():
+    service, calls = _service([], [{"value": "10.0.0.1"}])
+
+    async def main():
+        first = await service.search_threats("10.0.0.1")
+        second = await service.search_threats("10.0.0.1")
+        return first, second
+
+    first, second = asyncio.run(main())
+    assert first["complete"] is True
+    assert first["results"]["splunk"] == {"success": True, "error": None, "count": 0, "data": []}
+    assert second is first
+    assert calls == {"splunk": 1, "elasticsearch": 1}
+    assert service.breakers["splunk"].failure_rate == 0.0
+
+def test_backend_exception_is_reported_as_error():
+    service, _ = _service([], [])
+
+    async def broken(query, size=100):
+        raise ConnectionError("cluster unreachable")
+
+    service.elasticsearch.search_threats = broken
+    result = asyncio.run(service.search_threats("q"))
+    assert result["complete"] is False
+    assert result["results"]["elasticsearch"]["error"] == "cluster unreachable"
+    assert service.breakers["elasticsearch"].failure_rate == 1.0
@@ -0,0 +1,96 @@
+"""
+CPE inverted index: CPE parsing, version ordering, interval matching and
+copy-on-write updates.
+"""
+
+import random
+
+from app.services.cpe_index import (
+    CPEIndex, ProductEntries, VersionRange, parse_cpe, version_key
+)
+
+def _criterion(cve_id, version=None, start_inc=None, start_exc=None, end_inc=None, end_exc=None,
+               vendor="acme", product="widget"):
+    return (cve_id, vendor, product, version, start_inc, start_exc, end_inc, end_exc)
+
+def _index(criteria):
+    index = CPEIndex()
+    index._products = {}
+    index.replace(criteria)
+    return index
+
+def test_parse_cpe_formats():
+    assert parse_cpe("cpe:2.3:a:Apache:http_server:2.4.49:*:*:*:*:*:*:*") == ("apache", "http_server", "2.4.49")
+    assert parse_cpe("cpe:2.3:a:acme:widget:*:*:*:*:*:*:*:*") == ("acme", "widget", None)
+    assert parse_cpe(r"cpe:2.3:a:acme:wid\:get:1.0:*:*:*:*:*:*:*") == ("acme", "wid:get", "1.0")
+    assert parse_cpe("cpe:/a:openbsd:openssh:7.4") == ("openbsd", "openssh", "7.4")
+    assert parse_cpe("cpe:2.3:a:*:widget:1.0") is None
+    assert parse_cpe("not a cpe") is None
+
+def test_version_key_orders_numerically():
+    assert version_key("1.10") > version_key("1.9")
+    assert version_key("1.0.rc1") < version_key("1.0.1")
+    assert version_key("2.4.49") == version_key("2.4.49")
+
+def test_exact_and_range_matches():
+    index = _index({
+        "CVE-1": [_criterion("CVE-1", version="1.2.3")],
+        "CVE-2": [_criterion("CVE-2", start_inc="1.0", end_exc="2.0")],
+        "CVE-3": [_criterion("CVE-3", start_exc="1.5")],
+        "CVE-4": [_criterion("CVE-4", end_inc="1.0")],
+    })
+    assert index.match("cpe:2.3:a:acme:widget:1.2.3:*:*:*:*:*:*:*") == {"CVE-1", "CVE-2"}
+    assert index.match("cpe:2.3:a:acme:widget:1.0:*:*:*:*:*:*:*") == {"CVE-2", "CVE-4"}
+    assert index.match("cpe:2.3:a:acme:widget:1.5:*:*:*:*:*:*:*") == {"CVE-2"}
+    assert index.match("cpe:2.3:a:acme:widget:2.0:*:*:*:*:*:*:*") == {"CVE-3"}
+    assert index.match("cpe:2.3:a:acme:widget:*:*:*:*:*:*:*:*") == {"CVE-1", "CVE-2", "CVE-3", "CVE-4"}
+    assert index.match("cpe:2.3:a:acme:gadget:1.0:*:*:*:*:*:*:*") == set()
+    assert index.match("garbage") is None
+
+def test_interval_tree_agrees_with_a_scan():
+    rng = random.Random(7)
+    ranges = []
+    for i in range(300):
+        low = rng.choice([None, rng.randint(0, 100)])
+        high = rng.choice([None, rng.randint(0, 100)])
+        ranges.append(VersionRange(
+            f"CVE-{i}",
+            version_key(str(low)) if low is not None else None, rng.random() < 0.5,
+            version_key(str(high)) if high is not None else None, rng.random() < 0.5
+        ))
+    entries = ProductEntries({}, ranges)
+    for probe in range(-1, 102):
+        version = version_key(str(probe)) if probe >= 0 else ()
+        expected = {r.cve_id for r in ranges if r.contains(version)}
+        assert entries.match(version) == expected
+
+def test_replace_updates_and_removes_cves():
+    index = _index({
+        "CVE-1": [_criterion("CVE-1", start_inc="1.0", end_exc="2.0")],
+        "CVE-2": [_criterion("CVE-2", version="3.0", product="gadget")],
+    })
+    index.replace({
+        "CVE-1": [_criterion("CVE-1", start_inc="2.0")],
+        "CVE-2": [],
+    })
+    assert index.match("cpe:2.3:a:acme:widget:1.5") == set()
+    assert index.match("cpe:2.3:a:acme:widget:2.5") == {"CVE-1"}
+    assert index.match("cpe:2.3:a:acme:gadget:3.0") == set()
+    status = index.get_status()
+    assert status["products"] == 1
+    assert status["cves"] == 1
+
+def test_replace_swaps_in_new_maps():
+    index = _index({"CVE-1": [_criterion("CVE-1", version="1.0")]})
+    products = index._products
+    cves_by_product = index._cves_by_product
+    entries = products[("acme", "widget")]
+
+    index.replace({"CVE-2": [_criterion("CVE-2", version="1.0")]})
+
+    # A lookup holding the previous view still sees it unchanged
+    assert index._products is not products
+    assert products[("acme", "widget")] is entries
+    assert entries.match(version_key("1.0")) == {"CVE-1"}
+    assert cves_by_product[("acme", "widget")] == {"CVE-1"}
+    assert index.match("cpe:2.3:a:acme:widget:1.0") == {"CVE-1", "CVE-2"}
@@ -0,0 +1,74 @@
+"""
+Elasticsearch bulk indexer: per-item outcomes, transient retries and failure
+accounting across partially failed _bulk responses.
+"""
+
+import asyncio
+
+from app.services.elasticsearch_bulk import ElasticsearchBulkIndexer
+
+class FakeCluster:
+    """Answers each _bulk call with the next scripted list of item statuses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def bulk(self, operations):
+        self.requests.append(operations)
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return {"items": [{"index": {"status": status, "error": "rejected"}} for status in response]}
+
+class FakeService:
+    index_prefix = "rtip-test"
+
+    def __init__(self, cluster):
+        self.es_client = cluster
+
+    def build_document(self, threat_data):
+        return dict(threat_data)
+
+def _run(cluster, documents, max_retries=2):
+    indexer = ElasticsearchBulkIndexer(FakeService(cluster))
+    indexer.flush_interval = 0.01
+    indexer.max_retries = max_retries
+
+    async def main():
+        futures = [await indexer.submit({"value": value}) for value in documents]
+        await indexer.close()
+        return await asyncio.gather(*futures)
+
+    return indexer, asyncio.run(main())
+
+def test_partial_failure_counts_each_item_once():
+    cluster = FakeCluster([201, 400, 429], [201])
+    indexer, results = _run(cluster, ["a", "b", "c"])
+    assert results == [True, False, True]
+    assert indexer.stats["documents_indexed"] == 2
+    assert indexer.stats["documents_failed"] == 1
+    assert indexer.stats["documents_retried"] == 1
+    # Only the rejected item was resent
+    assert len(cluster.requests[1]) == 2
+
+def test_error_on_retry_only_fails_unsettled_items():
+    cluster = FakeCluster([201, 400, 503], ConnectionError("node lost"))
+    indexer, results = _run(cluster, ["a", "b", "c"])
+    assert results == [True, False, False]
+    assert indexer.stats["documents_indexed"] == 1
+    assert indexer.stats["documents_failed"] == 2
+
+def test_exhausted_retries_fail_once():
+    cluster = FakeCluster([429, 201], [429], [429])
+    indexer, results = _run(cluster, ["a", "b"])
+    assert results == [False, True]
+    assert indexer.stats["documents_failed"] == 1
+    assert indexer.stats["documents_retried"] == 2
+
+def test_items_missing_from_the_response_are_retried():
+    cluster = FakeCluster([201], [201])
+    indexer, results = _run(cluster, ["a", "b"])
+    assert results == [True, True]
+    assert indexer.stats["documents_indexed"] == 2
+    assert indexer.stats["documents_failed"] == 0
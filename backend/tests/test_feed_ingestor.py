@@ -0,0 +1,44 @@
+"""
+Feed ingestion checkpoints: item timestamps compare against the stored
+watermark whatever their timezone spelling.
+"""
+
+from datetime import datetime
+
+from app.services.feed_ingestor import FeedIngestor
+
+FEED = {"name": "Test Feed", "url": "https://feed.example", "type": "ip_blacklist", "active": True}
+
+def test_item_timestamps_are_naive_utc():
+    ingestor = FeedIngestor()
+    expected = datetime(2026, 10, 19, 10, 30)
+    for value in ("2026-10-19T10:30:00Z", "2026-10-19T10:30:00+00:00", "2026-10-19T12:30:00+02:00", "2026-10-19T10:30:00"):
+        assert ingestor._item_timestamp({"last_seen": value}) == expected
+    assert ingestor._item_timestamp({"metadata": {"detection_time": "not a date"}}) is None
+    assert ingestor._item_timestamp({}) is None
+
+def test_zoned_items_are_filtered_by_the_watermark(db, run):
+    ingestor = FeedIngestor()
+    threats = [
+        {"value": "10.0.0.1", "type": "ip", "severity": "High", "last_seen": "2026-10-19T10:00:00Z"},
+        {"value": "10.0.0.2", "type": "ip", "severity": "High", "metadata": {"detection_time": "2026-10-19T11:00:00+00:00"}},
+    ]
+
+    async def feed_data(feed):
+        return list(threats)
+
+    ingestor._simulate_threat_data = feed_data
+
+    async def main():
+        first = await ingestor._ingest_feed(FEED)
+        threats.append({"value": "10.0.0.3", "type": "ip", "severity": "Low", "last_seen": "2026-10-19T14:00:00+02:00"})
+        second = await ingestor._ingest_feed(FEED)
+        return first, second
+
+    first, second = run(main())
+    assert first == 2
+    # Only the item past the 11:00 UTC watermark is new work
+    assert second == 1
+    progress = ingestor.ingestion_stats["feeds"]["Test Feed"]
+    assert progress["errors"] == 0
+    assert progress["watermark"] == datetime(2026, 10, 19, 12, 0)
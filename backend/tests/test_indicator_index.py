@@ -0,0 +1,115 @@
+"""
+In-memory indicator match index: lookups, copy-on-write snapshots and
+incremental refresh from the database.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import update
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import IndicatorType, ThreatIndicator, ThreatSeverity
+from app.services.indicator_index import IndicatorMatchIndex, IndexSnapshot
+
+def _entry(id, value, confidence=0.5):
+    return {
+        "id": id, "value": value, "type": None, "severity": None, "confidence": confidence,
+        "source": "test", "first_seen": None, "last_seen": None, "extra_metadata": {},
+    }
+
+def _snapshot(*entries):
+    snapshot = IndexSnapshot()
+    for entry in entries:
+        snapshot.add(entry)
+    return snapshot
+
+def _matched(snapshot, indicator):
+    entry, kind = snapshot.match(indicator)
+    return (entry["id"] if entry else None, kind)
+
+def test_match_kinds():
+    snapshot = _snapshot(
+        _entry(1, "198.51.100.7"),
+        _entry(2, "10.0.0.0/8"),
+        _entry(3, "10.1.0.0/16"),
+        _entry(4, "Evil.COM"),
+        _entry(5, "http://bad.example/kit/"),
+        _entry(6, "2001:db8::/32"),
+    )
+    assert _matched(snapshot, "198.51.100.7") == (1, "exact")
+    assert _matched(snapshot, "10.1.2.3") == (3, "cidr")
+    assert _matched(snapshot, "10.200.0.1") == (2, "cidr")
+    assert _matched(snapshot, "2001:DB8::5") == (6, "cidr")
+    assert _matched(snapshot, "evil.com") == (4, "exact")
+    assert _matched(snapshot, "cdn.login.evil.com") == (4, "domain_suffix")
+    assert _matched(snapshot, "http://bad.example/kit/stage2.php?x=1") == (5, "url_prefix")
+    assert _matched(snapshot, "http://bad.example/kitten") == (None, None)
+    assert _matched(snapshot, "notevil.com") == (None, None)
+
+def test_copies_leave_the_original_untouched():
+    original = _snapshot(_entry(1, "10.0.0.0/8"), _entry(2, "evil.com"), _entry(3, "a.example"))
+    stats = original.get_stats()
+
+    changed = original.copy()
+    changed.add(_entry(4, "10.1.0.0/16"))
+    changed.add(_entry(5, "login.evil.com"))
+    changed.remove(1)
+    changed.remove(3)
+
+    assert original.get_stats() == stats
+    assert _matched(original, "10.1.2.3") == (1, "cidr")
+    assert _matched(original, "x.login.evil.com") == (2, "domain_suffix")
+    assert _matched(original, "a.example") == (3, "exact")
+
+    assert _matched(changed, "10.1.2.3") == (4, "cidr")
+    assert _matched(changed, "10.2.0.1") == (None, None)
+    assert _matched(changed, "x.login.evil.com") == (5, "domain_suffix")
+    assert _matched(changed, "a.example") == (None, None)
+
+def test_removing_one_owner_of_a_key_restores_the_other():
+    snapshot = _snapshot(_entry(1, "evil.com", confidence=0.9), _entry(2, "EVIL.com", confidence=0.4))
+    assert snapshot.owners["evil.com"] == {1, 2}
+    copy = snapshot.copy()
+    copy.remove(1)
+    assert _matched(copy, "evil.com") == (2, "exact")
+    assert _matched(copy, "www.evil.com") == (2, "domain_suffix")
+    assert snapshot.owners["evil.com"] == {1, 2}
+
+def test_refresh_swaps_in_a_new_snapshot(db, run):
+    stamp = datetime(2026, 1, 1, 12, 0, 0)
+
+    async def main():
+        index = IndicatorMatchIndex()
+        async with AsyncSessionLocal() as session:
+            for value in ("evil.com", "10.0.0.0/8"):
+                session.add(ThreatIndicator(
+                    value=value, type=IndicatorType.DOMAIN, severity=ThreatSeverity.HIGH,
+                    confidence=0.5, is_active=True, updated_at=stamp
+                ))
+            await session.commit()
+        await index.rebuild()
+        before = index._snapshot
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                update(ThreatIndicator).where(ThreatIndicator.value == "evil.com")
+                .values(is_active=False, updated_at=stamp + timedelta(minutes=5))
+            )
+            session.add(ThreatIndicator(
+                value="bad.example", type=IndicatorType.DOMAIN, severity=ThreatSeverity.LOW,
+                confidence=0.2, is_active=True, updated_at=stamp + timedelta(minutes=3)
+            ))
+            await session.commit()
+        await index.refresh()
+        return index, before
+
+    index, before = run(main())
+    assert index._snapshot is not before
+    assert _matched(before, "evil.com") == (1, "exact")
+    assert _matched(before, "bad.example") == (None, None)
+    assert index.match("evil.com") == (None, None)
+    assert index.match("bad.example")[1] == "exact"
+    assert index.match("10.9.9.9")[1] == "cidr"
+    # Watermark is the newest updated_at the database returned
+    assert index._watermark == stamp + timedelta(minutes=5)
+    assert index.generation == 2
@@ -0,0 +1,93 @@
+"""
+Threat indicator matching: values are normalized on write, exact lookups use
+the normalized form, and CIDR containment resolves the most specific network.
+"""
+
+import pytest
+from pydantic import BaseModel
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import IndicatorType, ThreatIndicator, ThreatSeverity
+from app.crud import crud_threat
+from app.services.indicator_index import indicator_index
+
+SHA256 = "E3B0C44298FC1C149AFBF4C8996FB92427AE41E4649B934CA495991B7852B855"
+
+class IndicatorFields(BaseModel):
+    """The ThreatIndicator columns create_threat_indicator copies from its input."""
+    value: str
+    type: IndicatorType = IndicatorType.FILE_HASH
+    severity: ThreatSeverity = ThreatSeverity.HIGH
+    confidence: float = 0.5
+    source: str = "test"
+
+async def _add(value, type=IndicatorType.IP, confidence=0.5, is_active=True):
+    async with AsyncSessionLocal() as session:
+        threat = ThreatIndicator(
+            value=value, type=type, severity=ThreatSeverity.HIGH,
+            confidence=confidence, source="test", is_active=is_active
+        )
+        session.add(threat)
+        await session.commit()
+        return threat.id
+
+@pytest.fixture
+def no_index():
+    """Keep the shared match index out of (or restore it after) a test."""
+    snapshot = indicator_index._snapshot
+    indicator_index._snapshot = None
+    yield
+    indicator_index._snapshot = snapshot
+
+def test_values_are_normalized_on_create(db, run):
+    async def main():
+        async with AsyncSessionLocal() as session:
+            created = await crud_threat.create_threat_indicator(session, IndicatorFields(value=f"  {SHA256} "))
+            by_value = await crud_threat.get_threat_by_value(session, SHA256, IndicatorType.FILE_HASH)
+            matches = await crud_threat.match_indicators(session, [SHA256, SHA256.lower()])
+            return created, by_value, matches
+
+    created, by_value, matches = run(main())
+    assert created.value == SHA256.lower()
+    assert by_value.id == created.id
+    assert {indicator: (threat.id, kind) for indicator, (threat, kind) in matches.items()} == {
+        SHA256: (created.id, "exact"), SHA256.lower(): (created.id, "exact")
+    }
+
+def test_sightings_are_recorded_against_the_normalized_value(db, run):
+    async def main():
+        async with AsyncSessionLocal() as session:
+            first = await crud_threat.record_sighting(
+                session, IndicatorType.DOMAIN, "Evil[.]COM", ThreatSeverity.LOW, 0.3, "test"
+            )
+            second = await crud_threat.record_sighting(
+                session, IndicatorType.DOMAIN, "evil.com.", ThreatSeverity.HIGH, 0.8, "test"
+            )
+            return first.id, second.id, second.value, second.severity
+
+    first_id, second_id, value, severity = run(main())
+    assert first_id == second_id
+    assert value == "evil.com"
+    assert severity == ThreatSeverity.HIGH
+
+@pytest.mark.parametrize("use_index", [False, True])
+def test_cidr_matches_prefer_the_most_specific_network(db, run, no_index, use_index):
+    async def main():
+        wide = await _add("10.0.0.0/8")
+        narrow = await _add("10.1.0.0/16")
+        await _add("10.1.2.0/24", is_active=False)
+        v6 = await _add("2001:db8::/32")
+        if use_index:
+            await indicator_index.rebuild()
+        async with AsyncSessionLocal() as session:
+            matches = await crud_threat.match_indicators(
+                session, ["10.1.2.3", "10.9.9.9", "2001:DB8::1", "192.0.2.1"], fuzzy=True
+            )
+        return {"wide": wide, "narrow": narrow, "v6": v6}, matches
+
+    ids, matches = run(main())
+    found = {indicator: (threat.id if threat else None, kind) for indicator, (threat, kind) in matches.items()}
+    assert found["10.1.2.3"] == (ids["narrow"], "cidr")
+    assert found["10.9.9.9"] == (ids["wide"], "cidr")
+    assert found["2001:DB8::1"] == (ids["v6"], "cidr")
+    assert found["192.0.2.1"] == (None, None)
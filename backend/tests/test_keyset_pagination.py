@@ -0,0 +1,95 @@
+"""
+Keyset pagination over (sort key, id), including rows with a NULL sort key.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event, update
+
+from app.db.database import AsyncSessionLocal, engine
+from app.db.models import CVEData, IndicatorType, ThreatIndicator
+from app.crud.crud_cve import get_cves_page
+from app.crud.crud_threat import get_threats_page
+
+BASE = datetime(2026, 1, 1)
+
+async def _seed_threats(count: int, undated=()):
+    async with AsyncSessionLocal() as session:
+        for i in range(count):
+            session.add(ThreatIndicator(
+                value=f"10.0.{i // 250}.{i % 250}", type=IndicatorType.IP,
+                confidence=0.5, is_active=True, last_seen=BASE + timedelta(minutes=i)
+            ))
+        await session.commit()
+        if undated:
+            await session.execute(
+                update(ThreatIndicator).where(ThreatIndicator.id.in_(undated)).values(last_seen=None)
+            )
+            await session.commit()
+
+async def _walk(page_fn, limit):
+    ids, cursor, pages = [], None, 0
+    async with AsyncSessionLocal() as session:
+        while True:
+            rows, cursor = await page_fn(session, cursor=cursor, limit=limit)
+            ids.extend(row.id for row in rows)
+            pages += 1
+            assert pages < 100, "pagination did not terminate"
+            if not cursor:
+                return ids
+
+def test_threat_pages_cover_every_row_with_undated_last(db, run):
+    run(_seed_threats(7, undated=(2, 4, 5)))
+    ids = run(_walk(get_threats_page, 2))
+    assert ids == [7, 6, 3, 1, 5, 4, 2]
+
+def test_threat_pages_with_only_undated_rows(db, run):
+    run(_seed_threats(3, undated=(1, 2, 3)))
+    assert run(_walk(get_threats_page, 2)) == [3, 2, 1]
+
+def test_cve_pages_cover_every_row_with_undated_last(db, run):
+    async def seed():
+        async with AsyncSessionLocal() as session:
+            for i in range(5):
+                session.add(CVEData(
+                    id=f"CVE-2026-000{i}", is_active=True,
+                    published_date=None if i % 2 else BASE + timedelta(days=i)
+                ))
+            await session.commit()
+    run(seed())
+    assert run(_walk(get_cves_page, 2)) == [
+        "CVE-2026-0004", "CVE-2026-0002", "CVE-2026-0000", "CVE-2026-0003", "CVE-2026-0001"
+    ]
+
+def test_invalid_cursor_raises_value_error(db, run):
+    async def page():
+        async with AsyncSessionLocal() as session:
+            await get_threats_page(session, cursor="not-a-cursor")
+    with pytest.raises(ValueError):
+        run(page())
+
+@pytest.mark.parametrize("undated_cursor", [False, True])
+def test_deep_page_is_an_index_seek(db, run, undated_cursor):
+    run(_seed_threats(500, undated=(10, 20, 30) if undated_cursor else ()))
+
+    async def plans():
+        async with AsyncSessionLocal() as session:
+            _, cursor = await get_threats_page(session, limit=250 if not undated_cursor else 498)
+            statements = []
+            def record(conn, cursor_, statement, parameters, context, executemany):
+                statements.append((statement, parameters))
+            event.listen(engine.sync_engine, "before_cursor_execute", record)
+            try:
+                await get_threats_page(session, cursor=cursor, limit=1)
+            finally:
+                event.remove(engine.sync_engine, "before_cursor_execute", record)
+        async with engine.connect() as conn:
+            return [
+                " | ".join(row[-1] for row in (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {s}", p)).all())
+                for s, p in statements
+            ]
+
+    for plan in run(plans()):
+        assert "SEARCH threat_indicators USING INDEX ix_threat_indicators_last_seen_id" in plan, plan
+        assert "TEMP B-TREE" not in plan, plan
@@ -0,0 +1,44 @@
+"""
+Event loop watchdog: a blocking callback is recorded with the stack that
+points at it, and the stall closes with its lag once the loop resumes.
+"""
+
+import asyncio
+import time
+
+from app.services.loop_watchdog import LoopWatchdog
+
+def block_the_loop(seconds):
+    time.sleep(seconds)
+
+def test_blocking_call_is_captured():
+    watchdog = LoopWatchdog(interval_ms=10, threshold_ms=50, ring_size=4)
+
+    async def main():
+        watchdog.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        watchdog.stop()
+
+    asyncio.run(main())
+    stalls = watchdog.get_stalls()
+    assert len(stalls) == 1
+    stall = stalls[0]
+    assert "block_the_loop" in stall["offender"]
+    assert stall["ongoing"] is False
+    assert stall["lag_ms"] >= 200
+    assert watchdog.get_status()["stalls"] == 1
+    assert not watchdog.running
+
+def test_idle_loop_records_nothing():
+    watchdog = LoopWatchdog(interval_ms=10, threshold_ms=100, ring_size=4)
+
+    async def main():
+        watchdog.start()
+        await asyncio.sleep(0.2)
+        watchdog.stop()
+
+    asyncio.run(main())
+    assert watchdog.get_stalls() == []
+    assert watchdog.stats["max_lag_ms"] < 100
@@ -0,0 +1,105 @@
+"""
+Persisted system metrics: incremental flushes, rollup merging, tier selection
+and per-tier retention.
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.db.database import AsyncSessionLocal
+from app.db.models import SystemMetric, SystemMetricRollupDaily, SystemMetricRollupMinute
+from app.services.metrics_store import MetricsStore
+from app.services.monitoring import MetricsSampler
+
+EPOCH = datetime(1970, 1, 1)
+
+def _ts(moment: datetime) -> float:
+    return (moment - EPOCH).total_seconds()
+
+def _store():
+    sampler = MetricsSampler(interval=5, capacity=64)
+    return MetricsStore(sampler), sampler.ring
+
+async def _rows(model, name="cpu_usage"):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(select(model).where(model.metric_name == name).order_by(model.id))
+        return result.scalars().all()
+
+def test_flush_persists_new_samples_and_merges_rollups(db, run):
+    store, ring = _store()
+    minute = datetime(2026, 10, 19, 10, 0)
+
+    async def main():
+        ring.append(_ts(minute + timedelta(seconds=5)), {"cpu_usage": 10.0, "memory_usage": 50.0})
+        ring.append(_ts(minute + timedelta(seconds=10)), {"cpu_usage": 30.0})
+        first = await store.flush()
+        again = await store.flush()
+        ring.append(_ts(minute + timedelta(seconds=15)), {"cpu_usage": 20.0})
+        ring.append(_ts(minute + timedelta(seconds=65)), {"cpu_usage": 40.0})
+        second = await store.flush()
+        async with AsyncSessionLocal() as session:
+            raw = (await session.execute(select(func.count()).select_from(SystemMetric))).scalar()
+        return first, again, second, raw, await _rows(SystemMetricRollupMinute), await _rows(SystemMetricRollupDaily)
+
+    first, again, second, raw, minutes, days = run(main())
+    # NaN fields are skipped; nothing is written twice
+    assert (first, again, second) == (3, 0, 2)
+    assert raw == 5
+    assert [(row.bucket, row.sample_count, row.value_min, row.value_max) for row in minutes] == [
+        (minute, 3, 10.0, 30.0),
+        (minute + timedelta(minutes=1), 1, 40.0, 40.0),
+    ]
+    assert minutes[0].value_sum == 60.0
+    assert [(row.sample_count, row.value_sum) for row in days] == [(4, 100.0)]
+
+def test_query_reads_rollup_averages(db, run):
+    store, ring = _store()
+    minute = datetime(2026, 10, 19, 10, 0)
+
+    async def main():
+        for second, value in ((0, 10.0), (30, 20.0), (60, 50.0)):
+            ring.append(_ts(minute + timedelta(seconds=second)), {"cpu_usage": value})
+        await store.flush()
+        return await store.query(["cpu_usage"], minute + timedelta(seconds=20), minute + timedelta(minutes=5), tier="1m")
+
+    result = run(main())
+    series = result["series"]["cpu_usage"]
+    # The bucket containing the start is included
+    assert series["timestamps"] == [minute.isoformat(), (minute + timedelta(minutes=1)).isoformat()]
+    assert series["avg"] == [15.0, 50.0]
+    assert series["samples"] == [2, 1]
+    assert result["resolution_seconds"] == 60
+
+def test_select_tier_respects_retention_and_point_budget():
+    store, _ = _store()
+    store.max_points = 1000
+    now = datetime.utcnow()
+    assert store.select_tier(now - timedelta(hours=1), now) == "raw"
+    # Twelve hours of 5s samples are retained raw but exceed the point budget
+    assert store.select_tier(now - timedelta(hours=12), now) == "1m"
+    assert store.select_tier(now - timedelta(days=2), now) == "1h"
+    assert store.select_tier(now - timedelta(days=30), now) == "1h"
+    assert store.select_tier(now - timedelta(days=365), now) == "1d"
+
+def test_purge_applies_each_tier_retention(db, run, monkeypatch):
+    monkeypatch.setattr(settings, "SYSTEM_METRICS_RAW_RETENTION_HOURS", 1)
+    monkeypatch.setattr(settings, "SYSTEM_METRICS_1M_RETENTION_DAYS", 1)
+    monkeypatch.setattr(settings, "SYSTEM_METRICS_PURGE_BATCH_SIZE", 2)
+    store, ring = _store()
+    now = datetime.utcnow()
+
+    async def main():
+        for age in (timedelta(hours=30), timedelta(hours=3), timedelta(hours=2), timedelta(minutes=5)):
+            ring.append(_ts(now - age), {"cpu_usage": 1.0})
+        await store.flush()
+        removed = await store.purge()
+        return removed, await _rows(SystemMetric), await _rows(SystemMetricRollupMinute)
+
+    removed, raw, minutes = run(main())
+    assert removed["raw"] == 3
+    assert removed["1m"] == 1
+    assert removed["1d"] == 0
+    assert len(raw) == 1
+    assert len(minutes) == 3
@@ -0,0 +1,70 @@
+"""
+System metrics ring buffer: ordering across wrap-around, time-window
+snapshots and consistent copies while the sampler thread writes.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from app.services.monitoring import SAMPLE_FIELDS, MetricsRing, SystemMonitor
+
+def _sample(value):
+    return {field: float(value) for field in SAMPLE_FIELDS}
+
+def test_snapshot_is_oldest_first_after_wrapping():
+    ring = MetricsRing(4)
+    for i in range(6):
+        ring.append(float(i), _sample(i))
+    snapshot = ring.snapshot()
+    assert snapshot["timestamp"].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert snapshot["cpu_usage"].tolist() == [2.0, 3.0, 4.0, 5.0]
+    assert ring.latest()["timestamp"] == 5.0
+
+def test_snapshot_window_and_empty_ring():
+    ring = MetricsRing(8)
+    assert ring.latest() is None
+    assert ring.snapshot()["timestamp"].size == 0
+    now = time.time()
+    ring.append(now - 120, _sample(1))
+    ring.append(now - 5, {"cpu_usage": 2.0})
+    snapshot = ring.snapshot(seconds=60)
+    assert snapshot["cpu_usage"].tolist() == [2.0]
+    # Fields missing from a sample are stored as NaN
+    assert np.isnan(snapshot["memory_usage"][0])
+
+def test_snapshot_is_consistent_under_concurrent_appends():
+    ring = MetricsRing(16)
+    stop = threading.Event()
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            ring.append(float(i), _sample(i))
+            i += 1
+
+    thread = threading.Thread(target=writer, daemon=True)
+    thread.start()
+    try:
+        for _ in range(2000):
+            snapshot = ring.snapshot()
+            timestamps = snapshot["timestamp"]
+            # Rows are whole and in order: no slot was overwritten mid-copy
+            assert np.all(np.diff(timestamps) == 1.0)
+            for field in SAMPLE_FIELDS:
+                assert np.array_equal(snapshot[field], timestamps)
+    finally:
+        stop.set()
+        thread.join()
+
+def test_history_summarizes_the_buffer():
+    monitor = SystemMonitor()
+    now = time.time()
+    for i, cpu in enumerate((10.0, 30.0, 20.0)):
+        monitor.sampler.ring.append(now - 3 + i, {"cpu_usage": cpu})
+    history = monitor.get_history()
+    assert history["samples"] == 3
+    assert history["series"]["cpu_usage"] == [10.0, 30.0, 20.0]
+    assert history["summary"]["cpu_usage"] == {"min": 10.0, "avg": 20.0, "max": 30.0}
+    assert history["summary"]["memory_usage"] is None
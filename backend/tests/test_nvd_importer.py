@@ -0,0 +1,145 @@
+"""
+NVD import pipeline: streaming array decoding across chunk boundaries, item
+normalization for both feed layouts, and file imports into cve_data,
+cpe_matches and the CPE index with a stored watermark.
+"""
+
+import gzip
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import CPEMatch, CVEData
+from app.services.cpe_index import cpe_index
+from app.services.nvd_importer import NVDImporter, NVDStreamParser, parse_nvd_item
+
+def _api_item(cve_id, modified, score=9.8, criteria=None, status="Analyzed"):
+    return {"cve": {
+        "id": cve_id,
+        "published": "2026-01-01T00:00:00.000",
+        "lastModified": modified,
+        "vulnStatus": status,
+        "descriptions": [{"lang": "es", "value": "Desbordamiento"}, {"lang": "en", "value": f"Overflow in {cve_id}"}],
+        "references": [{"url": "https://a.example"}, {"url": "https://a.example"}],
+        "weaknesses": [{"description": [{"lang": "en", "value": "CWE-787"}, {"lang": "en", "value": "NVD-CWE-Other"}]}],
+        "metrics": {"cvssMetricV31": [
+            {"type": "Secondary", "cvssData": {"baseScore": 1.0}},
+            {"type": "Primary", "cvssData": {"baseScore": score}},
+        ]},
+        "configurations": [{"nodes": [{"cpeMatch": criteria if criteria is not None else [
+            {"vulnerable": True, "criteria": "cpe:2.3:a:acme:widget:*:*:*:*:*:*:*:*",
+             "versionStartIncluding": "1.0", "versionEndExcluding": "2.0"},
+            {"vulnerable": False, "criteria": "cpe:2.3:o:acme:os:-:*:*:*:*:*:*:*"},
+        ]}]}],
+    }}
+
+def _document(items):
+    return json.dumps({"resultsPerPage": len(items), "totalResults": len(items), "vulnerabilities": items})
+
+def test_stream_parser_handles_any_chunking():
+    items = [_api_item(f"CVE-2026-{i:04d}", "2026-02-01T00:00:00.000") for i in range(3)]
+    text = _document(items)
+    for size in (1, 7, 64, len(text)):
+        parser = NVDStreamParser()
+        decoded = []
+        for start in range(0, len(text), size):
+            decoded.extend(parser.feed(text[start:start + size]))
+        parser.close()
+        assert decoded == items
+        assert parser.total_results == 3
+
+def test_stream_parser_rejects_a_truncated_document():
+    parser = NVDStreamParser()
+    parser.feed(_document([_api_item("CVE-2026-0001", "2026-02-01T00:00:00.000")])[:-40])
+    with pytest.raises(ValueError):
+        parser.close()
+
+def test_parse_api_item():
+    record = parse_nvd_item(_api_item("CVE-2026-0001", "2026-02-01T10:00:00Z"))
+    assert record["id"] == "CVE-2026-0001"
+    assert record["description"] == "Overflow in CVE-2026-0001"
+    assert record["cvss_score"] == 9.8
+    assert record["modified_date"] == datetime(2026, 2, 1, 10, 0)
+    assert record["references"] == ["https://a.example"]
+    assert record["tags"] == ["CWE-787"]
+    # Non-vulnerable criteria are dropped
+    assert record["affected_products"] == ["cpe:2.3:a:acme:widget:*:*:*:*:*:*:*:*"]
+    assert record["cpe_matches"][0]["version_end_excluding"] == "2.0"
+    assert record["is_active"] is True
+    assert parse_nvd_item(_api_item("CVE-2026-0002", "2026-02-01T00:00:00.000", status="Rejected"))["is_active"] is False
+
+def test_parse_legacy_feed_item():
+    record = parse_nvd_item({
+        "cve": {
+            "CVE_data_meta": {"ID": "CVE-2019-0001"},
+            "description": {"description_data": [{"lang": "en", "value": "Old bug"}]},
+            "references": {"reference_data": [{"url": "https://b.example"}]},
+            "problemtype": {"problemtype_data": [{"description": [{"value": "CWE-79"}]}]},
+        },
+        "configurations": {"nodes": [{"children": [{"cpe_match": [
+            {"vulnerable": True, "cpe23Uri": "cpe:2.3:a:acme:widget:1.2:*:*:*:*:*:*:*"}
+        ]}]}]},
+        "impact": {"baseMetricV2": {"cvssV2": {"baseScore": 5.0}}},
+        "publishedDate": "2019-01-01T00:00Z",
+        "lastModifiedDate": "2019-02-01T00:00Z",
+    })
+    assert record["id"] == "CVE-2019-0001"
+    assert record["cvss_score"] == 5.0
+    assert record["tags"] == ["CWE-79"]
+    assert record["affected_products"] == ["cpe:2.3:a:acme:widget:1.2:*:*:*:*:*:*:*"]
+    assert record["modified_date"] == datetime(2019, 2, 1)
+
+def test_import_file_writes_cves_matches_and_index(db, run, tmp_path):
+    first = tmp_path / "nvd-1.json.gz"
+    with gzip.open(first, "wt", encoding="utf-8") as handle:
+        handle.write(_document([
+            _api_item("CVE-2026-0001", "2026-02-01T00:00:00.000"),
+            _api_item("CVE-2026-0002", "2026-02-02T00:00:00.000", score=4.0, criteria=[
+                {"vulnerable": True, "criteria": "cpe:2.3:a:acme:gadget:3.1:*:*:*:*:*:*:*"}
+            ]),
+            # An older copy in a later batch changes neither the row nor its criteria
+            _api_item("CVE-2026-0001", "2026-01-15T00:00:00.000", score=1.0, criteria=[
+                {"vulnerable": True, "criteria": "cpe:2.3:a:acme:legacy:1.0:*:*:*:*:*:*:*"}
+            ]),
+        ]))
+    second = tmp_path / "nvd-2.json"
+    second.write_text(_document([
+        _api_item("CVE-2026-0001", "2026-01-20T00:00:00.000"),  # not newer than modified_since
+        _api_item("CVE-2026-0002", "2026-03-01T00:00:00.000", criteria=[]),
+    ]))
+
+    async def main():
+        await cpe_index.load()
+        importer = NVDImporter(batch_size=2)
+        status = await importer.import_file(str(first))
+        before = cpe_index.match("cpe:2.3:a:acme:gadget:3.1")
+        await importer.import_file(str(second), modified_since=datetime(2026, 2, 1))
+        async with AsyncSessionLocal() as session:
+            cves = {cve.id: cve for cve in (await session.execute(select(CVEData))).scalars().all()}
+            matches = (await session.execute(select(CPEMatch.cve_id, CPEMatch.product))).all()
+        return status, before, importer, cves, matches, await importer.get_watermark()
+
+    status, before, importer, cves, matches, watermark = run(main())
+    assert status["status"] == "completed"
+    assert status["records_read"] == 3
+    assert status["records_written"] == 2
+    assert status["records_skipped"] == 1
+    assert status["total_expected"] == 3
+    assert before == {"CVE-2026-0002"}
+
+    # The newest copy won and severities were derived from the scores
+    assert cves["CVE-2026-0001"].cvss_score == 9.8
+    assert cves["CVE-2026-0001"].severity == "Critical"
+    assert cves["CVE-2026-0002"].modified_date == datetime(2026, 3, 1)
+
+    second_status = importer.get_status()
+    assert second_status["records_skipped"] == 1
+    assert second_status["records_written"] == 1
+    # CVE-2026-0002's criteria were replaced by an empty list
+    assert [(cve_id, product) for cve_id, product in matches] == [("CVE-2026-0001", "widget")]
+    assert cpe_index.match("cpe:2.3:a:acme:gadget:3.1") == set()
+    assert cpe_index.match("cpe:2.3:a:acme:widget:1.5") == {"CVE-2026-0001"}
+    assert watermark == datetime(2026, 3, 1)
@@ -0,0 +1,67 @@
+"""
+Aho-Corasick indicator scanning: offsets, token boundaries and one match per
+normalized indicator value.
+"""
+
+import asyncio
+
+from app.services.indicator_index import IndicatorMatchIndex, IndexSnapshot
+from app.services.pattern_scanner import (
+    AhoCorasickAutomaton, IndicatorScanner, _build_automaton, _scan_document
+)
+
+def _entry(id, value, confidence=0.5):
+    return {
+        "id": id, "value": value, "type": None, "severity": None, "confidence": confidence,
+        "source": "test", "first_seen": None, "last_seen": None, "extra_metadata": {},
+    }
+
+def _scan(entries, text, min_length=4):
+    automaton = _build_automaton([(entry["value"].lower(), entry) for entry in entries], min_length)
+    return _scan_document(automaton, text, 100)
+
+def test_overlapping_patterns_are_all_reported_case_insensitively():
+    automaton = AhoCorasickAutomaton([("he", 0), ("she", 1), ("hers", 2), ("his", 3)])
+    matches = sorted(automaton.iter_matches("uSHErs"))
+    assert [(start, end, automaton.payloads[pattern]) for start, end, pattern in matches] == [
+        (1, 4, 1), (2, 4, 0), (2, 6, 2)
+    ]
+
+def test_offsets_refer_to_the_original_text():
+    # "İ" lowercases to two characters; offsets after it must not drift
+    [match] = _scan([_entry(1, "evil.com")], "İİ visit EVIL.com now")
+    assert match["offset"] == 9
+    assert match["matched_text"] == "EVIL.com"
+
+def test_matches_respect_token_boundaries():
+    entries = [_entry(1, "1.2.3.4"), _entry(2, "evil.com")]
+    assert _scan(entries, "from 11.2.3.45 and notevil.community") == []
+    found = _scan(entries, "from 1.2.3.4, see https://evil.com/x.")
+    assert [match["entry"]["id"] for match in found] == [1, 2]
+
+def test_short_values_and_networks_are_not_patterns():
+    assert _scan([_entry(1, "a.io"), _entry(2, "10.0.0.0/8")], "a.io 10.0.0.0/8", min_length=5) == []
+
+def test_indicators_sharing_a_normalized_value_match_once():
+    entries = [_entry(1, "EVIL.com", confidence=0.4), _entry(2, "evil.com", confidence=0.9), _entry(3, "bad.org")]
+    matches = _scan(entries, "evil.com and bad.org")
+    assert len(matches) == 2
+    assert matches[0]["entry"]["id"] == 2
+    assert [entry["id"] for entry in matches[0]["entries"]] == [2, 1]
+    assert [entry["id"] for entry in matches[1]["entries"]] == [3]
+
+def test_scanner_compiles_from_the_match_index():
+    index = IndicatorMatchIndex()
+    snapshot = IndexSnapshot()
+    for entry in (_entry(1, "Evil.com"), _entry(2, "evil.com"), _entry(3, "198.51.100.7")):
+        snapshot.add(entry)
+    index._snapshot = snapshot
+
+    scanner = IndicatorScanner()
+    scanner.attach(index)
+    asyncio.run(scanner.rebuild())
+
+    [first, second] = scanner.scan_many(["GET http://evil.com/ from 198.51.100.7", "clean"])
+    assert second == []
+    assert [sorted(entry["id"] for entry in match["entries"]) for match in first] == [[1, 2], [3]]
+    assert scanner.get_status()["patterns"] == 2
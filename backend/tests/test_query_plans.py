@@ -0,0 +1,139 @@
+"""
+Query plan regression tests for the threat indicator hot paths.
+
+Runs the real CRUD queries against an empty SQLite schema, captures the
+statements they emit and checks EXPLAIN QUERY PLAN picks the intended
+composite/partial indexes instead of scanning the table. The PostgreSQL
+variant runs when TEST_POSTGRES_URL points at a scratch database.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.db.database import Base
+from app.crud import crud_threat
+from app.crud.pagination import encode_cursor
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+def _plans(tmp_path, run_queries):
+    """Run ``run_queries(session)`` and return (statement, plan details) per statement."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'plans.db'}")
+    return asyncio.run(_capture(engine, run_queries, "EXPLAIN QUERY PLAN", lambda rows: " | ".join(row[-1] for row in rows)))
+
+async def _capture(engine, run_queries, explain, render):
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+
+        async with AsyncSession(engine) as db:
+            await run_queries(db)
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+        plans = []
+        async with engine.connect() as conn:
+            for statement, parameters in statements:
+                rows = (await conn.exec_driver_sql(f"{explain} {statement}", parameters)).all()
+                plans.append((statement, render(rows)))
+        return plans
+    finally:
+        await engine.dispose()
+
+def test_get_threats_uses_partial_indexes(tmp_path):
+    filters = [
+        ({"severity": "HIGH"}, "ix_threat_indicators_active_severity_last_seen"),
+        ({"type": "IP"}, "ix_threat_indicators_active_type_last_seen"),
+        ({"source": "feed"}, "ix_threat_indicators_active_source_last_seen"),
+        ({}, "ix_threat_indicators_last_seen_id"),
+    ]
+
+    async def run(db):
+        for kwargs, _ in filters:
+            await crud_threat.get_threats(db, **kwargs)
+
+    plans = _plans(tmp_path, run)
+    assert len(plans) == len(filters)
+    for (kwargs, index), (statement, plan) in zip(filters, plans):
+        assert f"USING INDEX {index}" in plan, (kwargs, plan)
+
+def test_get_critical_threats_uses_severity_confidence_index(tmp_path):
+    async def run(db):
+        await crud_threat.get_critical_threats(db)
+
+    [(statement, plan)] = _plans(tmp_path, run)
+    assert "USING INDEX ix_threat_indicators_active_severity_confidence" in plan, plan
+
+def test_threat_stats_queries_use_indexes(tmp_path):
+    async def run(db):
+        await crud_threat.compute_threat_stats(db)
+
+    plans = _plans(tmp_path, run)
+    for statement, plan in plans:
+        assert "INDEX" in plan, (statement, plan)
+
+    by_clause = {statement.split("FROM threat_indicators", 1)[1].strip(): plan for statement, plan in plans}
+    recent = next(plan for clause, plan in by_clause.items() if "created_at >=" in clause)
+    assert "ix_threat_indicators_created_at" in recent
+    for column in ("severity", "type", "source"):
+        grouped = next(plan for clause, plan in by_clause.items() if f"GROUP BY threat_indicators.{column}" in clause)
+        assert "ix_threat_indicators_active_" in grouped, (column, grouped)
+
+@pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL not set")
+def test_postgres_plans_use_indexes():
+    """Same hot paths on PostgreSQL, in a throwaway schema with sequential scans discouraged.
+
+    The tables are empty, so without enable_seqscan=off the planner would
+    (correctly) prefer a sequential scan; this checks the indexes are usable.
+    """
+    schema = f"plans_{uuid.uuid4().hex[:12]}"
+    filters = [
+        ({"severity": "HIGH"}, "ix_threat_indicators_active_severity_last_seen"),
+        ({"type": "IP"}, "ix_threat_indicators_active_type_last_seen"),
+        ({"source": "feed"}, "ix_threat_indicators_active_source_last_seen"),
+        ({}, "ix_threat_indicators_last_seen_id"),
+    ]
+
+    async def run_queries(db):
+        for kwargs, _ in filters:
+            await crud_threat.get_threats(db, **kwargs)
+        await crud_threat.get_critical_threats(db)
+        await crud_threat.get_threats_page(db, cursor=encode_cursor(datetime(2026, 1, 1), 500), limit=50)
+
+    async def main():
+        admin = create_async_engine(POSTGRES_URL)
+        async with admin.begin() as conn:
+            await conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+        try:
+            engine = create_async_engine(POSTGRES_URL, connect_args={
+                "server_settings": {"search_path": schema, "enable_seqscan": "off"}
+            })
+            return await _capture(engine, run_queries, "EXPLAIN", lambda rows: "\n".join(row[0] for row in rows))
+        finally:
+            async with admin.begin() as conn:
+                await conn.exec_driver_sql(f"DROP SCHEMA {schema} CASCADE")
+            await admin.dispose()
+
+    plans = asyncio.run(main())
+    expected = [index for _, index in filters] + [
+        "ix_threat_indicators_active_severity_confidence",
+        "ix_threat_indicators_last_seen_id",
+    ]
+    assert len(plans) >= len(expected)
+    for index, (statement, plan) in zip(expected, plans):
+        assert index in plan, (statement, plan)
+        assert "Seq Scan on threat_indicators" not in plan, (statement, plan)
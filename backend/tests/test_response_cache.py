@@ -0,0 +1,101 @@
+"""
+Dashboard response cache: single-flight loads, ETag revalidation and
+stale-while-revalidate refreshes.
+"""
+
+import asyncio
+import json
+
+import pytest
+from fastapi import Request
+
+from app.services.response_cache import ResponseCache
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+def _loader(calls, value=None, delay=0.0):
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value if value is not None else {"count": len(calls)}
+    return load
+
+def test_concurrent_misses_share_one_load():
+    cache = ResponseCache(max_entries=8, stale_seconds=0)
+    calls = []
+
+    async def main():
+        return await asyncio.gather(*(
+            cache.respond(_request(), "summary", {}, 10, _loader(calls, delay=0.01)) for _ in range(5)
+        ))
+
+    responses = asyncio.run(main())
+    assert len(calls) == 1
+    assert {response.body for response in responses} == {b'{"count":1}'}
+    stats = cache.get_status()["endpoints"]["summary"]
+    assert stats["misses"] == 1 and stats["coalesced"] == 4
+
+def test_matching_etag_gets_not_modified():
+    cache = ResponseCache(max_entries=8, stale_seconds=0)
+
+    async def main():
+        first = await cache.respond(_request(), "summary", {"hours": 24}, 10, _loader([]))
+        second = await cache.respond(_request(first.headers["etag"]), "summary", {"hours": 24}, 10, _loader([]))
+        other = await cache.respond(_request('"nope"'), "summary", {"hours": 24}, 10, _loader([]))
+        return first, second, other
+
+    first, second, other = asyncio.run(main())
+    assert first.headers["x-cache"] == "MISS"
+    assert second.status_code == 304 and second.headers["x-cache"] == "HIT"
+    assert other.status_code == 200
+    assert json.loads(other.body) == {"count": 1}
+
+def test_stale_entries_are_served_while_refreshing():
+    cache = ResponseCache(max_entries=8, stale_seconds=60)
+    calls = []
+
+    async def main():
+        await cache.respond(_request(), "top", {}, 0.01, _loader(calls))
+        await asyncio.sleep(0.02)
+        stale = await cache.respond(_request(), "top", {}, 0.01, _loader(calls))
+        await asyncio.sleep(0.005)
+        fresh = await cache.respond(_request(), "top", {}, 10, _loader(calls))
+        return stale, fresh
+
+    stale, fresh = asyncio.run(main())
+    assert stale.headers["x-cache"] == "STALE"
+    assert stale.body == b'{"count":1}'
+    # The background refresh replaced the entry
+    assert fresh.body == b'{"count":2}'
+    assert len(calls) == 2
+
+def test_loader_errors_are_not_cached():
+    cache = ResponseCache(max_entries=8, stale_seconds=0)
+
+    async def broken():
+        raise RuntimeError("db down")
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await cache.respond(_request(), "summary", {}, 10, broken)
+        return await cache.respond(_request(), "summary", {}, 10, _loader([]))
+
+    assert asyncio.run(main()).status_code == 200
+    assert cache.get_status()["endpoints"]["summary"]["errors"] == 1
+
+def test_entries_are_evicted_and_invalidated():
+    cache = ResponseCache(max_entries=2, stale_seconds=0)
+
+    async def main():
+        for hours in (1, 2, 3):
+            await cache.respond(_request(), "top", {"hours": hours}, 10, _loader([]))
+        await cache.respond(_request(), "summary", {}, 10, _loader([]))
+
+    asyncio.run(main())
+    assert cache.get_status()["entries"] == 2
+    cache.invalidate("top")
+    assert cache.get_status()["entries"] == 1
+    cache.invalidate()
+    assert cache.get_status()["entries"] == 0
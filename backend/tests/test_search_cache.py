@@ -0,0 +1,129 @@
+"""
+Federated search result cache: single-flight loading, TTL, cacheability and
+rate-limited invalidation.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.search_cache import SearchResultCache
+
+def test_concurrent_misses_share_one_load():
+    cache = SearchResultCache(ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"complete": True}
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_load("evil  com", 10, loader) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.stats["misses"] == 1 and cache.stats["coalesced"] == 4
+
+def test_normalized_queries_hit_the_same_entry():
+    cache = SearchResultCache(ttl_seconds=60)
+
+    async def main():
+        await cache.get_or_load("evil com", 10, lambda: asyncio.sleep(0, {"complete": True}))
+        await cache.get_or_load(" evil   com ", 10, lambda: asyncio.sleep(0, {"complete": True}))
+
+    asyncio.run(main())
+    assert cache.stats["hits"] == 1
+
+def test_uncacheable_results_are_not_stored():
+    cache = SearchResultCache(ttl_seconds=60)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"complete": False}
+
+    async def main():
+        for _ in range(3):
+            await cache.get_or_load("q", 10, loader, cacheable=lambda result: result["complete"])
+
+    asyncio.run(main())
+    assert len(calls) == 3
+    assert cache.stats["uncached"] == 3
+    assert cache.get_status()["entries"] == 0
+
+def test_loader_errors_reach_every_waiter_and_are_not_cached():
+    cache = SearchResultCache(ttl_seconds=60)
+
+    async def loader():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("backend down")
+
+    async def main():
+        return await asyncio.gather(
+            *(cache.get_or_load("q", 10, loader) for _ in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get_status()["entries"] == 0
+
+def test_expired_entries_are_reloaded():
+    cache = SearchResultCache(ttl_seconds=0.01)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"complete": True}
+
+    async def main():
+        await cache.get_or_load("q", 10, loader)
+        await asyncio.sleep(0.02)
+        await cache.get_or_load("q", 10, loader)
+
+    asyncio.run(main())
+    assert len(calls) == 2
+
+def test_result_loaded_across_an_invalidation_is_not_stored():
+    cache = SearchResultCache(ttl_seconds=60)
+
+    async def loader():
+        cache.invalidate()
+        return {"complete": True}
+
+    asyncio.run(cache.get_or_load("q", 10, loader))
+    assert cache.get_status()["entries"] == 0
+
+def test_invalidation_requests_are_rate_limited():
+    cache = SearchResultCache(ttl_seconds=60)
+    cache.invalidate_interval = 0.05
+
+    async def main():
+        await cache.get_or_load("q", 10, lambda: asyncio.sleep(0, {"complete": True}))
+        cache.request_invalidation()  # first one runs immediately
+        generation = cache.generation
+        await cache.get_or_load("q", 10, lambda: asyncio.sleep(0, {"complete": True}))
+        for _ in range(50):
+            cache.request_invalidation()
+        assert cache.generation == generation
+        assert cache.get_status()["entries"] == 1
+        await asyncio.sleep(0.08)
+        return generation
+
+    generation = asyncio.run(main())
+    # The burst collapsed into a single deferred invalidation
+    assert cache.generation == generation + 1
+    assert cache.get_status()["entries"] == 0
+    assert cache.stats["invalidations_deferred"] == 1
+
+def test_entries_are_evicted_by_count():
+    cache = SearchResultCache(max_entries=2, ttl_seconds=60)
+
+    async def main():
+        for query in ("a", "b", "c"):
+            await cache.get_or_load(query, 10, lambda: asyncio.sleep(0, {"complete": True}))
+
+    asyncio.run(main())
+    assert cache.get_status()["entries"] == 2
+    assert cache.stats["evictions"] == 1
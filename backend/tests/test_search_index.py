@@ -0,0 +1,61 @@
+"""
+SQLite full-text search indexes stay in sync with their source tables.
+"""
+
+from sqlalchemy import create_engine, delete, text, update
+
+from app.db.database import AsyncSessionLocal, Base, engine
+from app.db.models import CVEData
+from app.db.search_index import install_search_index
+from app.crud.crud_cve import search_cves
+
+async def _search(query):
+    async with AsyncSessionLocal() as session:
+        return sorted(cve.id for cve in await search_cves(session, query))
+
+def test_cve_search_follows_inserts_updates_deletes_and_vacuum(db, run):
+    async def main():
+        async with AsyncSessionLocal() as session:
+            session.add_all([
+                CVEData(id="CVE-2024-1111", description="remote code execution in widget", is_active=True),
+                CVEData(id="CVE-2024-2222", description="heap overflow in parser", is_active=True),
+                CVEData(id="CVE-2024-3333", description="stack overflow in codec", is_active=True),
+            ])
+            await session.commit()
+            await session.execute(
+                update(CVEData).where(CVEData.id == "CVE-2024-2222").values(description="use after free")
+            )
+            await session.execute(delete(CVEData).where(CVEData.id == "CVE-2024-1111"))
+            await session.commit()
+        # VACUUM may renumber implicit rowids; matches must still map to the right CVE
+        async with engine.connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.exec_driver_sql("VACUUM")
+        return {query: await _search(query) for query in ("overflow", "after free", "widget", "2024-33")}
+
+    assert run(main()) == {
+        "overflow": ["CVE-2024-3333"],
+        "after free": ["CVE-2024-2222"],
+        "widget": [],
+        "2024-33": ["CVE-2024-3333"],
+    }
+
+def test_rowid_keyed_cve_index_is_rebuilt(tmp_path):
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with sync_engine.begin() as conn:
+        Base.metadata.create_all(conn)
+        conn.execute(text("INSERT INTO cve_data (id, description) VALUES ('CVE-2023-0001', 'path traversal')"))
+        # Layout installed by earlier versions
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE cve_data_fts USING fts5(id, description, "
+            "content='cve_data', content_rowid='rowid', tokenize='trigram')"
+        ))
+        conn.execute(text("CREATE TRIGGER cve_data_fts_ai AFTER INSERT ON cve_data BEGIN SELECT 1; END"))
+        assert install_search_index(conn)
+
+        conn.execute(text("INSERT INTO cve_data (id, description) VALUES ('CVE-2023-0002', 'path confusion')"))
+        matches = conn.execute(text("SELECT id FROM cve_data_fts WHERE cve_data_fts MATCH '\"path\"' ORDER BY id")).all()
+        keys = conn.execute(text("SELECT id FROM cve_data_fts_keys ORDER BY rowid")).all()
+    sync_engine.dispose()
+    assert [row[0] for row in matches] == ["CVE-2023-0001", "CVE-2023-0002"]
+    assert [row[0] for row in keys] == ["CVE-2023-0001", "CVE-2023-0002"]
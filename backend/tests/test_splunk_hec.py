@@ -0,0 +1,69 @@
+"""
+Splunk HEC batching sender: sends resolve promptly whether or not HEC is
+configured and started.
+"""
+
+import asyncio
+
+from app.services.splunk_hec import SplunkHECSender
+
+def _sender(enabled=True):
+    sender = SplunkHECSender()
+    sender.url = "https://splunk.example:8088" if enabled else ""
+    sender.token = "token" if enabled else ""
+    return sender
+
+def test_send_returns_immediately_when_not_enabled():
+    sender = _sender(enabled=False)
+    result = asyncio.run(asyncio.wait_for(sender.send({"value": "10.0.0.1"}), timeout=1))
+    assert result is False
+    assert sender.client is None
+    assert sender.buffered_events == 0
+
+def test_submit_before_start_does_not_hang():
+    sender = _sender()
+
+    async def main():
+        return await asyncio.wait_for(sender.submit({"value": "10.0.0.1"}), timeout=1)
+
+    assert asyncio.run(main()) is False
+    assert sender.buffered_events == 0
+    assert sender.stats["events_failed"] == 1
+
+def test_send_after_close_does_not_hang():
+    sender = _sender()
+
+    async def post(payload, attempts=3):
+        return True
+
+    sender._post_batch = post
+
+    async def main():
+        await sender.start()
+        await sender.close()
+        return await asyncio.wait_for(sender.submit({"value": "10.0.0.1"}), timeout=1)
+
+    assert asyncio.run(main()) is False
+
+def test_started_sender_batches_events():
+    sender = _sender()
+    sender.max_events = 3
+    payloads = []
+
+    async def post(payload, attempts=3):
+        payloads.append(payload)
+        return True
+
+    sender._post_batch = post
+
+    async def main():
+        await sender.start()
+        results = await asyncio.wait_for(
+            asyncio.gather(*(sender.send({"value": f"10.0.0.{i}"}) for i in range(3))), timeout=1
+        )
+        await sender.close()
+        return results
+
+    assert asyncio.run(main()) == [True, True, True]
+    assert len(payloads) == 1
+    assert sender.stats["events_sent"] == 3
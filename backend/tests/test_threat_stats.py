@@ -0,0 +1,66 @@
+"""
+In-memory threat statistics: reconciliation from the database and
+incremental updates agree with the direct aggregate queries.
+"""
+
+from datetime import datetime, timedelta
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import IndicatorType, ThreatIndicator, ThreatSeverity
+from app.crud.crud_threat import compute_threat_stats
+from app.services.threat_stats import ThreatStatsAggregate, recent_window_start
+
+def test_recent_window_covers_the_current_hour_and_the_23_before():
+    now = datetime(2026, 3, 1, 12, 34, 56)
+    assert recent_window_start(now) == datetime(2026, 2, 28, 13, 0)
+
+def test_reconcile_matches_the_direct_aggregates(db, run):
+    start = recent_window_start()
+    created = [
+        start,                                # first bucket of the window
+        start + timedelta(minutes=59),
+        start + timedelta(hours=23, minutes=1),
+        datetime.utcnow(),
+        start - timedelta(seconds=1),         # just outside
+        start - timedelta(days=3),
+    ]
+
+    async def main():
+        async with AsyncSessionLocal() as session:
+            for i, created_at in enumerate(created):
+                session.add(ThreatIndicator(
+                    value=f"host{i}.example", type=IndicatorType.DOMAIN,
+                    severity=ThreatSeverity.HIGH if i % 2 else ThreatSeverity.LOW,
+                    confidence=0.5, source="feed", is_active=i != 3, created_at=created_at
+                ))
+            await session.commit()
+            direct = await compute_threat_stats(session)
+        stats = ThreatStatsAggregate()
+        await stats.reconcile()
+        return stats, direct
+
+    stats, direct = run(main())
+    aggregate = stats.get_stats()
+    assert aggregate["recent_threats_24h"] == direct["recent_threats_24h"] == 4
+    assert aggregate["total_threats"] == direct["total_threats"] == 6
+    assert aggregate["active_threats"] == direct["active_threats"] == 5
+    assert aggregate["threats_by_severity"] == {"high": 2, "low": 3}
+    # The first hour of the window and the current one
+    assert stats.get_status()["hour_buckets"] == 2
+
+def test_incremental_updates_track_writes():
+    stats = ThreatStatsAggregate()
+    threat = ThreatIndicator(
+        value="evil.com", type=IndicatorType.DOMAIN, severity=ThreatSeverity.LOW,
+        source="feed", is_active=True, created_at=datetime.utcnow()
+    )
+    stats.record_insert(threat)
+    before = stats.key_of(threat)
+    threat.severity = ThreatSeverity.CRITICAL
+    stats.record_update(before, threat)
+    assert stats.get_stats()["threats_by_severity"] == {"critical": 1}
+    assert stats.get_stats()["recent_threats_24h"] == 1
+
+    stats.record_delete(stats.key_of(threat), threat.created_at)
+    result = stats.get_stats()
+    assert result["total_threats"] == 0 and result["recent_threats_24h"] == 0
@@ -0,0 +1,112 @@
+"""
+Single-writer batched write queue: batching, per-operation error propagation
+and the direct-commit path used when the queue is not running.
+"""
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.db.database import AsyncSessionLocal
+from app.db.models import Alert, IndicatorType, ThreatIndicator, ThreatSeverity
+from app.db.write_queue import WriteQueue
+from app.crud import crud_alert, crud_threat
+
+def _indicator(value):
+    async def add(session):
+        threat = ThreatIndicator(value=value, type=IndicatorType.DOMAIN, severity=ThreatSeverity.LOW, confidence=0.1)
+        session.add(threat)
+        return threat
+    return add
+
+async def _count(model):
+    async with AsyncSessionLocal() as session:
+        return (await session.execute(select(func.count()).select_from(model))).scalar()
+
+def test_concurrent_writes_share_one_transaction(db, run):
+    queue = WriteQueue()
+    queue.flush_interval = 0.05
+
+    async def main():
+        await queue.start()
+        threats = await asyncio.gather(*(queue.submit(_indicator(f"host{i}.example")) for i in range(10)))
+        await queue.close()
+        return threats
+
+    threats = run(main())
+    # Rows come back refreshed with their ids
+    assert sorted(threat.id for threat in threats) == list(range(1, 11))
+    assert queue.stats["transactions"] == 1
+    assert queue.stats["operations_committed"] == 10
+    assert queue.stats["last_batch_size"] == 10
+
+def test_a_failing_operation_only_fails_its_own_producer(db, run):
+    queue = WriteQueue()
+    queue.flush_interval = 0.05
+
+    async def broken(session):
+        raise ValueError("bad write")
+
+    async def main():
+        await queue.start()
+        results = await asyncio.gather(
+            queue.submit(_indicator("a.example")),
+            queue.submit(broken),
+            queue.submit(_indicator("a.example")),  # duplicate (type, value)
+            queue.submit(_indicator("b.example")),
+            return_exceptions=True
+        )
+        await queue.close()
+        return results, await _count(ThreatIndicator)
+
+    (first, error, duplicate, last), count = run(main())
+    assert isinstance(first, ThreatIndicator) and isinstance(last, ThreatIndicator)
+    assert isinstance(error, ValueError)
+    assert isinstance(duplicate, IntegrityError)
+    assert count == 2
+    assert queue.stats["batch_fallbacks"] == 1
+    assert queue.stats["operations_failed"] == 2
+    assert queue.stats["operations_committed"] == 2
+
+def test_write_commits_directly_when_not_running(db, run):
+    queue = WriteQueue()
+
+    async def main():
+        async with AsyncSessionLocal() as session:
+            threat_id = (await queue.write(session, _indicator("direct.example"))).id
+            with pytest.raises(IntegrityError):
+                await queue.write(session, _indicator("direct.example"))
+            # The failed write was rolled back; the session is still usable
+            other_id = (await queue.write(session, _indicator("other.example"))).id
+        return threat_id, other_id, await _count(ThreatIndicator)
+
+    threat_id, other_id, count = run(main())
+    assert threat_id and other_id and count == 2
+
+def test_sightings_and_alerts_go_through_the_queue(db, run, monkeypatch):
+    queue = WriteQueue()
+    monkeypatch.setattr(crud_threat, "write_queue", queue)
+    monkeypatch.setattr(crud_alert, "write_queue", queue)
+
+    async def sighting_and_alert(session_factory):
+        async with session_factory() as session:
+            indicator = await crud_threat.record_sighting(
+                session, IndicatorType.IP, "203.0.113.7", ThreatSeverity.HIGH, 0.9, "test"
+            )
+            await crud_alert.create_alert(
+                session, "hit", "203.0.113.7 seen", ThreatSeverity.HIGH, indicator_id=indicator.id
+            )
+            return indicator.id
+
+    async def main():
+        await queue.start()
+        ids = await asyncio.gather(*(sighting_and_alert(AsyncSessionLocal) for _ in range(5)))
+        await queue.close()
+        return ids, await _count(ThreatIndicator), await _count(Alert)
+
+    ids, indicators, alerts = run(main())
+    assert len(set(ids)) == 1
+    assert indicators == 1 and alerts == 5
+    assert queue.stats["operations_committed"] == 10